@@ -0,0 +1,111 @@
+import csv
+import json
+
+from django.db.models import Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+
+from ..products.models import Order, OrderItem, Product
+from .filters import filter_orders
+from .serializers import OrderSerializer
+
+ORDER_COLUMNS = [
+    "order_id", "created_at", "user_name", "payment_method", "is_paid", "total_price",
+    "order_status", "payment_status", "full_name", "address", "city", "state",
+    "postal_code", "country", "phone",
+    "item_id", "product_id", "product_name", "quantity", "price",
+]
+PRODUCT_COLUMNS = ["id", "name", "price", "category", "image", "description", "created_at"]
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Walk ``queryset`` in id order, ``chunk_size`` rows at a time.
+
+    Each chunk is its own keyset query (``id > last seen``), so any
+    prefetches on the queryset run per chunk and neither the database
+    cursor nor Python ever holds more than one chunk.
+    """
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by("id")[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def order_queryset(params):
+    queryset = (
+        Order.objects
+        .select_related("user", "shipping_address")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product")))
+    )
+    return filter_orders(queryset, params)
+
+
+def product_queryset(params):
+    queryset = Product.objects.select_related("category")
+    if params.get("category"):
+        queryset = queryset.filter(category__name=params["category"])
+    return queryset
+
+
+def _order_lines(order):
+    shipping = getattr(order, "shipping_address", None)
+    head = [
+        order.id, order.created_at.isoformat(), order.user.username if order.user else "",
+        order.payment_method, order.is_paid, order.total_price,
+    ]
+    head += [
+        getattr(shipping, field, "") for field in (
+            "order_status", "payment_status", "full_name", "address", "city", "state",
+            "postal_code", "country", "phone",
+        )
+    ]
+    items = order.items.all()
+    if not items:
+        yield head + [""] * 5
+    for item in items:
+        yield head + [item.id, item.product_id, item.product.name, item.quantity, item.price]
+
+
+def stream_orders(queryset, file_format, chunk_size):
+    if file_format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(ORDER_COLUMNS)
+        for chunk in iter_chunks(queryset, chunk_size):
+            yield "".join(writer.writerow(line) for order in chunk for line in _order_lines(order))
+    else:
+        for chunk in iter_chunks(queryset, chunk_size):
+            yield "".join(
+                json.dumps(row, cls=JSONEncoder) + "\n"
+                for row in OrderSerializer(chunk, many=True).data
+            )
+
+
+def stream_products(queryset, file_format, chunk_size):
+    def rows(chunk):
+        for product in chunk:
+            yield [
+                product.id, product.name, product.price, product.category.name,
+                product.image, product.description, product.created_at.isoformat(),
+            ]
+
+    if file_format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(PRODUCT_COLUMNS)
+        for chunk in iter_chunks(queryset, chunk_size):
+            yield "".join(writer.writerow(row) for row in rows(chunk))
+    else:
+        for chunk in iter_chunks(queryset, chunk_size):
+            yield "".join(
+                json.dumps(dict(zip(PRODUCT_COLUMNS, row)), cls=JSONEncoder) + "\n"
+                for row in rows(chunk)
+            )
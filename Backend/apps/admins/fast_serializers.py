@@ -0,0 +1,102 @@
+"""
+Dict-building counterparts of the admin ``OrderSerializer`` and
+``ProductSerializer`` for ``values()`` rows; see
+``apps/products/fast_serializers.py``.
+"""
+from rest_framework import serializers
+
+from ..products.fast_serializers import format_datetime
+from ..products.inventory import stock_levels
+from ..products.models import OrderItem
+
+money_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+ORDER_FIELDS = (
+    "id", "user_id", "user__username", "total_price", "payment_method", "is_paid", "created_at",
+    "shipping_address__id",
+)
+SHIPPING_FIELDS = (
+    "full_name", "address", "city", "state",
+    "postal_code", "country", "phone",
+    "payment_status", "order_status",
+)
+ORDER_ITEM_FIELDS = ("id", "order_id", "product__name", "quantity", "price")
+PRODUCT_FIELDS = (
+    "id", "name", "price", "category_id", "image", "description", "category__name", "stock", "stock_shards",
+)
+
+
+def order_fields():
+    return ORDER_FIELDS + tuple("shipping_address__" + field for field in SHIPPING_FIELDS)
+
+
+def format_money(value):
+    return None if value is None else money_field.to_representation(value)
+
+
+def order_item_to_dict(row):
+    return {
+        "id": row["id"],
+        "product_name": row["product__name"],
+        "quantity": row["quantity"],
+        "price": format_money(row["price"]),
+    }
+
+
+def order_to_dict(row, items):
+    """``OrderSerializer`` for a row of ``values(*order_fields())`` and its item rows."""
+    data = {"id": row["id"]}
+    # The ModelSerializer skips user_name entirely when the order has no user.
+    if row["user_id"] is not None:
+        data["user_name"] = row["user__username"]
+    data["total_price"] = format_money(row["total_price"])
+    data["payment_method"] = row["payment_method"]
+    data["is_paid"] = row["is_paid"]
+    data["created_at"] = format_datetime(row["created_at"])
+    data["items"] = [order_item_to_dict(item) for item in items]
+    if row["shipping_address__id"] is None:
+        data["shipping_address"] = None
+    else:
+        data["shipping_address"] = {
+            field: row["shipping_address__" + field] for field in SHIPPING_FIELDS
+        }
+    return data
+
+
+def orders_to_dicts(rows):
+    """Serialize a page of order rows with one query for all of their items."""
+    rows = list(rows)
+    items = {row["id"]: [] for row in rows}
+    if items:
+        for item in (
+            OrderItem.objects.filter(order_id__in=list(items))
+            .order_by("id")
+            .values(*ORDER_ITEM_FIELDS)
+        ):
+            items[item["order_id"]].append(item)
+    return [order_to_dict(row, items[row["id"]]) for row in rows]
+
+
+def products_to_dicts(rows):
+    """``product_to_dict`` for every row, totalling sharded stock in one query."""
+    rows = list(rows)
+    levels = stock_levels([row["id"] for row in rows if row["stock_shards"]])
+    return [product_to_dict(row, levels) for row in rows]
+
+
+def product_to_dict(row, levels=None):
+    """
+    Admin ``ProductSerializer`` for a row of ``values(*PRODUCT_FIELDS)``.
+    ``levels`` holds the stock of sharded products, from ``stock_levels``.
+    """
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "price": float(row["price"]),
+        "category": row["category_id"],
+        "image": row["image"],
+        "description": row["description"],
+        "category_name": row["category__name"],
+        "stock": (levels or {}).get(row["id"], 0) if row["stock_shards"] else row["stock"],
+        "stock_shards": row["stock_shards"],
+    }
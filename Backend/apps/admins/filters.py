@@ -0,0 +1,49 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def parse_dates(params, *names):
+    """
+    Read inclusive ``YYYY-MM-DD`` query parameters, raising a 400 for any
+    that do not parse. Missing parameters come back as ``None``.
+    """
+    days = []
+    errors = {}
+    for name in names:
+        value = params.get(name)
+        day = parse_date(value) if value else None
+        if value and day is None:
+            errors[name] = 'Date has wrong format. Use YYYY-MM-DD.'
+        days.append(day)
+    if errors:
+        raise ValidationError(errors)
+    return days
+
+
+def parse_date_range(params):
+    """
+    Turn ``created_after`` / ``created_before`` into aware datetime bounds,
+    so the filter stays a plain range on ``created_at`` and can use its
+    index.
+    """
+    after, before = parse_dates(params, 'created_after', 'created_before')
+    tz = timezone.get_current_timezone()
+    start = after and datetime.combine(after, time.min, tzinfo=tz)
+    end = before and datetime.combine(before + timedelta(days=1), time.min, tzinfo=tz)
+    return start, end
+
+
+def filter_orders(queryset, params):
+    start, end = parse_date_range(params)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lt=end)
+    if params.get('order_status'):
+        queryset = queryset.filter(shipping_address__order_status=params['order_status'])
+    if params.get('payment_status'):
+        queryset = queryset.filter(shipping_address__payment_status=params['payment_status'])
+    return queryset
@@ -0,0 +1,188 @@
+import codecs
+import csv
+import json
+import os
+
+from django.db import transaction
+from rest_framework import serializers
+
+from ..products.cache import catalog_cache
+from ..products.models import Category, Product
+from ..products.snapshots import refresh_snapshots
+from .serializers import ProductSerializer
+
+FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+def guess_format(name):
+    return FORMATS.get(os.path.splitext(name or '')[1].lower())
+
+
+class ContextCategoryField(serializers.Field):
+    """
+    Category given by name, resolved against the ``categories`` mapping in
+    the serializer context instead of one query per row.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Category "{value}" does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        category_id = self.context['categories'].get(str(data).strip())
+        if category_id is None:
+            self.fail('does_not_exist', value=data)
+        return category_id
+
+    def to_representation(self, value):
+        return value
+
+
+class ProductImportSerializer(ProductSerializer):
+    category = ContextCategoryField()
+
+    class Meta(ProductSerializer.Meta):
+        fields = ["id", "name", "price", "category", "image", "description"]
+
+
+def read_rows(stream, file_format):
+    """
+    Yield ``(row_number, row)`` from a binary stream without loading it.
+    Rows that cannot be decoded are yielded as exceptions.
+    """
+    text = codecs.getreader('utf-8')(stream)
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, row
+        return
+
+    for number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+            continue
+        if not isinstance(row, dict):
+            row = ValueError('Expected a JSON object.')
+        yield number, row
+
+
+class ProductImporter:
+    """
+    Streaming upsert of products in batches.
+
+    Rows are validated with the admin ProductSerializer rules, categories
+    are resolved by name with one query per batch for names not seen
+    before, and each batch is written with one ``bulk_create`` and one
+    ``bulk_update`` in its own transaction. Rows carrying an ``id`` update
+    that product; rows without one are created. Only the current batch and
+    at most ``max_errors`` error entries are ever held in memory.
+    """
+    update_fields = ['name', 'price', 'category', 'image', 'description']
+
+    def __init__(self, batch_size=1000, max_errors=1000):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.categories = {}
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        batch = []
+        for number, row in rows:
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+        if batch:
+            self._process(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def _error(self, number, detail):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': number, 'errors': detail})
+
+    def _resolve_categories(self, rows):
+        names = {
+            str(row.get('category', '')).strip()
+            for _, row in rows if isinstance(row, dict)
+        } - set(self.categories)
+        names.discard('')
+        if names:
+            self.categories.update(
+                Category.objects.filter(name__in=names).values_list('name', 'id')
+            )
+
+    def _process(self, batch):
+        self._resolve_categories(batch)
+        context = {'categories': self.categories}
+
+        valid = []
+        for number, row in batch:
+            if isinstance(row, Exception):
+                self._error(number, {'non_field_errors': [str(row)]})
+                continue
+            serializer = ProductImportSerializer(data=row, context=context)
+            if not serializer.is_valid():
+                self._error(number, serializer.errors)
+                continue
+            try:
+                pk = int(row['id']) if row.get('id') not in (None, '') else None
+            except (TypeError, ValueError):
+                self._error(number, {'id': ['A valid integer is required.']})
+                continue
+            data = dict(serializer.validated_data)
+            data['category_id'] = data.pop('category')
+            valid.append((number, pk, data))
+
+        existing = set(
+            Product.objects.filter(id__in=[pk for _, pk, _ in valid if pk is not None])
+            .values_list('id', flat=True)
+        )
+        to_create, to_update = [], []
+        for number, pk, data in valid:
+            if pk is None:
+                to_create.append(Product(**data))
+            elif pk in existing:
+                to_update.append(Product(id=pk, **data))
+            else:
+                self._error(number, {'id': [f'Product {pk} does not exist.']})
+
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, self.update_fields)
+            # MySQL returns no ids from bulk inserts; products created there
+            # are encoded on read until the next rebuild_snapshots.
+            ids = [product.pk for product in to_create + to_update if product.pk is not None]
+            if ids:
+                names = {category_id: name for name, category_id in self.categories.items()}
+                refresh_snapshots(Product.objects.filter(id__in=ids), categories=names)
+            if to_create or to_update:
+                # Per batch, so an import that fails part way still
+                # invalidates the catalog for the batches it committed.
+                transaction.on_commit(catalog_cache.bump)
+        self.created += len(to_create)
+        self.updated += len(to_update)
@@ -0,0 +1,11 @@
+from ..jobs.registry import job
+from ..products.models import Order, OrderItem
+from .rollups import record_order
+
+
+@job('sales.record_order')
+def record_order_sales(order_id):
+    order = Order.objects.get(pk=order_id)
+    record_order(order, OrderItem.objects.filter(order_id=order_id).values_list(
+        'product_id', 'product__category_id', 'quantity', 'price',
+    ))
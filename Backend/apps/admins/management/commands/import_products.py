@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importers import ProductImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream products from a CSV or NDJSON file into the catalog (rows with an id update, others create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], dest='file_format')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-errors', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or guess_format(options['path'])
+        if file_format is None:
+            raise CommandError("Cannot tell the file format from its name; pass --format.")
+
+        importer = ProductImporter(batch_size=options['batch_size'], max_errors=options['max_errors'])
+        with open(options['path'], 'rb') as stream:
+            report = importer.run(read_rows(stream, file_format))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']}, updated {report['updated']}, failed {report['failed']}."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily, per-category and per-product sales rollups from order history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        processed = rebuild(chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups from {processed} orders."))
@@ -0,0 +1,8 @@
+from django.conf import settings
+from rest_framework.pagination import PageNumberPagination
+
+
+class AdminPagination(PageNumberPagination):
+    page_size = settings.ADMIN_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.ADMIN_MAX_PAGE_SIZE
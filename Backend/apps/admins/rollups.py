@@ -0,0 +1,161 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..products.models import Order, OrderItem
+from .models import CategorySales, DailySales, ProductSales
+
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def _increment(model, day, key_field, totals):
+    """
+    Add ``{key: (units, revenue)}`` onto the rows of ``model`` for ``day``.
+
+    Missing rows are inserted empty first, then every row is bumped by one
+    UPDATE with a CASE per column, so the cost is two statements however
+    many keys there are, and concurrent writers never lose an increment.
+    """
+    if not totals:
+        return
+    model.objects.bulk_create(
+        [model(day=day, **{key_field: key}) for key in totals], ignore_conflicts=True
+    )
+    model.objects.filter(day=day, **{f'{key_field}__in': list(totals)}).update(
+        units=F('units') + Case(
+            *[When(**{key_field: key}, then=Value(units)) for key, (units, _) in totals.items()],
+            output_field=models.PositiveIntegerField(),
+        ),
+        revenue=F('revenue') + Case(
+            *[When(**{key_field: key}, then=Value(revenue, output_field=MONEY)) for key, (_, revenue) in totals.items()],
+            output_field=MONEY,
+        ),
+    )
+
+
+def _apply(day, orders, product_totals, category_totals):
+    units = sum(units for units, _ in product_totals.values())
+    revenue = sum((revenue for _, revenue in product_totals.values()), Decimal('0.00'))
+    DailySales.objects.bulk_create([DailySales(day=day)], ignore_conflicts=True)
+    DailySales.objects.filter(day=day).update(
+        orders=F('orders') + orders,
+        units=F('units') + units,
+        revenue=F('revenue') + Value(revenue, output_field=MONEY),
+    )
+    _increment(ProductSales, day, 'product_id', product_totals)
+    _increment(CategorySales, day, 'category_id', category_totals)
+
+
+def record_order(order, lines):
+    """
+    Fold one order into the rollups. ``lines`` yields
+    ``(product_id, category_id, quantity, unit_price)``.
+    """
+    product_totals = defaultdict(lambda: (0, Decimal('0.00')))
+    category_totals = defaultdict(lambda: (0, Decimal('0.00')))
+    for product_id, category_id, quantity, price in lines:
+        for totals, key in ((product_totals, product_id), (category_totals, category_id)):
+            units, revenue = totals[key]
+            totals[key] = (units + quantity, revenue + price * quantity)
+    _apply(timezone.localdate(order.created_at), 1, product_totals, category_totals)
+
+
+def _day_bounds(first_day, last_day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _replace_days(after, through, daily, categories, products):
+    """
+    Swap in the rebuilt rows for the days in (``after``, ``through``]; an
+    open end reaches past the first or last order. Runs in its own
+    transaction, so readers see each range either before or after.
+    """
+    with transaction.atomic():
+        for model in (DailySales, CategorySales, ProductSales):
+            days = model.objects.all()
+            if after is not None:
+                days = days.filter(day__gt=after)
+            if through is not None:
+                days = days.filter(day__lte=through)
+            days.delete()
+        DailySales.objects.bulk_create(daily, batch_size=1000)
+        CategorySales.objects.bulk_create(categories, batch_size=1000)
+        ProductSales.objects.bulk_create(products, batch_size=1000)
+
+
+def rebuild(chunk_size=5000, stdout=None):
+    """
+    Recompute every rollup from order history.
+
+    Days are grouped into chunks of roughly ``chunk_size`` orders (a day is
+    never split). Each chunk is aggregated by the database in one query per
+    table and replaces the rollup rows for its days in its own transaction,
+    so a rebuild holds no long transaction and the dashboard never reads
+    empty tables. Chunks cover the gaps between them, which clears rows
+    for days that no longer have orders.
+    """
+    orders_per_day = list(
+        Order.objects
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by('day')
+        .values_list('day', 'count')
+    )
+    if not orders_per_day:
+        _replace_days(None, None, [], [], [])
+        return 0
+
+    processed = 0
+    previous = None
+    chunk, chunk_orders = [], 0
+    for index, (day, count) in enumerate(orders_per_day):
+        chunk.append((day, count))
+        chunk_orders += count
+        last = index == len(orders_per_day) - 1
+        if chunk_orders < chunk_size and not last:
+            continue
+
+        start, end = _day_bounds(chunk[0][0], chunk[-1][0])
+        rows = list(
+            OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+            .annotate(day=TruncDate('order__created_at'))
+            .values('day', 'product_id', 'product__category_id')
+            .annotate(units=Sum('quantity'), revenue=Sum(F('price') * F('quantity'), output_field=MONEY))
+        )
+
+        daily = {day: DailySales(day=day, orders=count) for day, count in chunk}
+        categories = {}
+        products = []
+        for row in rows:
+            products.append(ProductSales(
+                day=row['day'], product_id=row['product_id'], units=row['units'], revenue=row['revenue'],
+            ))
+            total = daily[row['day']]
+            total.units += row['units']
+            total.revenue += row['revenue']
+            key = (row['day'], row['product__category_id'])
+            category = categories.get(key)
+            if category is None:
+                category = categories[key] = CategorySales(
+                    day=row['day'], category_id=row['product__category_id'], revenue=Decimal('0.00'),
+                )
+            category.units += row['units']
+            category.revenue += row['revenue']
+
+        _replace_days(previous, None if last else chunk[-1][0], daily.values(), categories.values(), products)
+
+        processed += chunk_orders
+        if stdout is not None:
+            stdout.write(f"Processed {processed} orders (up to {chunk[-1][0]})")
+        previous = chunk[-1][0]
+        chunk, chunk_orders = [], 0
+    return processed
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from ..products.models import Category, Product, Cart, CartItem,OrderItem, Order, ShippingAddress
+from ..products.inventory import CURRENT, MAX_SHARDS, set_stock, stock_levels
+from .models import DailySales
 
 
 class AdminLoginSerializer(serializers.Serializer):
@@ -20,7 +22,36 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ["id", "name", "price", "category", "image", "description", "category_name"]
+        fields = ["id", "name", "price", "category", "image", "description", "category_name", "stock", "stock_shards"]
+        extra_kwargs = {"stock_shards": {"max_value": MAX_SHARDS}}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "stock" in data and instance.stock_shards:
+            data["stock"] = stock_levels([instance.pk]).get(instance.pk, 0)
+        return data
+
+    def validate(self, attrs):
+        if self.instance is None and attrs.get("stock_shards") and attrs.get("stock") is None:
+            raise serializers.ValidationError({"stock_shards": ["Set stock to spread it over shards."]})
+        return attrs
+
+    def create(self, validated_data):
+        stock = validated_data.pop("stock", None)
+        shards = validated_data.pop("stock_shards", 0)
+        product = super().create(validated_data)
+        if stock is not None:
+            set_stock(product, stock, shards)
+        return product
+
+    def update(self, instance, validated_data):
+        if "stock" not in validated_data and "stock_shards" not in validated_data:
+            return super().update(instance, validated_data)
+        stock = validated_data.pop("stock", CURRENT)
+        shards = validated_data.pop("stock_shards", instance.stock_shards)
+        product = super().update(instance, validated_data)
+        set_stock(product, stock, shards)
+        return product
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -73,3 +104,24 @@ class OrderSerializer(serializers.ModelSerializer):
             "id", "user_name", "total_price", "payment_method",
             "is_paid", "created_at", "items", "shipping_address"
         ]
+
+
+
+class DailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailySales
+        fields = ["day", "orders", "units", "revenue"]
+
+
+class CategorySalesSerializer(serializers.Serializer):
+    category_id = serializers.IntegerField()
+    category_name = serializers.CharField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ProductSalesSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    product_name = serializers.CharField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
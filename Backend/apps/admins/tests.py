@@ -1,3 +1,438 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from music_store.timing import RequestTimingMiddleware, request_metrics
+
+from ..jobs.worker import work_off
+from ..users.models import ContactMessage
+from ..products.cache import catalog_cache
+from ..products.inventory import CURRENT, set_stock, stock_levels
+from ..products.models import Category, Order, OrderItem, Product, ProductSnapshot, ShippingAddress, StockShard
+from .importers import ProductImporter
+from .models import CategorySales, DailySales, ProductSales
+from .serializers import OrderSerializer, ProductSerializer
+from .views import AdminExportView
+
+
+def create_orders(user, product, count, order_status="Pending", **extra):
+    orders = []
+    for _ in range(count):
+        order = Order.objects.create(
+            user=user, total_price=Decimal("20.00"), payment_method="card", is_paid=True, **extra
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=2, price=Decimal("10.00"))
+        ShippingAddress.objects.create(
+            order=order, full_name="Buyer", address="1 Main St", city="Chennai", state="TN",
+            postal_code="600001", country="India", phone="1234567890", order_status=order_status,
+        )
+        orders.append(order)
+    return orders
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+        self.buyer = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.admin)
+        self.category = Category.objects.create(name="Guitars")
+        self.product = Product.objects.create(
+            category=self.category, name="Stratocaster", description="Electric guitar",
+            price=10.0, image="https://example.com/strat.jpg",
+        )
+
+
+class AdminOrderListTests(AdminTestCase):
+    def test_page_query_count_does_not_grow(self):
+        create_orders(self.buyer, self.product, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get("/api/admin/orders/")
+        create_orders(self.buyer, self.product, 30)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get("/api/admin/orders/?page_size=25")
+        self.assertEqual(response.data["count"], 32)
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertEqual(len(small), len(large))
+
+    def test_filters(self):
+        create_orders(self.buyer, self.product, 2, order_status="Delivered")
+        old = create_orders(self.buyer, self.product, 1)[0]
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+
+        delivered = self.client.get("/api/admin/orders/", {"order_status": "Delivered"}).data
+        self.assertEqual(delivered["count"], 2)
+
+        today = timezone.localdate().isoformat()
+        recent = self.client.get("/api/admin/orders/", {"created_after": today, "created_before": today}).data
+        self.assertNotIn(old.id, [order["id"] for order in recent["results"]])
+        self.assertEqual(recent["count"], 2)
+
+        self.assertEqual(self.client.get("/api/admin/orders/", {"created_after": "yesterday"}).status_code, 400)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get("/api/admin/orders/").status_code, 403)
+
+
+class FastSerializerTests(AdminTestCase):
+    def test_order_list_matches_model_serializer(self):
+        create_orders(self.buyer, self.product, 2)
+        guest = Order.objects.create(total_price=Decimal("7.5"), payment_method="cash")
+        OrderItem.objects.create(order=guest, product=self.product, quantity=1, price=Decimal("7.50"))
+        orders = Order.objects.order_by("-created_at", "-id")
+
+        response = self.client.get("/api/admin/orders/")
+        self.assertEqual(
+            JSONRenderer().render(response.data["results"]),
+            JSONRenderer().render(OrderSerializer(orders, many=True).data),
+        )
+        self.assertNotIn("user_name", response.data["results"][0])
+        self.assertIsNone(response.data["results"][0]["shipping_address"])
+        self.assertEqual(
+            self.client.get(f"/api/admin/orders/{guest.id}/").content,
+            JSONRenderer().render(OrderSerializer(guest).data),
+        )
+
+    def test_product_list_matches_model_serializer(self):
+        response = self.client.get("/api/admin/products/")
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(ProductSerializer(Product.objects.all(), many=True).data),
+        )
+
+
+class AdminStockTests(AdminTestCase):
+    def test_list_shows_stock_including_shards(self):
+        set_stock(self.product, 10, shards=4)
+        row = self.client.get("/api/admin/products/").data[0]
+        self.assertEqual((row["stock"], row["stock_shards"]), (10, 4))
+        self.assertEqual(self.client.get(f"/api/admin/products/{self.product.id}/").data["stock"], 10)
+
+    def test_update_sets_stock_and_shards(self):
+        url = f"/api/admin/products/{self.product.id}/"
+        self.assertEqual(self.client.patch(url, {"stock": 12, "stock_shards": 3}, format="json").status_code, 200)
+        self.assertEqual(stock_levels([self.product.id])[self.product.id], 12)
+        self.assertEqual(StockShard.objects.filter(product=self.product).count(), 3)
+
+        response = self.client.patch(url, {"stock_shards": 0}, format="json")
+        self.assertEqual((response.data["stock"], response.data["stock_shards"]), (12, 0))
+        self.assertFalse(StockShard.objects.exists())
+
+        response = self.client.patch(url, {"price": 12.5}, format="json")
+        self.assertEqual((response.data["price"], response.data["stock"]), (12.5, 12))
+
+    def test_respreading_keeps_the_current_stock(self):
+        set_stock(self.product, 10, shards=4)
+        StockShard.objects.filter(product=self.product, shard=0).update(stock=0)
+        set_stock(self.product, CURRENT, shards=2)
+        self.assertEqual(list(StockShard.objects.filter(product=self.product).order_by("shard").values_list("stock", flat=True)), [4, 3])
+
+    def test_create_rejects_shards_without_stock(self):
+        response = self.client.post("/api/admin/products/", {
+            "name": "Telecaster", "price": 9, "category": self.category.id,
+            "image": "https://example.com/t.jpg", "description": "Guitar", "stock_shards": 4,
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stock_shards", response.data)
+        self.assertFalse(Product.objects.filter(name="Telecaster").exists())
+
+    def test_rejects_too_many_shards(self):
+        response = self.client.patch(f"/api/admin/products/{self.product.id}/", {"stock": 1, "stock_shards": 1000}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class SalesRollupTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.drums = Category.objects.create(name="Drums")
+        self.kit = Product.objects.create(
+            category=self.drums, name="Studio Kit", description="Drum kit",
+            price=25.5, image="https://example.com/kit.jpg",
+        )
+
+    def checkout(self, *lines):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post("/api/checkout/", {
+            "cart_items": [{"product": {"id": product.id}, "quantity": quantity} for product, quantity in lines],
+            "shipping_details": {},
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        work_off()
+        self.client.force_authenticate(self.admin)
+
+    def snapshot(self):
+        return (
+            list(DailySales.objects.values_list("day", "orders", "units", "revenue")),
+            sorted(CategorySales.objects.values_list("day", "category_id", "units", "revenue")),
+            sorted(ProductSales.objects.values_list("day", "product_id", "units", "revenue")),
+        )
+
+    def test_checkout_updates_rollups(self):
+        self.checkout((self.product, 2), (self.kit, 1))
+        self.checkout((self.product, 1))
+
+        daily = self.client.get("/api/admin/analytics/daily/").data["results"]
+        self.assertEqual(len(daily), 1)
+        self.assertEqual(daily[0]["orders"], 2)
+        self.assertEqual(daily[0]["units"], 4)
+        self.assertEqual(daily[0]["revenue"], "55.50")
+
+        products = self.client.get("/api/admin/analytics/products/").data
+        self.assertEqual([row["product_name"] for row in products], ["Stratocaster", "Studio Kit"])
+        self.assertEqual(products[0]["units"], 3)
+
+        categories = self.client.get("/api/admin/analytics/categories/").data
+        self.assertEqual({row["category_name"]: row["revenue"] for row in categories}, {"Guitars": "30.00", "Drums": "25.50"})
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.checkout((self.product, 2), (self.kit, 1))
+        self.checkout((self.kit, 3))
+        incremental = self.snapshot()
+        call_command("rebuild_sales_rollups", chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def backdate(self, days):
+        Order.objects.filter(pk=Order.objects.latest("id").pk).update(created_at=timezone.now() - timedelta(days=days))
+
+    def test_rebuild_clears_days_without_orders(self):
+        self.checkout((self.product, 1))
+        self.backdate(4)
+        self.checkout((self.kit, 1))
+        today = timezone.localdate()
+        for offset in (6, 2, -1):
+            DailySales.objects.create(day=today - timedelta(days=offset), orders=9)
+            ProductSales.objects.create(day=today - timedelta(days=offset), product=self.product, units=9)
+        call_command("rebuild_sales_rollups", chunk_size=1, stdout=StringIO())
+        self.assertEqual(list(DailySales.objects.order_by("day").values_list("day", flat=True)), [today - timedelta(days=4), today])
+        self.assertEqual(ProductSales.objects.count(), 2)
+
+    def test_rebuild_commits_each_chunk(self):
+        self.checkout((self.product, 1))
+        self.backdate(4)
+        self.checkout((self.kit, 1))
+        DailySales.objects.all().delete()
+        real_bulk_create = ProductSales.objects.bulk_create
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("lost the database")
+            return real_bulk_create(*args, **kwargs)
+
+        with mock.patch.object(ProductSales.objects, "bulk_create", fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                call_command("rebuild_sales_rollups", chunk_size=1, stdout=StringIO())
+        self.assertEqual(list(DailySales.objects.values_list("day", flat=True)), [timezone.localdate() - timedelta(days=4)])
+
+    def test_dashboard_reads_only_rollups(self):
+        self.checkout((self.product, 2))
+        with CaptureQueriesContext(connection) as queries:
+            for kind in ("daily", "categories", "products"):
+                self.client.get(f"/api/admin/analytics/{kind}/")
+        for query in queries:
+            self.assertNotIn("products_order", query["sql"])
+
+    def test_date_range(self):
+        self.checkout((self.product, 1))
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(self.client.get("/api/admin/analytics/daily/", {"start": tomorrow}).data["results"], [])
+
+    def test_daily_sales_are_paginated(self):
+        DailySales.objects.bulk_create(
+            DailySales(day=timezone.localdate() - timedelta(days=offset), orders=1) for offset in range(5)
+        )
+        response = self.client.get("/api/admin/analytics/daily/", {"page_size": 2, "page": 3})
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual([row["day"] for row in response.data["results"]], [timezone.localdate().isoformat()])
+
+
+class ProductImportTests(AdminTestCase):
+    def test_csv_upload_creates_updates_and_reports_errors(self):
+        content = (
+            "id,name,price,category,image,description\n"
+            f"{self.product.id},Stratocaster Deluxe,12.5,Guitars,https://example.com/s.jpg,Updated\n"
+            ",Telecaster,9,Guitars,https://example.com/t.jpg,New guitar\n"
+            ",Snare,4,Percussion,https://example.com/d.jpg,Unknown category\n"
+            ",Cheap,not-a-price,Guitars,https://example.com/c.jpg,Bad price\n"
+        )
+        upload = SimpleUploadedFile("products.csv", content.encode(), content_type="text/csv")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/admin/products/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["updated"], response.data["failed"]), (1, 1, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3, 4])
+        self.assertIn("category", response.data["errors"][0]["errors"])
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, "Stratocaster Deluxe")
+        self.assertTrue(Product.objects.filter(name="Telecaster", category=self.category).exists())
+        self.assertEqual(sum("products_category" in query["sql"] for query in queries), 1)
+        snapshots = {
+            snapshot.product_id: json.loads(bytes(snapshot.body))["name"] for snapshot in ProductSnapshot.objects.all()
+        }
+        self.assertEqual(snapshots[self.product.id], "Stratocaster Deluxe")
+        self.assertIn("Telecaster", snapshots.values())
+
+    def test_ndjson_body_stream(self):
+        lines = [
+            {"name": f"Pick {index}", "price": 1, "category": "Guitars",
+             "image": "https://example.com/p.jpg", "description": "Pick"}
+            for index in range(5)
+        ]
+        body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+        response = self.client.generic(
+            "POST", "/api/admin/products/import/", body.encode(), content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(response.data["errors"][0]["row"], 6)
+
+    def test_management_command_batches(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as handle:
+            for index in range(7):
+                handle.write(json.dumps({
+                    "name": f"String set {index}", "price": 3, "category": "Guitars",
+                    "image": "https://example.com/s.jpg", "description": "Strings",
+                }) + "\n")
+        self.addCleanup(os.unlink, handle.name)
+        call_command("import_products", handle.name, batch_size=3, stdout=StringIO())
+        self.assertEqual(Product.objects.filter(name__startswith="String set").count(), 7)
+
+    def test_committed_batches_invalidate_the_catalog_when_a_later_one_fails(self):
+        def rows():
+            yield 1, {"name": "Capo", "price": 2, "category": "Guitars",
+                      "image": "https://example.com/c.jpg", "description": "Capo"}
+            raise OSError("upload interrupted")
+
+        version = catalog_cache.version()
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(OSError):
+            ProductImporter(batch_size=1).run(rows())
+        self.assertTrue(Product.objects.filter(name="Capo").exists())
+        self.assertGreater(catalog_cache.version(), version)
+
+
+class ExportTests(AdminTestCase):
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_order_csv_has_one_line_per_item(self):
+        create_orders(self.buyer, self.product, 3, order_status="Delivered")
+        create_orders(self.buyer, self.product, 2)
+        response = self.client.get("/api/admin/export/orders/", {"order_status": "Delivered"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["product_name"], "Stratocaster")
+        self.assertEqual(rows[0]["order_status"], "Delivered")
+
+    def test_order_ndjson_matches_api_representation(self):
+        order = create_orders(self.buyer, self.product, 1)[0]
+        lines = self.read(self.client.get("/api/admin/export/orders/", {"file_format": "ndjson"})).splitlines()
+        self.assertEqual(json.loads(lines[0]), json.loads(self.client.get(f"/api/admin/orders/{order.id}/").content))
+
+    def test_queries_per_chunk_are_constant(self):
+        create_orders(self.buyer, self.product, 9)
+        with mock.patch.object(AdminExportView, "chunk_size", 3), CaptureQueriesContext(connection) as queries:
+            lines = self.read(self.client.get("/api/admin/export/orders/")).splitlines()
+        self.assertEqual(len(lines), 10)
+        # Three chunks of one order query and one item query each, plus the final empty probe.
+        self.assertEqual(len([q for q in queries if "products_order" in q["sql"]]), 3 * 2 + 1)
+
+    def test_product_export_uses_import_columns(self):
+        content = self.read(self.client.get("/api/admin/export/products/"))
+        row = next(csv.DictReader(StringIO(content)))
+        self.assertEqual((row["name"], row["category"]), ("Stratocaster", "Guitars"))
+
+    def test_stream_is_compressed_on_the_fly(self):
+        create_orders(self.buyer, self.product, 4)
+        plain = self.read(self.client.get("/api/admin/export/orders/"))
+        with mock.patch.object(AdminExportView, "chunk_size", 2):
+            response = self.client.get("/api/admin/export/orders/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode(), plain)
+
+    def test_bad_date_is_rejected_before_streaming(self):
+        response = self.client.get("/api/admin/export/orders/", {"created_after": "soon"})
+        self.assertEqual(response.status_code, 400)
+
+
+class RequestTimingTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        request_metrics.reset()
+
+    def test_server_timing_header_is_off_by_default(self):
+        self.assertFalse(self.client.get("/api/admin/orders/").has_header("Server-Timing"))
+
+    @override_settings(REQUEST_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        response = self.client.get("/api/admin/orders/")
+        timing = dict(part.strip().split(";", 1) for part in response["Server-Timing"].split(","))
+        self.assertEqual(set(timing), {"db", "view", "render", "total"})
+        self.assertRegex(timing["db"], r'desc="\d+ queries"')
+
+    def test_histograms_are_staff_only(self):
+        self.client.get(f"/api/product/{self.product.id}/")
+        self.client.get(f"/api/product/{self.product.id}/")
+        metrics = self.client.get("/api/admin/metrics/requests/").data
+        detail = metrics["api/product/<int:pk>/"]
+        self.assertEqual(detail["count"], 2)
+        self.assertEqual(sum(detail["buckets"].values()), 2)
+
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get("/api/admin/metrics/requests/").status_code, 403)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    def test_logs_slow_requests_and_repeated_queries(self):
+        def view(request):
+            for product_id in range(6):
+                list(Product.objects.filter(id=product_id))
+            return HttpResponse()
+
+        with self.assertLogs("music_store.timing", "WARNING") as logs:
+            RequestTimingMiddleware(view)(RequestFactory().get("/loop/"))
+        self.assertIn("6x SELECT", logs.output[0])
+        self.assertIn("Slow request GET /loop/", logs.output[1])
+
+
+class AdminContactMessageTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f"Fan {index}", email=f"fan{index % 2}@example.com", message="Hello")
+            for index in range(5)
+        )
+
+    def test_lists_newest_first_in_pages(self):
+        response = self.client.get("/api/admin/contact-messages/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Fan 4", "Fan 3"])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_filters_by_email(self):
+        response = self.client.get("/api/admin/contact-messages/", {"email": "FAN1@example.com"})
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Fan 3", "Fan 1"])
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get("/api/admin/contact-messages/").status_code, 403)
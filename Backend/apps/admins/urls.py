@@ -1,14 +1,26 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AdminCategoryViewSet, AdminProductViewSet, AdminUserViewSet, AdminOrderViewSet, AdminLoginView
+from .views import AdminCategoryViewSet, AdminProductViewSet, AdminUserViewSet, AdminOrderViewSet, AdminLoginView, AdminCatalogCacheStatsView
+from .views import AdminDailySalesView, AdminCategorySalesView, AdminProductSalesView
+from .views import AdminContactMessageViewSet
+from .views import AdminOrderExportView, AdminProductExportView, AdminRequestMetricsView, AdminJobMetricsView
 
 router = DefaultRouter()
 router.register(r'admin/categories', AdminCategoryViewSet)
 router.register(r'admin/products', AdminProductViewSet)
 router.register(r'admin/users', AdminUserViewSet)
 router.register(r'admin/orders', AdminOrderViewSet)
+router.register(r'admin/contact-messages', AdminContactMessageViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('admin/login/', AdminLoginView.as_view(), name='admin-login'),
+    path('admin/cache/stats/', AdminCatalogCacheStatsView.as_view(), name='admin-cache-stats'),
+    path('admin/metrics/requests/', AdminRequestMetricsView.as_view(), name='admin-request-metrics'),
+    path('admin/metrics/jobs/', AdminJobMetricsView.as_view(), name='admin-job-metrics'),
+    path('admin/analytics/daily/', AdminDailySalesView.as_view(), name='admin-sales-daily'),
+    path('admin/analytics/categories/', AdminCategorySalesView.as_view(), name='admin-sales-categories'),
+    path('admin/analytics/products/', AdminProductSalesView.as_view(), name='admin-sales-products'),
+    path('admin/export/orders/', AdminOrderExportView.as_view(), name='admin-export-orders'),
+    path('admin/export/products/', AdminProductExportView.as_view(), name='admin-export-products'),
 ]
\ No newline at end of file
@@ -1,43 +1,133 @@
 from rest_framework import status
-from rest_framework import viewsets, permissions
+from rest_framework import generics, viewsets, permissions
 from django.contrib.auth.models import User
+from django.db.models import F, Prefetch, Sum
+from django.http import StreamingHttpResponse
+from music_store.timing import request_metrics
 from .serializers import AdminLoginSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ..products.models import Category, Product, Order
+from ..products.cache import catalog_cache
+from ..products.models import Category, Product, Order, OrderItem
+from .fast_serializers import PRODUCT_FIELDS, order_fields, orders_to_dicts, products_to_dicts
+from .exports import order_queryset, product_queryset, stream_orders, stream_products
+from .filters import filter_orders, parse_dates
+from .importers import CONTENT_TYPES, ProductImporter, guess_format, read_rows
+from .models import CategorySales, DailySales, ProductSales
+from .pagination import AdminPagination
 from .serializers import CategorySerializer, ProductSerializer, UserSerializer, OrderSerializer, ShippingAddressSerializer
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import DailySalesSerializer, CategorySalesSerializer, ProductSalesSerializer
+from ..users.authentication import tokens_for
+from ..jobs.metrics import job_metrics
+from ..users.credentials import check_credentials
+from ..users.models import ContactMessage
+from ..users.serializers import ContactMessageSerializer
+from ..users.throttling import LoginAccountThrottle, LoginIPThrottle
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 
 
 class AdminPermission(permissions.BasePermission):
+    """
+    Staff only, checked against the user row rather than the token's
+    ``is_staff`` claim: a revocation may not have reached this process yet
+    (see ``TokenRevocations``), and a demoted admin must lose access at once.
+    """
+
     def has_permission(self, request, view):
-        return request.user.is_staff
+        if not request.user.is_staff:
+            return False
+        user = getattr(request.user, 'instance', request.user)
+        return user.is_active and user.is_staff
 
 
 class AdminCategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    permission_classes = [permissions.IsAdminUser]
+    permission_classes = [AdminPermission]
 
 
 class AdminProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    permission_classes = [permissions.IsAdminUser] 
+    permission_classes = [AdminPermission] 
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(*PRODUCT_FIELDS)
+        return Response(products_to_dicts(queryset))
+
+    @action(detail = False, methods = ["post"], url_path = "import", parser_classes = [MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Upsert products from a CSV or NDJSON file, either uploaded as the
+        multipart ``file`` field or streamed as the raw request body with a
+        ``text/csv`` / ``application/x-ndjson`` content type.
+        """
+        content_type = request.content_type.split(";")[0].strip()
+        file_format = request.query_params.get("file_format")
+        if content_type in CONTENT_TYPES:
+            stream = request.stream
+            file_format = file_format or CONTENT_TYPES[content_type]
+        else:
+            stream = request.FILES.get("file")
+            if stream is None:
+                return Response({"error": "No file provided"}, status = status.HTTP_400_BAD_REQUEST)
+            file_format = file_format or guess_format(stream.name)
+
+        if file_format not in ("csv", "ndjson"):
+            return Response({"error": "Unsupported file format"}, status = status.HTTP_400_BAD_REQUEST)
+
+        report = ProductImporter().run(read_rows(stream, file_format))
+        return Response(report, status = status.HTTP_200_OK)
 
 
 class AdminUserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    permission_classes = [permissions.IsAdminUser]
+    permission_classes = [AdminPermission]
+
+
+class AdminContactMessageViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ContactMessage.objects.order_by("-created_at", "-id")
+    serializer_class = ContactMessageSerializer
+    permission_classes = [AdminPermission]
+    pagination_class = AdminPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        email = self.request.query_params.get("email")
+        if email:
+            queryset = queryset.filter(email__iexact = email)
+        return queryset
 
 
 class AdminOrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all().order_by("-created_at")
     serializer_class = OrderSerializer
+    permission_classes = [AdminPermission]
+    pagination_class = AdminPagination
+
+    def get_queryset(self):
+        queryset = (
+            Order.objects
+            .select_related("user", "shipping_address")
+            .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id")))
+            .order_by("-created_at", "-id")
+        )
+        return filter_orders(queryset, self.request.query_params)
+
+    def get_rows(self):
+        # Same filters and ordering as get_queryset, read as plain rows.
+        return self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*order_fields())
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_rows())
+        return self.get_paginated_response(orders_to_dicts(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        row = generics.get_object_or_404(self.get_rows(), pk = kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return Response(orders_to_dicts([row])[0])
 
     @action(detail = True, methods = ["patch"])
     def update_status(self, request, pk = None):
@@ -54,8 +144,128 @@ class AdminOrderViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status = status.HTTP_400_BAD_REQUEST)
 
 
+class AdminSalesMixin:
+    permission_classes = [AdminPermission]
+
+    def filter_days(self, queryset):
+        start, end = parse_dates(self.request.query_params, "start", "end")
+        if start:
+            queryset = queryset.filter(day__gte=start)
+        if end:
+            queryset = queryset.filter(day__lte=end)
+        return queryset
+
+
+class AdminDailySalesView(AdminSalesMixin, generics.ListAPIView):
+    serializer_class = DailySalesSerializer
+    pagination_class = AdminPagination
+
+    def get_queryset(self):
+        return self.filter_days(DailySales.objects.order_by("day"))
+
+
+class AdminCategorySalesView(AdminSalesMixin, generics.ListAPIView):
+    serializer_class = CategorySalesSerializer
+
+    def get_queryset(self):
+        return (
+            self.filter_days(CategorySales.objects.all())
+            .values("category_id")
+            .annotate(category_name=F("category__name"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "category_id")
+        )
+
+
+class AdminProductSalesView(AdminSalesMixin, generics.ListAPIView):
+    serializer_class = ProductSalesSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.query_params.get("limit", self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        return (
+            self.filter_days(ProductSales.objects.all())
+            .values("product_id")
+            .annotate(product_name=F("product__name"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "product_id")[:limit]
+        )
+
+
+class AdminExportView(APIView):
+    """
+    Streams ``write_rows(select_rows(query_params), file_format, chunk_size)``
+    as a download named ``name``; subclasses set the three.
+    """
+    permission_classes = [AdminPermission]
+    content_types = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+    chunk_size = 1000
+    name = None
+    select_rows = None
+    write_rows = None
+
+    def get(self, request):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in self.content_types:
+            return Response({"error": "Unsupported file format"}, status = status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            self.write_rows(self.select_rows(request.query_params), file_format, self.chunk_size),
+            content_type = self.content_types[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{self.name}.{file_format}"'
+        return response
+
+
+class AdminOrderExportView(AdminExportView):
+    name = "orders"
+    select_rows = staticmethod(order_queryset)
+    write_rows = staticmethod(stream_orders)
+
+
+class AdminProductExportView(AdminExportView):
+    name = "products"
+    select_rows = staticmethod(product_queryset)
+    write_rows = staticmethod(stream_products)
+
+
+class AdminCatalogCacheStatsView(APIView):
+    permission_classes = [AdminPermission]
+
+    def get(self, request):
+        return Response(catalog_cache.stats())
+
+
+class AdminRequestMetricsView(APIView):
+    permission_classes = [AdminPermission]
+
+    def get(self, request):
+        return Response(request_metrics.snapshot())
+
+    def delete(self, request):
+        request_metrics.reset()
+        return Response(status = status.HTTP_204_NO_CONTENT)
+
+
+class AdminJobMetricsView(APIView):
+    permission_classes = [AdminPermission]
+
+    def get(self, request):
+        try:
+            window = int(request.query_params.get("window", 300))
+        except ValueError:
+            window = 0
+        if window < 1:
+            return Response({"error": "window must be a positive number of seconds"}, status = status.HTTP_400_BAD_REQUEST)
+        return Response(job_metrics(window = window))
+
+
 class AdminLoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
+    throttle_account_field = 'username'
 
     def post(self, request):
         serializer = AdminLoginSerializer(data=request.data)
@@ -63,10 +273,10 @@ class AdminLoginView(APIView):
         username = serializer.validated_data['username']
         password = serializer.validated_data['password']
 
-        user = authenticate(username = username, password = password)
+        user = check_credentials(User.objects.filter(username = username), password)
 
         if user and user.is_staff:
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for(user)
             return Response({
                 'access': str(refresh.access_token)
             })
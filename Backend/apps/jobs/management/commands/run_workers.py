@@ -0,0 +1,143 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...metrics import job_metrics
+from ...worker import Worker, purge
+
+
+def work(stop, options):
+    """Body of one worker process or thread."""
+    try:
+        Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'], stop=stop).run(
+            burst=options['burst'],
+        )
+    finally:
+        connections.close_all()
+
+
+def work_in_thread(stop, options):
+    # Threads have no exit code; set one like a process's, so the
+    # supervisor restarts a worker that died rather than one that finished.
+    thread = threading.current_thread()
+    try:
+        work(stop, options)
+    except BaseException:
+        thread.exitcode = 1
+        raise
+    thread.exitcode = 0
+
+
+def work_in_process(options):
+    # The supervisor stops a worker process with SIGTERM, and Ctrl-C reaches
+    # the whole process group: either way, finish the current job first.
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    work(stop, options)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers: a pool of processes that each claim batches of due jobs "
+        "and run them. SIGTERM or Ctrl-C lets every worker finish its current job and hand back "
+        "the rest of its batch. Prints per-kind throughput every --metrics-interval seconds and "
+        "deletes finished jobs older than JOBS_KEEP_DONE_HOURS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOBS_PROCESSES,
+                            help="Worker processes; 1 runs a single worker in this process.")
+        parser.add_argument('--batch-size', type=int, default=settings.JOBS_BATCH_SIZE,
+                            help="Jobs claimed per query.")
+        parser.add_argument('--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+                            help="Seconds an idle worker waits before looking again.")
+        parser.add_argument('--metrics-interval', type=float, default=60.0,
+                            help="Seconds between throughput reports; 0 turns them off.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no job is due instead of waiting for more.")
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--processes and --batch-size must be positive.")
+        started = time.monotonic()
+        purged = purge()
+        if purged:
+            self.stdout.write(f"Deleted {purged} finished jobs.")
+
+        # Threads share ``stop``; processes are each sent SIGTERM instead,
+        # since a multiprocessing Event can hang its setter when a process
+        # waiting on it has exited.
+        stop = threading.Event()
+        if options['processes'] > 1:
+            # Fork rather than spawn: children inherit the configured project.
+            # Close the parent's connections so no two processes share one.
+            context = multiprocessing.get_context('fork')
+            connections.close_all()
+
+        def spawn(index):
+            if options['processes'] == 1:
+                worker = threading.Thread(target=work_in_thread, args=(stop, options), name='job-worker')
+            else:
+                worker = context.Process(target=work_in_process, args=(options,), name=f'job-worker-{index}')
+            worker.start()
+            return worker
+
+        def stop_all():
+            stop.set()
+            if options['processes'] > 1:
+                for worker in workers:
+                    if worker.is_alive():
+                        worker.terminate()
+
+        previous = {
+            signum: signal.signal(signum, lambda *args: stop.set())
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        workers = [spawn(index) for index in range(options['processes'])]
+        self.stdout.write(f"Started {len(workers)} job workers.")
+        next_report = next_purge = time.monotonic()
+        try:
+            while not stop.is_set():
+                # Before the liveness check, so a worker that died at once
+                # is replaced rather than ending the run.
+                for index, worker in enumerate(workers):
+                    if getattr(worker, 'exitcode', 0) and not stop.is_set():
+                        self.stderr.write(f"{worker.name} exited with {worker.exitcode}; starting another.")
+                        workers[index] = spawn(index)
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                stop.wait(0.5)
+                now = time.monotonic()
+                if options['metrics_interval'] and now - next_report >= options['metrics_interval']:
+                    next_report = now
+                    self.report(job_metrics(window=max(1, round(options['metrics_interval']))))
+                if now - next_purge >= 3600:
+                    next_purge = now
+                    purge()
+        finally:
+            stop_all()
+            for worker in workers:
+                worker.join()
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        if options['burst']:
+            self.report(job_metrics(window=max(1, round(time.monotonic() - started))))
+
+    def report(self, metrics):
+        self.stdout.write(f"\nJobs in the last {metrics['window_seconds']} s")
+        self.stdout.write(
+            f"  {'kind':<28}{'done':>8}{'done/s':>9}{'failed':>8}{'retries':>9}{'mean ms':>10}"
+            f"{'queued':>8}{'running':>9}{'lag s':>8}"
+        )
+        for kind, row in metrics['kinds'].items():
+            mean_ms = f"{row['mean_ms']:.2f}" if row['mean_ms'] is not None else '-'
+            self.stdout.write(
+                f"  {kind:<28}{row['done']:>8}{row['per_second']:>9.2f}{row['failed']:>8}{row['retries']:>9}"
+                f"{mean_ms:>10}{row['queued']:>8}{row['running']:>9}{row['lag_seconds']:>8.1f}"
+            )
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import Job
+
+
+def job_metrics(window=300):
+    """
+    Per-kind throughput over the last ``window`` seconds, read from the job
+    table so it covers every worker process: jobs done and failed, retries
+    spent on them, run times, and what is still queued. ``lag_seconds`` is
+    how long the oldest due job has been waiting.
+    """
+    now = timezone.now()
+    kinds = {}
+
+    def entry(kind):
+        return kinds.setdefault(kind, {
+            'done': 0, 'failed': 0, 'per_second': 0.0, 'retries': 0, 'mean_ms': None, 'max_ms': None,
+            'queued': 0, 'retrying': 0, 'running': 0, 'lag_seconds': 0.0,
+        })
+
+    finished = (
+        Job.objects
+        .filter(finished_at__gte=now - timedelta(seconds=window))
+        .values('kind')
+        .annotate(
+            done=Count('id', filter=Q(status=Job.DONE)),
+            failed=Count('id', filter=Q(status=Job.FAILED)),
+            attempts=Sum('attempts'),
+            mean_ms=Avg('duration_ms', filter=Q(status=Job.DONE)),
+            max_ms=Max('duration_ms', filter=Q(status=Job.DONE)),
+        )
+        .order_by()
+    )
+    for row in finished:
+        kind = entry(row['kind'])
+        kind['done'] = row['done']
+        kind['failed'] = row['failed']
+        kind['per_second'] = round(row['done'] / window, 3)
+        kind['retries'] = row['attempts'] - row['done'] - row['failed']
+        if row['mean_ms'] is not None:
+            kind['mean_ms'] = round(row['mean_ms'], 3)
+            kind['max_ms'] = round(row['max_ms'], 3)
+
+    pending = (
+        Job.objects
+        .filter(status__in=(Job.QUEUED, Job.RUNNING))
+        .values('kind')
+        .annotate(
+            queued=Count('id', filter=Q(status=Job.QUEUED)),
+            retrying=Count('id', filter=Q(status=Job.QUEUED, attempts__gt=0)),
+            running=Count('id', filter=Q(status=Job.RUNNING)),
+            oldest=Min('run_at', filter=Q(status=Job.QUEUED, run_at__lte=now)),
+        )
+        .order_by()
+    )
+    for row in pending:
+        kind = entry(row['kind'])
+        kind['queued'] = row['queued']
+        kind['retrying'] = row['retrying']
+        kind['running'] = row['running']
+        if row['oldest'] is not None:
+            kind['lag_seconds'] = round((now - row['oldest']).total_seconds(), 3)
+
+    return {'window_seconds': window, 'kinds': dict(sorted(kinds.items()))}
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+handlers = {}
+
+
+def job(kind, max_attempts=None):
+    """
+    Register the decorated function as the handler for ``kind``. It is
+    called with the job's payload as keyword arguments, so payloads hold
+    ids and plain values, never model instances.
+    """
+    def decorator(func):
+        func.job_kind = kind
+        func.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        handlers[kind] = func
+        return func
+    return decorator
+
+
+def build(kind, payload=None, delay=0):
+    try:
+        handler = handlers[kind]
+    except KeyError:
+        raise LookupError(f"No job handler is registered for {kind!r}.") from None
+    return Job(
+        kind=kind, payload=payload or {}, max_attempts=handler.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue(kind, payload=None, delay=0):
+    """
+    Queue one job. Called inside a transaction, the job commits or rolls
+    back with the rest of it, so work is never queued for a write that did
+    not happen.
+    """
+    queued = build(kind, payload, delay)
+    queued.save()
+    return queued
+
+
+def enqueue_many(jobs):
+    """Queue ``(kind, payload)`` pairs with one INSERT."""
+    return Job.objects.bulk_create([build(kind, payload) for kind, payload in jobs])
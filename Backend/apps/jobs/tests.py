@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..products.models import Category
+from .metrics import job_metrics
+from .models import Job
+from .registry import enqueue, enqueue_many, handlers, job
+from .worker import Worker, claim, purge, release, run, work_off
+
+
+def add_category(name):
+    Category.objects.create(name=name)
+
+
+def add_category_then_fail(name):
+    Category.objects.create(name=name)
+    raise RuntimeError("boom")
+
+
+class JobTestMixin:
+    def setUp(self):
+        patcher = mock.patch.dict(handlers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        job("tests.add_category")(add_category)
+        job("tests.fail", max_attempts=2)(add_category_then_fail)
+
+
+class JobRunTests(JobTestMixin, TestCase):
+    def test_runs_due_jobs_with_their_payload(self):
+        enqueue_many([("tests.add_category", {"name": "Guitars"}), ("tests.add_category", {"name": "Drums"})])
+        self.assertEqual(work_off(), 2)
+        self.assertEqual(sorted(Category.objects.values_list("name", flat=True)), ["Drums", "Guitars"])
+        self.assertEqual(set(Job.objects.values_list("status", "attempts")), {(Job.DONE, 1)})
+        self.assertFalse(Job.objects.filter(duration_ms__isnull=True).exists())
+
+    def test_unknown_kind_is_refused(self):
+        with self.assertRaises(LookupError):
+            enqueue("tests.missing")
+
+    def test_delayed_job_waits(self):
+        enqueue("tests.add_category", {"name": "Guitars"}, delay=60)
+        self.assertEqual(work_off(), 0)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_failure_rolls_back_and_retries_later(self):
+        queued = enqueue("tests.fail", {"name": "Guitars"})
+        with self.assertLogs("apps.jobs.worker", "WARNING"):
+            self.assertEqual(work_off(), 0)
+        self.assertFalse(Category.objects.exists())
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.claimed_by), (Job.QUEUED, 1, ""))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", queued.last_error)
+
+    @override_settings(JOBS_RETRY_BACKOFF=0)
+    def test_gives_up_after_max_attempts(self):
+        queued = enqueue("tests.fail", {"name": "Guitars"})
+        with self.assertLogs("apps.jobs.worker", "WARNING") as logs:
+            work_off()
+        self.assertEqual([record.levelname for record in logs.records], ["WARNING", "ERROR"])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_claims_do_not_overlap(self):
+        enqueue_many([("tests.add_category", {"name": f"Category {index}"}) for index in range(5)])
+        first = claim("first", 3)
+        second = claim("second", 3)
+        self.assertEqual((len(first), len(second)), (3, 2))
+        self.assertFalse({job.pk for job in first} & {job.pk for job in second})
+        self.assertEqual(claim("third", 3), [])
+
+    @override_settings(JOBS_LEASE_SECONDS=60)
+    def test_expired_lease_is_claimed_again(self):
+        enqueue("tests.add_category", {"name": "Guitars"})
+        [stale] = claim("stalled", 1)
+        self.assertEqual(claim("other", 1), [])
+        Job.objects.update(claimed_at=timezone.now() - timedelta(seconds=61))
+
+        [fresh] = claim("other", 1)
+        self.assertEqual(fresh.attempts, 2)
+        # The stalled worker wakes up: its result is discarded.
+        with self.assertLogs("apps.jobs.worker", "WARNING"):
+            self.assertFalse(run(stale))
+        self.assertFalse(Category.objects.exists())
+        self.assertTrue(run(fresh))
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_release_does_not_spend_an_attempt(self):
+        enqueue_many([("tests.add_category", {"name": f"Category {index}"}) for index in range(2)])
+        release(claim("stopping", 2))
+        self.assertEqual(set(Job.objects.values_list("status", "attempts", "claimed_by")), {(Job.QUEUED, 0, "")})
+
+    @override_settings(JOBS_RETRY_BACKOFF=0)
+    def test_purge_keeps_failed_jobs(self):
+        enqueue_many([("tests.add_category", {"name": "Guitars"}), ("tests.fail", {"name": "Drums"})])
+        with self.assertLogs("apps.jobs.worker", "WARNING"):
+            work_off()
+        Job.objects.update(finished_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(purge(hours=24), 1)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+
+class JobMetricsTests(JobTestMixin, TestCase):
+    @override_settings(JOBS_RETRY_BACKOFF=0)
+    def test_reports_each_kind(self):
+        enqueue_many([("tests.add_category", {"name": f"Category {index}"}) for index in range(3)])
+        enqueue("tests.fail", {"name": "Drums"})
+        with self.assertLogs("apps.jobs.worker", "WARNING"):
+            work_off()
+        enqueue("tests.add_category", {"name": "Pianos"})
+
+        kinds = job_metrics(window=60)["kinds"]
+        self.assertEqual(
+            {kind: (row["done"], row["failed"], row["retries"], row["queued"]) for kind, row in kinds.items()},
+            {"tests.add_category": (3, 0, 0, 1), "tests.fail": (0, 1, 1, 0)},
+        )
+        self.assertEqual(kinds["tests.add_category"]["per_second"], 0.05)
+        self.assertIsNotNone(kinds["tests.add_category"]["mean_ms"])
+
+    def test_admin_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True))
+        enqueue("tests.add_category", {"name": "Guitars"})
+        response = client.get("/api/admin/metrics/jobs/", {"window": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["window_seconds"], 30)
+        self.assertEqual(response.data["kinds"]["tests.add_category"]["queued"], 1)
+        self.assertEqual(client.get("/api/admin/metrics/jobs/", {"window": "soon"}).status_code, 400)
+
+        client.force_authenticate(User.objects.create_user("buyer", "buyer@example.com", "pass1234"))
+        self.assertEqual(client.get("/api/admin/metrics/jobs/").status_code, 403)
+
+
+class RunWorkersCommandTests(JobTestMixin, TransactionTestCase):
+    def test_burst_runs_everything_due(self):
+        enqueue_many([("tests.add_category", {"name": f"Category {index}"}) for index in range(5)])
+        out = StringIO()
+        call_command("run_workers", processes=1, batch_size=2, burst=True, stdout=out)
+        self.assertEqual(Category.objects.count(), 5)
+        self.assertEqual(set(Job.objects.values_list("status", flat=True)), {Job.DONE})
+        self.assertIn("tests.add_category", out.getvalue())
+
+    def test_dead_worker_thread_is_replaced(self):
+        enqueue("tests.add_category", {"name": "Guitars"})
+        run, calls = Worker.run, []
+
+        def fail_once(worker, **kwargs):
+            calls.append(worker)
+            if len(calls) == 1:
+                raise DatabaseError("gone away")
+            return run(worker, **kwargs)
+
+        with mock.patch.object(Worker, "run", autospec=True, side_effect=fail_once), \
+                mock.patch("threading.excepthook"):
+            err = StringIO()
+            call_command("run_workers", processes=1, burst=True, stdout=StringIO(), stderr=err)
+        self.assertIn("job-worker exited with 1; starting another.", err.getvalue())
+        self.assertTrue(Category.objects.filter(name="Guitars").exists())
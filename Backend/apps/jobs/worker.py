@@ -0,0 +1,168 @@
+"""
+Claiming and running background jobs.
+
+A worker claims a batch of due jobs at a time. Where the database supports
+``SELECT ... FOR UPDATE SKIP LOCKED`` (MySQL 8, PostgreSQL) concurrent
+workers skip the rows another worker is claiming instead of queueing behind
+its lock. SQLite has no row locks but runs one writer at a time, so there
+the claiming UPDATE re-checks that each row is still due and only one
+worker wins it; a worker that loses some rows just runs a smaller batch.
+
+A claim counts as an attempt and starts a lease of ``JOBS_LEASE_SECONDS``;
+a job whose worker died mid-run becomes due again when the lease expires.
+The handler runs in one transaction with the update that marks its job
+done, so a handler that only writes to the database takes effect once
+however often it is retried. A failed attempt is retried after an
+exponential backoff until ``max_attempts``, then kept as ``failed`` with its
+traceback.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import handlers
+
+logger = logging.getLogger(__name__)
+
+
+def due(now):
+    expired = now - timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, claimed_at__lt=expired)
+
+
+def claim(worker, limit):
+    """Claim up to ``limit`` due jobs for ``worker``, oldest first."""
+    now = timezone.now()
+    # Unique per claim, so the rows this call won can be read back.
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    candidates = Job.objects.filter(due(now)).order_by('run_at', 'id')
+
+    def take(ids):
+        if not ids:
+            return 0
+        return Job.objects.filter(due(now), id__in=ids).update(
+            status=Job.RUNNING, claimed_by=token, claimed_at=now, attempts=F('attempts') + 1,
+        )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            taken = take(list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit]))
+    else:
+        # Nothing to lock: read the candidates outside a transaction and let
+        # the UPDATE, a single statement, re-check which are still due.
+        taken = take(list(candidates.values_list('id', flat=True)[:limit]))
+    if not taken:
+        return []
+    return list(Job.objects.filter(claimed_by=token).order_by('run_at', 'id'))
+
+
+def release(jobs):
+    """Give back claimed jobs that were never started, without spending an attempt."""
+    Job.objects.filter(pk__in=[job.pk for job in jobs], claimed_by__in={job.claimed_by for job in jobs}).update(
+        status=Job.QUEUED, claimed_by='', claimed_at=None, attempts=F('attempts') - 1,
+    )
+
+
+def backoff(attempts):
+    delay = min(settings.JOBS_RETRY_BACKOFF_MAX, settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1))
+    # Jitter spreads out the retries of jobs that failed together.
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run(job):
+    """Run one claimed job and record the outcome. Returns True if it succeeded."""
+    start = time.perf_counter()
+    claimed = Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by)
+    try:
+        handler = handlers.get(job.kind)
+        if handler is None:
+            raise LookupError(f"No job handler is registered for {job.kind!r}.")
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("The worker running the last attempt stopped before finishing it.")
+        with transaction.atomic():
+            handler(**job.payload)
+            finished = claimed.update(
+                status=Job.DONE, finished_at=timezone.now(),
+                duration_ms=(time.perf_counter() - start) * 1000, last_error='',
+            )
+            if not finished:
+                # The lease ran out and another worker has the job now.
+                transaction.set_rollback(True)
+                logger.warning('Lost the claim on job %s; discarding its result', job)
+                return False
+    except Exception:
+        duration_ms = (time.perf_counter() - start) * 1000
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s failed for good after %d attempts', job, job.attempts, exc_info=True)
+            claimed.update(status=Job.FAILED, finished_at=now, duration_ms=duration_ms, last_error=error)
+        else:
+            logger.warning('Job %s failed (attempt %d of %d), retrying', job, job.attempts, job.max_attempts,
+                           exc_info=True)
+            claimed.update(
+                status=Job.QUEUED, run_at=now + timedelta(seconds=backoff(job.attempts)),
+                claimed_by='', claimed_at=None, duration_ms=duration_ms, last_error=error,
+            )
+        return False
+    return True
+
+
+def purge(hours=None):
+    """Delete jobs that finished successfully ``hours`` ago or more; failed jobs are kept."""
+    hours = settings.JOBS_KEEP_DONE_HOURS if hours is None else hours
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=timezone.now() - timedelta(hours=hours)).delete()
+    return deleted
+
+
+class Worker:
+    def __init__(self, name=None, batch_size=None, poll_interval=None, stop=None):
+        self.name = name or f'{socket.gethostname()[:32]}:{os.getpid()}'
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        self.poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+        # A threading or multiprocessing Event.
+        self.stop = stop or threading.Event()
+
+    def run(self, burst=False):
+        """
+        Work until ``stop`` is set or, with ``burst``, until no job is due.
+        Returns the number of jobs that succeeded.
+        """
+        succeeded = 0
+        while not self.stop.is_set():
+            close_old_connections()
+            try:
+                jobs = claim(self.name, self.batch_size)
+            except DatabaseError:
+                # A restarting or busy database should not end the worker.
+                logger.exception('Could not claim jobs; retrying in %s s', self.poll_interval)
+                self.stop.wait(self.poll_interval)
+                continue
+            if not jobs:
+                if burst:
+                    break
+                self.stop.wait(self.poll_interval)
+                continue
+            for index, job in enumerate(jobs):
+                if self.stop.is_set():
+                    release(jobs[index:])
+                    break
+                succeeded += run(job)
+        return succeeded
+
+
+def work_off():
+    """Run every due job in this thread; returns the number that succeeded."""
+    return Worker(name='inline').run(burst=True)
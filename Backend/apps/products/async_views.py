@@ -0,0 +1,129 @@
+"""
+Native async versions of the catalog and cart reads.
+
+Under ASGI a synchronous DRF view occupies a worker thread for the whole
+request, including the time spent waiting on the database. These views are
+coroutines: authentication, permissions, validators, the catalog cache and
+serialization run on the event loop, and only the queries themselves leave
+it, through Django's async ORM. They share their querysets, serializers and
+cache keys with the synchronous views, so both return identical bodies and
+validators.
+
+They are mounted by ``music_store.urls_async``; point ``ROOT_URLCONF`` at it
+to serve them.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import SynchronousOnlyOperation
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .conditional import with_validators
+from .fast_serializers import cart_to_dict, product_fields, product_to_dict
+from .models import Product
+from .snapshots import SNAPSHOT_FIELDS, EncodedResponse, asnapshot_bodies, wants_snapshots
+from .views import CartDetailView, ProductRetrieve, ProductView, cart_rows
+
+
+class AsyncAPIViewMixin:
+    """
+    ``APIView.dispatch`` as a coroutine, so Django runs the view on the
+    event loop. Handlers are ``async def``.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # ``options`` is inherited from APIView and stays synchronous.
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        try:
+            self.initial(request, *args, **kwargs)
+        except SynchronousOnlyOperation:
+            # An authenticator needed the database: a token issued without
+            # the user claims, or JWT_STATELESS_AUTH turned off.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+
+class AsyncCatalogMixin(AsyncAPIViewMixin):
+    """
+    The ``CatalogConditionalGetMixin`` / ``CatalogCacheMixin`` pipeline:
+    validators and cache lookups need no query, and a miss is built by the
+    view's own ``async read(request, *args, **kwargs)``.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.cached_response(request)
+        if response is None:
+            response = await self.read(request, *args, **kwargs)
+            if getattr(self, 'catalog_cache_key', None):
+                response['X-Cache'] = 'MISS'
+        return with_validators(response, etag, last_modified)
+
+
+class AsyncProductView(AsyncCatalogMixin, ProductView):
+    async def read(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if wants_snapshots(request):
+            page = await self.paginator.apaginate_queryset(queryset.values(*SNAPSHOT_FIELDS), request, view=self)
+            return self.get_encoded_response(await asnapshot_bodies(page))
+        page = await self.paginator.apaginate_queryset(queryset.values(*product_fields()), request, view=self)
+        return self.get_paginated_response([product_to_dict(row) for row in page])
+
+
+class AsyncProductRetrieve(AsyncCatalogMixin, ProductRetrieve):
+    async def read(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if wants_snapshots(request):
+            row = await aget_object_or_404(Product.objects.values(*SNAPSHOT_FIELDS), pk=pk)
+            return EncodedResponse((await asnapshot_bodies([row]))[0])
+        row = await aget_object_or_404(self.get_queryset().values(*product_fields()), pk=pk)
+        return Response(product_to_dict(row))
+
+
+class AsyncCartDetailView(AsyncAPIViewMixin, CartDetailView):
+    async def get(self, request, *args, **kwargs):
+        # The full representation's rows carry every validator column, so
+        # one query serves both (the synchronous view runs two).
+        rows = [row async for row in cart_rows(request.user.id)]
+        etag = self.etag_from_rows([
+            (row['id'], row['items__id'], row['items__product__id'], row['items__quantity']) for row in rows
+        ])
+        if etag is not None:
+            etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await self.retrieve(request, rows)
+        return with_validators(response, etag, None)
+
+    async def retrieve(self, request, rows):
+        if not rows:
+            raise NotFound("Cart not found.")
+        if self.is_compact():
+            cart = await self.get_queryset().aget(pk=rows[0]['id'])
+            return Response(self.get_serializer(cart).data)
+        return Response(cart_to_dict(rows))
@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from music_store.compression import precompress
+
+
+class CatalogCache:
+    """
+    Versioned cache of rendered catalog responses.
+
+    Every key embeds the current catalog version, and any product or category
+    write bumps that version, so entries are never invalidated one by one:
+    stale ones simply stop being addressed and age out of the backend.
+
+    With ``CATALOG_CACHE_PRECOMPRESS`` an entry also holds the body
+    compressed in each available encoding, made once when it is stored.
+
+    The version lives in the configured cache itself. With the local-memory
+    backend that makes it per-process, which is only correct when a single
+    process serves the API, so outside ``DEBUG`` the ``products.E001``
+    system check refuses it: point ``CATALOG_CACHE_ALIAS`` at a shared
+    backend (memcached, redis), or silence the check for a single process.
+    """
+    version_key = 'catalog:version'
+    modified_key = 'catalog:modified'
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Seed from the clock rather than 1 so that a cleared or evicted
+            # version never readdresses entries written under an older one.
+            self.cache.add(self.version_key, int(time.time() * 1000), timeout=None)
+            self.cache.add(self.modified_key, int(time.time()), timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def bump(self):
+        try:
+            version = self.cache.incr(self.version_key)
+        except ValueError:
+            self.version()
+            version = self.cache.incr(self.version_key)
+        self.cache.set(self.modified_key, int(time.time()), timeout=None)
+        return version
+
+    def last_modified(self):
+        """
+        Unix time of the latest catalog write. When the record is missing it
+        is reseeded with the current time, which can only make clients
+        revalidate, never serve them something stale.
+        """
+        modified = self.cache.get(self.modified_key)
+        if modified is None:
+            self.cache.add(self.modified_key, int(time.time()), timeout=None)
+            modified = self.cache.get(self.modified_key)
+        return modified
+
+    def key_for(self, request, version=None):
+        if version is None:
+            version = self.version()
+        return f'catalog:{version}:{self._digest(request)}'
+
+    def etag_for(self, request, version=None):
+        if version is None:
+            version = self.version()
+        return f'{version}-{self._digest(request)}'
+
+    @staticmethod
+    def _digest(request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        # Scheme and host too: paginated bodies carry absolute next/previous links.
+        raw = f'{request.accepted_media_type}|{request.scheme}://{request.get_host()}{request.path}?{query}'
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return entry
+
+    def set(self, key, response):
+        entry = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'encodings': (
+                precompress(response.content, response['Content-Type'])
+                if settings.CATALOG_CACHE_PRECOMPRESS else {}
+            ),
+        }
+        self.cache.set(key, entry, timeout=self.timeout)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            'version': self.version(),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_ALIAS, settings.CATALOG_CACHE_TIMEOUT)
+
+
+class CatalogCacheMixin:
+    """
+    Serve successful JSON GET responses from the catalog cache.
+
+    The rendered body is stored, so a hit skips the ORM, the serializers and
+    the renderer entirely. Responses carry ``X-Cache: HIT`` or ``MISS``.
+    """
+
+    def cached_response(self, request):
+        """
+        The cached response for a JSON GET, or None after arming
+        ``finalize_response`` to store the response about to be built.
+        """
+        if request.accepted_renderer.format != 'json':
+            return None
+
+        key = catalog_cache.key_for(request)
+        entry = catalog_cache.get(key)
+        if entry is not None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+            response.encoded_variants = entry.get('encodings')
+            response['X-Cache'] = 'HIT'
+            return response
+
+        self.catalog_cache_key = key
+        return None
+
+    def get(self, request, *args, **kwargs):
+        response = self.cached_response(request)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if getattr(self, 'catalog_cache_key', None):
+                response['X-Cache'] = 'MISS'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'catalog_cache_key', None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            response.encoded_variants = catalog_cache.set(key, response)['encodings']
+        return response
@@ -0,0 +1,64 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+
+from .models import CartItem
+
+
+def fold_operations(operations):
+    """
+    Reduce a list of ``{'op', 'product_id', 'quantity'}`` operations to one
+    effect per product, in order: ``('add', n)`` adds to whatever quantity
+    the database holds, ``('set', n)`` replaces it and ``('remove', 0)``
+    deletes the line. ``set`` to 0 is a remove.
+    """
+    effects = {}
+    for operation in operations:
+        product_id = operation['product_id']
+        op = operation['op']
+        quantity = operation.get('quantity', 1)
+        current = effects.get(product_id)
+
+        if op == 'remove' or (op == 'set' and quantity == 0):
+            effects[product_id] = ('remove', 0)
+        elif op == 'set':
+            effects[product_id] = ('set', quantity)
+        elif current is None:
+            effects[product_id] = ('add', quantity)
+        elif current[0] == 'remove':
+            effects[product_id] = ('set', quantity)
+        else:
+            effects[product_id] = (current[0], current[1] + quantity)
+    return effects
+
+
+def apply_cart_operations(cart_id, operations):
+    """
+    Apply a batch of cart operations atomically in at most three statements:
+    one DELETE for removed lines, one insert that ignores existing lines,
+    and one UPDATE that sets or increments every remaining line.
+
+    Increments are ``quantity = quantity + n`` in the database, so
+    concurrent batches on the same cart never lose an update.
+    """
+    effects = fold_operations(operations)
+    removed = [product_id for product_id, (op, _) in effects.items() if op == 'remove']
+    changed = {product_id: effect for product_id, effect in effects.items() if effect[0] != 'remove'}
+
+    with transaction.atomic():
+        if removed:
+            CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+        if changed:
+            CartItem.objects.bulk_create(
+                [CartItem(cart_id=cart_id, product_id=product_id, quantity=0) for product_id in changed],
+                ignore_conflicts=True,
+            )
+            CartItem.objects.filter(cart_id=cart_id, product_id__in=list(changed)).update(
+                quantity=Case(
+                    *[
+                        When(product_id=product_id, then=Value(quantity) if op == 'set' else F('quantity') + quantity)
+                        for product_id, (op, quantity) in changed.items()
+                    ],
+                    output_field=models.PositiveIntegerField(),
+                )
+            )
+    return effects
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@checks.register(checks.Tags.caches)
+def check_catalog_cache(app_configs, **kwargs):
+    if settings.DEBUG or not isinstance(caches[settings.CATALOG_CACHE_ALIAS], LocMemCache):
+        return []
+    return [checks.Error(
+        "CATALOG_CACHE_ALIAS points at a local-memory cache. Each worker process keeps its own "
+        "catalog version, so a product change invalidates cached pages and ETags only in the "
+        "process that made it; the others serve stale pages for up to CATALOG_CACHE_TIMEOUT.",
+        hint=(
+            "Point CACHE_URL (or the alias) at a cache shared by every worker, such as Redis or "
+            "Memcached. If a single process serves the API, add 'products.E001' to "
+            "SILENCED_SYSTEM_CHECKS."
+        ),
+        id='products.E001',
+    )]
@@ -0,0 +1,69 @@
+"""
+Read-only serializers that build plain dicts straight from ``values()`` rows.
+
+Each function mirrors one ModelSerializer in ``serializers.py`` and yields
+the same JSON byte for byte, but skips model instantiation and DRF's
+per-field dispatch. Datetimes and decimals still go through the DRF field
+``to_representation`` the ModelSerializers use, so formatting cannot drift.
+
+The ``prefix`` arguments let a row reached through a join (``product__``,
+``items__product__``) be read without renaming its keys.
+"""
+from rest_framework import serializers
+
+datetime_field = serializers.DateTimeField()
+
+PRODUCT_FIELDS = (
+    'id', 'category_id', 'category__name', 'name', 'description', 'price', 'image', 'created_at',
+)
+CART_ITEM_FIELDS = ('id', 'quantity')
+
+
+def format_datetime(value):
+    return None if value is None else datetime_field.to_representation(value)
+
+
+def product_fields(prefix=''):
+    return tuple(prefix + field for field in PRODUCT_FIELDS)
+
+
+def cart_item_fields(prefix=''):
+    return tuple(prefix + field for field in CART_ITEM_FIELDS) + product_fields(prefix + 'product__')
+
+
+def product_to_dict(row, prefix=''):
+    """``ProductSerializer`` for a row of ``values(*product_fields(prefix))``."""
+    price = row[prefix + 'price']
+    return {
+        'id': row[prefix + 'id'],
+        'category': {
+            'id': row[prefix + 'category_id'],
+            'name': row[prefix + 'category__name'],
+        },
+        'name': row[prefix + 'name'],
+        'description': row[prefix + 'description'],
+        'price': None if price is None else float(price),
+        'image': row[prefix + 'image'],
+        'created_at': format_datetime(row[prefix + 'created_at']),
+    }
+
+
+def cart_item_to_dict(row, prefix=''):
+    """``CartItemSerializer`` for a row of ``values(*cart_item_fields(prefix))``."""
+    return {
+        'id': row[prefix + 'id'],
+        'product': product_to_dict(row, prefix + 'product__'),
+        'quantity': row[prefix + 'quantity'],
+    }
+
+
+def cart_to_dict(rows):
+    """
+    ``CartSerializer`` for the rows of
+    ``Cart.objects.values('id', *cart_item_fields('items__'))``: one row
+    per item, or a single row with null item columns for an empty cart.
+    """
+    return {
+        'id': rows[0]['id'],
+        'items': [cart_item_to_dict(row, 'items__') for row in rows if row['items__id'] is not None],
+    }
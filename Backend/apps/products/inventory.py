@@ -0,0 +1,151 @@
+"""
+Stock reservation for checkout.
+
+A product with ``stock = None`` is not tracked and never sells out. Tracked
+stock is taken with conditional decrements, ``UPDATE ... SET stock = stock -
+n WHERE stock >= n``, inside the checkout transaction: the database checks
+and takes the stock in one statement, so two checkouts can never both take
+the last unit, and nothing is read and locked first. Every single-row
+product in an order is reserved by one UPDATE, whatever the cart size.
+
+The row being decremented stays locked until the checkout commits, so every
+checkout of one product queues on that row. A hot product can instead
+spread its stock over ``stock_shards`` ``StockShard`` rows: a checkout
+takes from one shard picked at random, so up to that many checkouts of the
+product proceed at once. Only when no single shard can cover a quantity are
+all of the product's shards locked, in shard order, and drawn down
+together.
+"""
+import random
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, Value, When
+
+from .models import Product, StockShard
+
+MAX_SHARDS = 64
+
+
+class OutOfStock(Exception):
+    """Raised inside the checkout transaction to roll it back."""
+
+
+def reserve(products, quantities):
+    """
+    Take ``quantities`` (``{product_id: quantity}``) out of stock.
+    ``products`` maps the same ids to their ``Product``. Call it inside a
+    transaction: it raises ``OutOfStock`` after a partial reservation and
+    relies on the rollback to undo it.
+    """
+    single = {}
+    for product_id, quantity in sorted(quantities.items()):
+        product = products[product_id]
+        if product.stock_shards:
+            if not _reserve_sharded(product_id, product.stock_shards, quantity):
+                raise OutOfStock()
+        elif product.stock is not None:
+            single[product_id] = quantity
+    if not single:
+        return
+    wanted = Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in single.items()],
+        output_field=PositiveIntegerField(),
+    )
+    if Product.objects.filter(pk__in=list(single), stock__gte=wanted).update(stock=F('stock') - wanted) != len(single):
+        raise OutOfStock()
+
+
+def _take(product_id, shard, quantity):
+    return StockShard.objects.filter(product_id=product_id, shard=shard, stock__gte=quantity).update(
+        stock=F('stock') - quantity,
+    )
+
+
+def _reserve_sharded(product_id, shards, quantity):
+    shard = random.randrange(shards)
+    for _ in range(3):
+        if _take(product_id, shard, quantity):
+            return True
+        # Pick again among the shards that looked able to cover it.
+        candidates = list(
+            StockShard.objects.filter(product_id=product_id, stock__gte=quantity).values_list('shard', flat=True)
+        )
+        if not candidates:
+            break
+        shard = random.choice(candidates)
+
+    rows = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+    if sum(row.stock for row in rows) < quantity:
+        return False
+    remaining = quantity
+    for row in rows:
+        taken = min(row.stock, remaining)
+        if taken:
+            StockShard.objects.filter(pk=row.pk).update(stock=F('stock') - taken)
+            remaining -= taken
+        if not remaining:
+            break
+    return True
+
+
+def stock_levels(product_ids):
+    """``{product_id: units in stock}``, ``None`` for untracked products."""
+    levels = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'stock'))
+    sharded = (
+        StockShard.objects
+        .filter(product_id__in=product_ids)
+        .values('product_id')
+        .annotate(total=Sum('stock'))
+        .order_by()
+    )
+    levels.update((row['product_id'], row['total']) for row in sharded)
+    return levels
+
+
+def shortages(quantities):
+    """The ids in ``quantities`` whose stock cannot cover the quantity now."""
+    levels = stock_levels(list(quantities))
+    return sorted(
+        product_id for product_id, quantity in quantities.items()
+        if levels.get(product_id) is not None and levels[product_id] < quantity
+    )
+
+
+# ``set_stock`` quantity meaning "the stock the product has now".
+CURRENT = object()
+
+
+@transaction.atomic
+def set_stock(product, quantity, shards=0):
+    """
+    Set ``product``'s stock to ``quantity`` (``None`` stops tracking it),
+    spread evenly over ``shards`` rows when ``shards`` is positive. With
+    ``CURRENT`` the stock is kept and only respread: it is read with the
+    product and shard rows locked, so no checkout can take stock between
+    the read and the write.
+
+    Stock is written with ``update()``: it is not part of the public
+    representation, so a restock does not invalidate the catalog cache.
+    """
+    if not 0 <= shards <= MAX_SHARDS:
+        raise ValueError(f"shards must be between 0 and {MAX_SHARDS}.")
+    stock, stock_shards = Product.objects.select_for_update().filter(pk=product.pk).values_list(
+        'stock', 'stock_shards',
+    ).get()
+    rows = list(StockShard.objects.select_for_update().filter(product_id=product.pk).order_by('shard'))
+    if quantity is CURRENT:
+        quantity = sum(row.stock for row in rows) if stock_shards else stock
+    if quantity is None:
+        shards = 0
+    StockShard.objects.filter(product_id=product.pk).delete()
+    if shards:
+        per_shard, extra = divmod(quantity, shards)
+        StockShard.objects.bulk_create([
+            StockShard(product_id=product.pk, shard=index, stock=per_shard + (index < extra))
+            for index in range(shards)
+        ])
+        stock = None
+    else:
+        stock = quantity
+    Product.objects.filter(pk=product.pk).update(stock=stock, stock_shards=shards)
+    product.stock, product.stock_shards = stock, shards
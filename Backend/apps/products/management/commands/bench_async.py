@@ -0,0 +1,222 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from ....users.authentication import tokens_for
+from ...models import Cart, Product
+from ...seeding import StoreSeeder
+from .bench_endpoints import percentile
+
+
+def wsgi_request(application, method, path, query='', body=b'', **environ):
+    """Call a WSGI application in this thread and return the response status."""
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver', 'REMOTE_ADDR': '127.0.0.1', 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+        **environ,
+    }
+    status = []
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the product list, product detail and cart reads under many "
+        "simultaneous connections: synchronous views behind a WSGI thread pool against the async "
+        "views of music_store.urls_async under ASGI. Every query is delayed by --latency-ms to "
+        "stand in for a remote database. Seeds the catalog if it is empty; run it against "
+        "music_store.settings_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help="Simultaneous client connections.")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="WSGI worker threads, like gunicorn --threads.")
+        parser.add_argument('--latency-ms', type=float, default=20.0,
+                            help="Delay added to every query.")
+        parser.add_argument('--products', type=int, default=1000,
+                            help="Products to seed when the catalog is empty.")
+        parser.add_argument('--users', type=int, default=20,
+                            help="Users with carts to seed when the catalog is empty.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['threads'] < 1:
+            raise CommandError("--requests, --concurrency and --threads must be positive.")
+        if not Product.objects.exists():
+            self.stdout.write(f"Seeding {options['products']} products and {options['users']} carts.")
+            StoreSeeder(seed=options['seed'], password='bench-pass-123').run(
+                products=options['products'], users=options['users'], carts=options['users'],
+            )
+        requests = self.targets(options['requests'], options['seed'])
+
+        latency = options['latency_ms'] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(connection, **kwargs):
+            # Connection objects outlive their connections, one per thread.
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delay)
+
+        if latency:
+            connection_created.connect(add_delay, weak=False)
+        try:
+            with override_settings(ROOT_URLCONF='music_store.urls'):
+                wsgi = self.run_wsgi(requests, options['concurrency'], options['threads'])
+            with override_settings(ROOT_URLCONF='music_store.urls_async'):
+                asgi = asyncio.run(self.run_asgi(requests, options['concurrency']))
+        finally:
+            connection_created.disconnect(add_delay)
+            for connection in connections.all():
+                if delay in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(delay)
+
+        self.report([
+            ('wsgi', f"{options['threads']} threads", wsgi),
+            ('asgi', 'event loop', asgi),
+        ], options)
+        errors = sum(result['errors'] for result in (wsgi, asgi))
+        if errors:
+            raise CommandError(f"{errors} requests failed.")
+
+    def targets(self, count, seed):
+        """
+        ``(path, query, token)`` for a mix of list, detail and cart reads. A
+        unique ``bench`` parameter keeps catalog reads off the catalog cache.
+        """
+        rng = random.Random(seed)
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        user_ids = list(Cart.objects.order_by('id').values_list('user_id', flat=True)[:50])
+        if not user_ids:
+            raise CommandError("No carts to read; seed users with carts first.")
+        tokens = [str(tokens_for(user).access_token) for user in User.objects.filter(id__in=user_ids)]
+
+        requests = []
+        for index in range(count):
+            kind = index % 3
+            if kind == 0:
+                requests.append(('/api/product/', f'page_size=24&bench={index}', None))
+            elif kind == 1:
+                requests.append((f'/api/product/{rng.choice(product_ids)}/', f'bench={index}', None))
+            else:
+                requests.append(('/api/carts/', '', rng.choice(tokens)))
+        return requests
+
+    def run_wsgi(self, requests, concurrency, threads):
+        application = WSGIHandler()
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def call(path, query, token):
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+            return wsgi_request(application, 'GET', path, query, **headers)
+
+        with ThreadPoolExecutor(threads) as workers:
+            # Each client thread holds one connection open and waits for a
+            # free worker, as a client of a threaded WSGI server does.
+            def client(share):
+                for target in share:
+                    start = time.perf_counter()
+                    status = workers.submit(call, *target).result()
+                    with lock:
+                        timings.append(time.perf_counter() - start)
+                        errors.append(status >= 400)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as clients:
+                list(clients.map(client, [requests[index::concurrency] for index in range(concurrency)]))
+            elapsed = time.perf_counter() - start
+        return self.summarize(timings, errors, elapsed)
+
+    async def run_asgi(self, requests, concurrency):
+        application = ASGIHandler()
+        timings, errors = [], []
+
+        async def client(share):
+            for target in share:
+                start = time.perf_counter()
+                status = await self.asgi_call(application, *target)
+                timings.append(time.perf_counter() - start)
+                errors.append(status >= 400)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(requests[index::concurrency]) for index in range(concurrency)))
+        return self.summarize(timings, errors, time.perf_counter() - start)
+
+    @staticmethod
+    async def asgi_call(application, path, query, token):
+        headers = [(b'host', b'testserver')]
+        if token:
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        status = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client never disconnects; Django cancels this wait once
+            # the response is sent.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await application(scope, receive, send)
+        return status[0]
+
+    @staticmethod
+    def summarize(timings, errors, elapsed):
+        return {
+            'requests': len(timings),
+            'errors': sum(errors),
+            'seconds': elapsed,
+            'throughput': len(timings) / elapsed,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+        }
+
+    def report(self, rows, options):
+        self.stdout.write(
+            f"\n{options['requests']} requests, {options['concurrency']} connections, "
+            f"{options['latency_ms']:g} ms per query"
+        )
+        self.stdout.write(
+            f"  {'path':<6}{'workers':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+        for name, workers, row in rows:
+            self.stdout.write(
+                f"  {name:<6}{workers:<14}{row['throughput']:>10.1f}{row['p50_ms']:>10.2f}"
+                f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['errors']:>8}"
+            )
+        wsgi, asgi = rows[0][2], rows[1][2]
+        self.stdout.write(f"  asgi/wsgi throughput: {asgi['throughput'] / wsgi['throughput']:.2f}x")
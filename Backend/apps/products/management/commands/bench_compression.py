@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from music_store.compression import available_codecs
+
+from ...cache import catalog_cache
+from ...models import Product
+from ...seeding import StoreSeeder
+from .bench_endpoints import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the size and serving rate of a cached product list page in each available "
+        "encoding, compressing it on every request and serving the variant compressed when it "
+        "was cached. Seeds the catalog if it is empty; run it against music_store.settings_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--products', type=int, default=1000,
+                            help="Products to seed when the catalog is empty.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['page_size'] < 1:
+            raise CommandError("--requests and --page-size must be positive.")
+        if not Product.objects.exists():
+            self.stdout.write(f"Seeding {options['products']} products.")
+            StoreSeeder(seed=options['seed']).run(products=options['products'])
+
+        path = f"/api/product/?page_size={options['page_size']}"
+        rows = [self.measure(path, 'identity', False, options['requests'])]
+        for codec in available_codecs():
+            for precompressed in (False, True):
+                rows.append(self.measure(path, codec.name, precompressed, options['requests']))
+        self.report(rows, options)
+
+    def measure(self, path, encoding, precompressed, requests):
+        client = Client(HTTP_ACCEPT_ENCODING=encoding)
+        with override_settings(CATALOG_CACHE_PRECOMPRESS=precompressed):
+            # A fresh catalog version, so the page is cached in this mode.
+            catalog_cache.bump()
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"{path} answered {response.status_code}.")
+            if response.get('Content-Encoding', 'identity') != encoding:
+                raise CommandError(f"{path} was not encoded as {encoding}.")
+            timings = []
+            start = time.perf_counter()
+            for _ in range(requests):
+                request_start = time.perf_counter()
+                client.get(path)
+                timings.append(time.perf_counter() - request_start)
+            elapsed = time.perf_counter() - start
+        return {
+            'encoding': encoding,
+            'mode': 'cached' if precompressed else 'per request',
+            'bytes': len(response.content),
+            'rate': requests / elapsed,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+        }
+
+    def report(self, rows, options):
+        identity = rows[0]['bytes']
+        self.stdout.write(f"\n{options['requests']} cached requests for a page of {options['page_size']} products")
+        self.stdout.write(f"  {'encoding':<10}{'compressed':<13}{'bytes':>9}{'ratio':>8}{'req/s':>9}{'p50 ms':>9}")
+        for row in rows:
+            mode = row['mode'] if row['encoding'] != 'identity' else '-'
+            self.stdout.write(
+                f"  {row['encoding']:<10}{mode:<13}{row['bytes']:>9}{identity / row['bytes']:>7.1f}x"
+                f"{row['rate']:>9.0f}{row['p50_ms']:>9.2f}"
+            )
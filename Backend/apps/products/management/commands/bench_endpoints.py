@@ -0,0 +1,186 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from ....admins.rollups import rebuild
+from ....users.authentication import tokens_for
+from ...cache import catalog_cache
+from ...seeding import StoreSeeder
+
+PASSWORD = 'bench-pass-123'
+
+
+class Scenario:
+    """
+    One endpoint call. ``cold`` bumps the catalog version before every call
+    so catalog endpoints are measured on the database path, not the cache.
+    """
+
+    def __init__(self, name, method, path, user=None, data=None, cold=False, iterations=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.user = user
+        self.data = data
+        self.cold = cold
+        self.iterations = iterations
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the catalog at several sizes and measure latency percentiles and query counts of the "
+        "product, cart, checkout, auth and admin endpoints. Fails when an endpoint's query count "
+        "grows with the data size or its p95 exceeds the stored baseline. Each size is seeded in "
+        "a transaction that is rolled back; run it against music_store.settings_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help="Comma-separated product/order counts to seed.")
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--baseline', default=getattr(
+            settings, 'BENCH_BASELINE_PATH', os.path.join(settings.BASE_DIR, 'bench_baseline.json')
+        ))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Record this run as the baseline instead of checking against it.")
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help="Allowed p95 slowdown against the baseline, as a factor.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+
+        results = {}
+        # The login scenario measures the password check; bench_login covers
+        # the throttles.
+        unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login_ip': None, 'login_account': None}}
+        for size in sizes:
+            with transaction.atomic(), override_settings(REST_FRAMEWORK=unthrottled):
+                scenarios = self.seed(size, options['seed'])
+                results[str(size)] = self.run(scenarios, options['iterations'])
+                transaction.set_rollback(True)
+            self.report(size, results[str(size)])
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['baseline']}.")
+            return
+
+        failures = self.check_growth(results) + self.check_baseline(results, options)
+        if failures:
+            raise CommandError("Benchmark gates failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Benchmark gates passed."))
+
+    def run(self, scenarios, iterations):
+        client = Client()
+        results = {}
+        for scenario in scenarios:
+            headers = {}
+            if scenario.user is not None:
+                headers['HTTP_AUTHORIZATION'] = f'Bearer {tokens_for(scenario.user).access_token}'
+            call = getattr(client, scenario.method)
+            kwargs = {'data': scenario.data, 'content_type': 'application/json'} if scenario.data else {}
+
+            call(scenario.path, **kwargs, **headers)  # warm-up, not timed
+            timings, queries = [], set()
+            for _ in range(scenario.iterations or iterations):
+                if scenario.cold:
+                    catalog_cache.bump()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = call(scenario.path, **kwargs, **headers)
+                    timings.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise CommandError(f"{scenario.name}: {scenario.path} returned {response.status_code}.")
+                queries.add(len(captured))
+
+            results[scenario.name] = {
+                'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+                'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+                'queries': max(queries),
+            }
+        return results
+
+    def report(self, size, results):
+        self.stdout.write(f"\n{size} rows")
+        self.stdout.write(f"  {'endpoint':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"  {name:<24}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['queries']:>9}"
+            )
+
+    def check_growth(self, results):
+        sizes = list(results)
+        smallest = results[sizes[0]]
+        failures = []
+        for size in sizes[1:]:
+            for name, row in results[size].items():
+                if row['queries'] > smallest[name]['queries']:
+                    failures.append(
+                        f"{name}: {row['queries']} queries at {size} rows, "
+                        f"{smallest[name]['queries']} at {sizes[0]}"
+                    )
+        return failures
+
+    def check_baseline(self, results, options):
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(f"No baseline at {options['baseline']}; skipping latency gate.")
+            return []
+        with open(options['baseline']) as handle:
+            baseline = json.load(handle)
+
+        failures = []
+        for size, rows in results.items():
+            for name, row in rows.items():
+                expected = baseline.get(size, {}).get(name)
+                if expected is None:
+                    continue
+                if row['queries'] > expected['queries']:
+                    failures.append(f"{name} at {size} rows: {row['queries']} queries, baseline {expected['queries']}")
+                if row['p95_ms'] > expected['p95_ms'] * options['tolerance']:
+                    failures.append(f"{name} at {size} rows: p95 {row['p95_ms']} ms, baseline {expected['p95_ms']} ms")
+        return failures
+
+    def seed(self, size, seed):
+        seeder = StoreSeeder(seed=seed, batch_size=2000, password=PASSWORD)
+        seeder.run(products=size, users=max(10, size // 10), carts=1, orders=size)
+        rebuild()
+        admin = User.objects.create_user('bench-admin', 'admin@bench.local', PASSWORD, is_staff=True)
+        buyer = User.objects.get(pk=seeder.users[0])
+        categories = seeder.categories
+        products = seeder.products
+
+        checkout = {
+            'cart_items': [{'product': {'id': product_id}, 'quantity': 1} for product_id in products[:3]],
+            'shipping_details': {'fullName': 'Bench Buyer', 'city': 'Chennai'},
+        }
+        login = {'email': buyer.email, 'password': PASSWORD}
+        return [
+            Scenario('product list', 'get', '/api/product/', cold=True),
+            Scenario('product list filtered', 'get',
+                     f'/api/product/?category={categories[0].id}&ordering=-price&min_price=10', cold=True),
+            Scenario('product detail', 'get', f'/api/product/{products[size // 2]}/', cold=True),
+            Scenario('cart', 'get', '/api/carts/', user=buyer),
+            Scenario('checkout', 'post', '/api/checkout/', user=buyer, data=checkout),
+            Scenario('login', 'post', '/api/auth/login/', data=login, iterations=5),
+            Scenario('admin orders', 'get', '/api/admin/orders/', user=admin),
+            Scenario('admin orders filtered', 'get', '/api/admin/orders/?order_status=Delivered', user=admin),
+            Scenario('admin daily sales', 'get', '/api/admin/analytics/daily/', user=admin),
+        ]
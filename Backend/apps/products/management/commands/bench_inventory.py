@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+
+from ....jobs.models import Job
+from ....users.authentication import tokens_for
+from ...inventory import set_stock, stock_levels
+from ...models import Category, Order, OrderItem, Product
+from .bench_async import wsgi_request
+from .bench_endpoints import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Sell one limited product to many buyers at once and check that it never oversells. "
+        "Each buyer thread checks out through the WSGI handler until it is told the product "
+        "is sold out; the run is repeated for each --shards setting. Reports checkouts per "
+        "second and latency, and fails if more units were sold than were in stock. Creates and "
+        "removes its own product and orders; run it against the production database engine to "
+        "see row contention (SQLite serializes every write)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=1000,
+                            help="Units of the product on sale.")
+        parser.add_argument('--quantity', type=int, default=1,
+                            help="Units per checkout.")
+        parser.add_argument('--buyers', type=int, default=32,
+                            help="Concurrent buyers.")
+        parser.add_argument('--shards', default='0,8',
+                            help="Comma-separated stock_shards settings to compare; 0 is one row.")
+
+    def handle(self, *args, **options):
+        try:
+            modes = [int(shards) for shards in options['shards'].split(',')]
+        except ValueError:
+            raise CommandError("--shards must be comma-separated integers.")
+        if min(options['stock'], options['quantity'], options['buyers']) < 1:
+            raise CommandError("--stock, --quantity and --buyers must be positive.")
+
+        buyers = [
+            User.objects.get_or_create(username=f'inventory-buyer-{index}', defaults={'email': f'inventory-buyer-{index}@example.com'})[0]
+            for index in range(options['buyers'])
+        ]
+        tokens = [str(tokens_for(user).access_token) for user in buyers]
+        category, _ = Category.objects.get_or_create(name='Inventory benchmark')
+
+        rows = []
+        for shards in modes:
+            product = Product.objects.create(
+                category=category, name=f'Limited release ({shards} shards)', description='Benchmark product',
+                price=99.0, image='https://example.com/limited.jpg',
+            )
+            try:
+                set_stock(product, options['stock'], shards)
+                result = self.run_sale(product, tokens, options['quantity'])
+                sold = OrderItem.objects.filter(product=product).aggregate(units=Sum('quantity'))['units'] or 0
+                result.update(
+                    shards=shards, sold=sold, oversold=max(0, sold - options['stock']),
+                    left=stock_levels([product.pk])[product.pk],
+                )
+            finally:
+                orders = list(Order.objects.filter(items__product=product).values_list('id', flat=True))
+                Job.objects.filter(kind='sales.record_order', payload__order_id__in=orders).delete()
+                Order.objects.filter(id__in=orders).delete()
+                product.delete()
+            rows.append(result)
+
+        self.report(rows, options)
+        broken = [row for row in rows if row['oversold'] or row['sold'] + row['left'] != options['stock']]
+        if broken:
+            raise CommandError(f"Stock was not conserved for shards={', '.join(str(row['shards']) for row in broken)}.")
+        errors = sum(row['errors'] for row in rows)
+        if errors:
+            raise CommandError(f"{errors} checkouts failed.")
+
+    def run_sale(self, product, tokens, quantity):
+        application = WSGIHandler()
+        body = json.dumps({
+            'cart_items': [{'product': {'id': product.pk}, 'quantity': quantity}],
+            'shipping_details': {'fullName': 'Bench Buyer', 'city': 'Chennai'},
+        }).encode()
+        lock = threading.Lock()
+        timings, statuses = [], []
+
+        def buyer(token):
+            try:
+                while True:
+                    start = time.perf_counter()
+                    status = wsgi_request(
+                        application, 'POST', '/api/checkout/', body=body,
+                        CONTENT_TYPE='application/json', HTTP_AUTHORIZATION=f'Bearer {token}',
+                    )
+                    with lock:
+                        statuses.append(status)
+                        if status == 201:
+                            timings.append(time.perf_counter() - start)
+                    if status != 201:
+                        return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer, args=(token,)) for token in tokens]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return {
+            'checkouts': len(timings),
+            'rate': len(timings) / elapsed,
+            'p50_ms': percentile(timings, 0.50) * 1000 if timings else float('nan'),
+            'p95_ms': percentile(timings, 0.95) * 1000 if timings else float('nan'),
+            'sold_out': statuses.count(409),
+            'errors': sum(1 for status in statuses if status not in (201, 409)),
+        }
+
+    def report(self, rows, options):
+        self.stdout.write(
+            f"\n{options['stock']} units, {options['buyers']} buyers, {options['quantity']} per checkout"
+        )
+        self.stdout.write(
+            f"  {'shards':>6}{'checkouts':>11}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'sold':>7}{'left':>6}{'oversold':>10}{'409s':>6}{'errors':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"  {row['shards']:>6}{row['checkouts']:>11}{row['rate']:>9.1f}{row['p50_ms']:>9.2f}"
+                f"{row['p95_ms']:>9.2f}{row['sold']:>7}{row['left']:>6}{row['oversold']:>10}"
+                f"{row['sold_out']:>6}{row['errors']:>8}"
+            )
@@ -0,0 +1,119 @@
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from music_store.fastjson import FastJSONParser, FastJSONRenderer, orjson
+
+from ...fast_serializers import product_to_dict
+
+
+class StdlibJSONRenderer(FastJSONRenderer):
+    use_orjson = False
+
+
+class StdlibJSONParser(FastJSONParser):
+    use_orjson = False
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer and JSONParser with music_store.fastjson, on orjson and on its "
+        "standard library fallback: rendering a product list page, an order list with decimals "
+        "and datetimes, and parsing a checkout payload. Checks that every renderer writes the "
+        "same bytes. Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000,
+                            help="Products, orders and cart lines per payload.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['items'] < 1 or options['repeat'] < 1:
+            raise CommandError("--items and --repeat must be positive.")
+        products, orders, checkout = self.payloads(options['items'])
+
+        renderers = [('drf', JSONRenderer()), ('stdlib', StdlibJSONRenderer())]
+        parsers = [('drf', JSONParser()), ('stdlib', StdlibJSONParser())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+            parsers.append(('orjson', FastJSONParser()))
+
+        rows = []
+        for name, data in (('product list', products), ('order list', orders)):
+            bodies = [renderer.render(data) for _, renderer in renderers]
+            if any(body != bodies[0] for body in bodies):
+                raise CommandError(f"Renderers disagree on the {name}.")
+            timings = [self.best(lambda: renderer.render(data), options['repeat']) for _, renderer in renderers]
+            rows.append((f'render {name}', len(bodies[0]), timings))
+
+        body = json.dumps(checkout).encode()
+        results = [parser.parse(BytesIO(body)) for _, parser in parsers]
+        if any(result != results[0] for result in results):
+            raise CommandError("Parsers disagree on the checkout payload.")
+        timings = [self.best(lambda: parser.parse(BytesIO(body)), options['repeat']) for _, parser in parsers]
+        rows.append(('parse checkout', len(body), timings))
+
+        self.report(rows, [name for name, _ in renderers], options)
+
+    def payloads(self, count):
+        now = timezone.now()
+        products = {'next': None, 'previous': None, 'results': [
+            product_to_dict({
+                'id': index, 'category_id': index % 9, 'category__name': 'Guitars',
+                'name': f'Fender Stratocaster electric guitar #{index}',
+                'description': 'Hand-finished in a limited run. Lightweight and road ready.',
+                'price': 150.0 + index * 0.37, 'image': f'https://images.example.com/products/{index}.jpg',
+                'created_at': now - timedelta(minutes=index),
+            })
+            for index in range(count)
+        ]}
+        # Unserialized values, as analytics and admin views hand them over.
+        orders = [
+            {
+                'id': index, 'user': index % 100, 'created_at': now - timedelta(hours=index),
+                'total_price': Decimal('299.98') + index, 'is_paid': True, 'status': 'processing',
+                'items': [
+                    {'product': index + line, 'quantity': line + 1, 'price': Decimal('149.99')}
+                    for line in range(2)
+                ],
+            }
+            for index in range(count)
+        ]
+        checkout = {
+            'cart_items': [
+                {'product': {'id': index, 'name': f'Product {index}', 'price': 149.99}, 'quantity': 1 + index % 3}
+                for index in range(count)
+            ],
+            'shipping_details': {'fullName': 'Bench Buyer', 'address': '1 Main St', 'city': 'Chennai'},
+            'payment_method': 'card',
+        }
+        return products, orders, checkout
+
+    def best(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def report(self, rows, names, options):
+        self.stdout.write(f"\n{options['items']} items per payload, best of {options['repeat']}")
+        self.stdout.write(
+            f"  {'case':<22}{'KB':>8}" + ''.join(f"{name + ' ms':>12}" for name in names) + f"{'speedup':>9}"
+        )
+        for case, size, timings in rows:
+            self.stdout.write(
+                f"  {case:<22}{size / 1024:>8.0f}" + ''.join(f"{seconds * 1000:>12.2f}" for seconds in timings)
+                + f"{timings[0] / timings[-1]:>8.1f}x"
+            )
+        if orjson is None:
+            self.stdout.write("  orjson is not installed; only the standard library fallback was measured.")
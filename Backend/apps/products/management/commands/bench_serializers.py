@@ -0,0 +1,101 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from ...fast_serializers import cart_item_fields, cart_to_dict, product_fields, product_to_dict
+from ...models import Cart, CartItem, Category, Order, OrderItem, Product, ShippingAddress
+from ...serializers import CartSerializer, ProductSerializer
+from ....admins.fast_serializers import order_fields, orders_to_dicts
+from ....admins.serializers import OrderSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row cost of the ModelSerializers and the values()-based fast "
+        "serializers on seeded products, a cart and orders. The seed data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            cart = self.seed(rows)
+            cases = [
+                (
+                    'product',
+                    lambda: ProductSerializer(Product.objects.select_related('category'), many=True).data,
+                    lambda: [product_to_dict(row) for row in Product.objects.values(*product_fields())],
+                ),
+                (
+                    'cart item',
+                    lambda: CartSerializer(
+                        Cart.objects.prefetch_related(
+                            Prefetch('items', queryset=CartItem.objects.select_related('product__category'))
+                        ).get(pk=cart.pk)
+                    ).data,
+                    lambda: cart_to_dict(list(
+                        Cart.objects.filter(pk=cart.pk).values('id', *cart_item_fields('items__'))
+                    )),
+                ),
+                (
+                    'order',
+                    lambda: OrderSerializer(
+                        Order.objects.select_related('user', 'shipping_address')
+                        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('product'))),
+                        many=True,
+                    ).data,
+                    lambda: orders_to_dicts(Order.objects.values(*order_fields())),
+                ),
+            ]
+            for name, slow, fast in cases:
+                slow_time = self.best(slow, options['repeat']) / rows
+                fast_time = self.best(fast, options['repeat']) / rows
+                self.stdout.write(
+                    f"{name:<10} serializer {slow_time * 1e6:8.1f} us/row   "
+                    f"fast {fast_time * 1e6:8.1f} us/row   {slow_time / fast_time:5.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def best(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def seed(self, rows):
+        category = Category.objects.create(name='Benchmark')
+        user = User.objects.create_user('serializer-bench')
+        products = Product.objects.bulk_create([
+            Product(
+                category=category, name=f'Product {index}', description='Benchmark product',
+                price=10.0 + index, image='https://example.com/image.jpg',
+            )
+            for index in range(rows)
+        ])
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=1) for product in products])
+        orders = Order.objects.bulk_create([
+            Order(user=user, total_price=Decimal('10.00'), payment_method='card', is_paid=True)
+            for _ in range(rows)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, price=Decimal('10.00'))
+            for order, product in zip(orders, products)
+        ])
+        ShippingAddress.objects.bulk_create([
+            ShippingAddress(
+                order=order, full_name='Buyer', address='1 Main St', city='Chennai', state='TN',
+                postal_code='600001', country='India', phone='1234567890',
+            )
+            for order in orders
+        ])
+        return cart
@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from ...fast_serializers import product_fields, product_to_dict
+from ...models import Category, Product
+from ...serializers import ProductSerializer
+from ...snapshots import SNAPSHOT_FIELDS, refresh_snapshots, render_with_results, snapshot_bodies
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost of building product list bodies three ways: ProductSerializer, the "
+        "values()-based fast serializer, and joining the stored JSON snapshots. Each case reads "
+        "the rows and encodes them, page by page, into the same bytes. The seed data is rolled "
+        "back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, page_size = options['rows'], options['page_size']
+        if min(rows, page_size, options['repeat']) < 1:
+            raise CommandError("--rows, --page-size and --repeat must be positive.")
+        renderer = JSONRenderer()
+        envelope = {'next': None, 'previous': None}
+
+        def pages():
+            for start in range(0, len(self.ids), page_size):
+                yield Product.objects.filter(id__in=self.ids[start:start + page_size]).order_by('id')
+
+        cases = [
+            ('serializer', lambda: [
+                renderer.render({**envelope, 'results': ProductSerializer(page.select_related('category'), many=True).data})
+                for page in pages()
+            ]),
+            ('fast dicts', lambda: [
+                renderer.render({**envelope, 'results': [product_to_dict(row) for row in page.values(*product_fields())]})
+                for page in pages()
+            ]),
+            ('snapshots', lambda: [
+                render_with_results(envelope, snapshot_bodies(list(page.values(*SNAPSHOT_FIELDS))))
+                for page in pages()
+            ]),
+        ]
+
+        with transaction.atomic():
+            self.seed(rows)
+            bodies = [function() for _, function in cases]
+            if any(body != bodies[0] for body in bodies):
+                raise CommandError("The three paths built different bodies.")
+
+            self.stdout.write(f"\n{rows} products in pages of {page_size}")
+            self.stdout.write(f"  {'path':<12}{'rows/s':>12}{'us/row':>10}{'speedup':>9}")
+            baseline = None
+            for name, function in cases:
+                seconds = self.best(function, options['repeat']) / rows
+                baseline = baseline or seconds
+                self.stdout.write(f"  {name:<12}{1 / seconds:>12,.0f}{seconds * 1e6:>10.1f}{baseline / seconds:>8.1f}x")
+            transaction.set_rollback(True)
+
+    def best(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def seed(self, rows):
+        category = Category.objects.create(name='Benchmark')
+        Product.objects.bulk_create([
+            Product(
+                category=category, name=f'Product {index}', description='Benchmark product ' * 8,
+                price=10.0 + index, image=f'https://example.com/images/{index}.jpg',
+            )
+            for index in range(rows)
+        ])
+        # MySQL returns no ids from bulk inserts.
+        self.ids = list(Product.objects.filter(category=category).order_by('id').values_list('id', flat=True))
+        refresh_snapshots(Product.objects.filter(category=category))
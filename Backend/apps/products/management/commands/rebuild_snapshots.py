@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Product
+from ...snapshots import refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = "Re-encode the JSON snapshot of every product, or of the given product ids."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+        written = refresh_snapshots(queryset, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} product snapshots."))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ....admins.rollups import rebuild
+from ...cache import catalog_cache
+from ...seeding import StoreSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with deterministic synthetic categories, products, users, carts and "
+        "orders (with items and shipping addresses) for load testing. Existing rows are kept; "
+        "new rows get ids after the current maximum."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--carts', type=int, default=None,
+                            help="Users to give a cart (default: a quarter of --users).")
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='password123',
+                            help="Password of every seeded user.")
+        parser.add_argument('--days', type=int, default=365,
+                            help="Spread product and order dates over this many past days.")
+        parser.add_argument('--skip-rollups', action='store_true',
+                            help="Do not rebuild the sales rollups afterwards.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seeder = StoreSeeder(
+            seed=options['seed'], batch_size=options['batch_size'], password=options['password'],
+            days=options['days'], stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        counts = seeder.run(
+            products=options['products'],
+            users=options['users'],
+            carts=options['users'] // 4 if options['carts'] is None else options['carts'],
+            orders=options['orders'],
+        )
+        if counts['orders'] and not options['skip_rollups']:
+            rebuild(chunk_size=options['batch_size'])
+        catalog_cache.bump()
+
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded {products} products, {users} users, {carts} carts and {orders} orders "
+            "in {seconds:.1f}s.".format(seconds=time.perf_counter() - started, **counts)
+        ))
@@ -1,7 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
 from django.contrib.auth.models import User
 
 
+STOCK_FIELDS = ('stock', 'stock_shards')
+
+
 class Category(models.Model):
     name = models.CharField(max_length=50)
 
@@ -15,12 +20,57 @@ class Product(models.Model):
     description = models.TextField()
     price = models.FloatField()
     image = models.URLField(max_length=500)
+    # None means stock is not tracked and the product never sells out. With
+    # stock_shards > 0 the stock lives in that many StockShard rows instead;
+    # see inventory.py.
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='product_cat_created_idx'),
+            models.Index(fields=['category', 'price', 'id'], name='product_cat_price_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Stock changes only through inventory.py's conditional updates;
+        # saving an instance read before a checkout must not write it back.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in STOCK_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
+class StockShard(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_shard_rows")
+    shard = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'shard')
+
+    def __str__(self):
+        return f"{self.product_id}/{self.shard}: {self.stock}"
+
+
+class ProductSnapshot(models.Model):
+    """The product's public JSON, encoded ahead of time; see snapshots.py."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    body = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.product_id}"
+
+
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -37,6 +87,10 @@ class CartItem(models.Model):
     class Meta:
         unique_together = ('cart', 'product')
 
+    @property
+    def line_total(self):
+        return Decimal(str(self.product.price)).quantize(Decimal('0.01')) * self.quantity
+
     def __str__(self):
         return f"{self.quantity} of {self.product.name} in {self.cart.user.username}'s cart"
 
@@ -48,6 +102,12 @@ class Order(models.Model):
     is_paid = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.user}"
 
@@ -74,5 +134,10 @@ class ShippingAddress(models.Model):
     country = models.CharField(max_length=50)
     phone  = models.CharField(max_length=20)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['order_status'], name='shipping_order_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.full_name}, {self.address}"
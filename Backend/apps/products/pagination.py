@@ -0,0 +1,143 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on ``(ordering field, id)``.
+
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to an OFFSET for ties. Here the cursor carries the id as a
+    tie-breaker, so every page is a plain range scan on the composite index
+    and costs the same however deep the client pages.
+    """
+    ordering = ('created_at', 'id')
+    page_size = settings.CATALOG_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.CATALOG_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """The query for the requested page, plus one row to detect a next page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (self.reverse, self.current_position) = (False, None)
+        else:
+            (_, self.reverse, self.current_position) = self.cursor
+
+        if self.reverse:
+            queryset = queryset.order_by(*[self._flip(field) for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.current_position is not None:
+            queryset = queryset.filter(self._after(queryset, self.current_position, self.reverse))
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, current_position = self.reverse, self.current_position
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Positions are taken from the rows on the page itself, so the next
+        # and previous cursors always resume exactly at the page boundary.
+        if reverse:
+            self.has_next = current_position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = current_position is not None
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            self.has_next = self.has_previous = False
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Honour an OrderingFilter on the view for the primary field, and
+        always break ties on id in the same direction.
+        """
+        ordering = super().get_ordering(request, queryset, view)
+        primary = ordering[0]
+        if primary.lstrip('-') == 'id':
+            return (primary, primary)
+        return (primary, '-id' if primary.startswith('-') else 'id')
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def _after(self, queryset, position, reverse):
+        """
+        Build the row-value comparison ``(field, id) > (value, pk)`` (or ``<``
+        for descending orderings and reverse cursors) as a Q object.
+        """
+        order, tie_breaker = self.ordering
+        order_attr = order.lstrip('-')
+        tie_attr = tie_breaker.lstrip('-')
+
+        try:
+            raw_value, raw_pk = json.loads(position)
+            model_field = queryset.model._meta.get_field(order_attr)
+            value = model_field.to_python(raw_value)
+            pk = int(raw_pk)
+        except (TypeError, ValueError, LookupError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookup = 'lt' if reverse != order.startswith('-') else 'gt'
+        return (
+            Q(**{f'{order_attr}__{lookup}': value})
+            | Q(**{order_attr: value, f'{tie_attr}__{lookup}': pk})
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        order_attr = ordering[0].lstrip('-')
+        tie_attr = ordering[1].lstrip('-')
+        if isinstance(instance, dict):
+            value, pk = instance[order_attr], instance[tie_attr]
+        else:
+            value, pk = getattr(instance, order_attr), getattr(instance, tie_attr)
+        return json.dumps([str(value), pk], separators=(',', ':'))
@@ -0,0 +1,215 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+from .cache import catalog_cache
+from .models import Product
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class ProductSearchIndex:
+    """
+    In-process inverted index over product name, description and category.
+
+    Ranking is BM25 with the name counted twice, and every query term also
+    matches vocabulary terms it is a prefix of (at a discount), so "gui"
+    finds "guitar". The index is built lazily on the first search in each
+    process and kept current by the product/category signal handlers.
+
+    It is pinned to the catalog version it reflects. A handler applies its
+    change in place only when it moves the index exactly one version
+    forward; any other gap (a write served by another process, a bulk
+    import) marks the index stale and the next search rebuilds it.
+
+    A rebuild reads the catalog into a separate index and swaps it in, so
+    searches never wait on the database: while one search rebuilds, the
+    others run against the index as it was, and only the very first
+    searches in a process wait for one to exist.
+    """
+    k1 = 1.2
+    b = 0.75
+    name_boost = 2
+    prefix_weight = 0.5
+    min_prefix_length = 2
+    max_expansions = 50
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self.built = False
+        self._reset()
+
+    def _reset(self):
+        self.version = None
+        self.postings = {}
+        self.terms = []
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.doc_categories = {}
+        self.total_length = 0
+
+    @property
+    def size(self):
+        return len(self.doc_lengths)
+
+    def build(self):
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Read the version first: a change committed during the read leaves
+        # the new index one version behind, and the next search rebuilds.
+        version = catalog_cache.version()
+        rows = (
+            Product.objects
+            .values_list('id', 'name', 'description', 'category_id', 'category__name')
+            .iterator(chunk_size=2000)
+        )
+        fresh = type(self)()
+        for row in rows:
+            fresh._add(*row)
+        with self._lock:
+            self.postings = fresh.postings
+            self.terms = fresh.terms
+            self.doc_terms = fresh.doc_terms
+            self.doc_lengths = fresh.doc_lengths
+            self.doc_categories = fresh.doc_categories
+            self.total_length = fresh.total_length
+            self.version = version
+            self.built = True
+
+    def _refresh(self):
+        # One rebuild at a time. Searches that find it under way use the
+        # current index, unless there is none yet to use.
+        if not self._build_lock.acquire(blocking=not self.built):
+            return
+        try:
+            if self.version != catalog_cache.version():
+                self._rebuild()
+        finally:
+            self._build_lock.release()
+
+    def search(self, query, limit=20):
+        """
+        Return ``(total, [(product_id, score), ...])`` for the best ``limit``
+        matches.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        if self.version != catalog_cache.version():
+            self._refresh()
+
+        with self._lock:
+            weights = {}
+            for token in tokens:
+                for term, weight in self._expand(token):
+                    weights[term] = max(weights.get(term, 0), weight)
+
+            count = self.size
+            average_length = self.total_length / count if count else 0
+            scores = Counter()
+            for term, weight in weights.items():
+                postings = self.postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[product_id] / average_length)
+                    scores[product_id] += weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return len(ranked), ranked[:limit]
+
+    def _expand(self, token):
+        if token in self.postings:
+            yield token, 1.0
+        if len(token) < self.min_prefix_length:
+            return
+        position = bisect_left(self.terms, token)
+        expansions = 0
+        while position < len(self.terms) and expansions < self.max_expansions:
+            term = self.terms[position]
+            if not term.startswith(token):
+                break
+            if term != token:
+                yield term, self.prefix_weight
+                expansions += 1
+            position += 1
+
+    def _add(self, product_id, name, description, category_id, category_name):
+        terms = Counter()
+        for token in tokenize(name):
+            terms[token] += self.name_boost
+        terms.update(tokenize(description))
+        terms.update(tokenize(category_name))
+
+        for term, frequency in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                insort(self.terms, term)
+            postings[product_id] = frequency
+
+        length = sum(terms.values())
+        self.doc_terms[product_id] = terms
+        self.doc_lengths[product_id] = length
+        self.doc_categories[product_id] = category_id
+        self.total_length += length
+
+    def _remove(self, product_id):
+        terms = self.doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings[term]
+            del postings[product_id]
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+        self.total_length -= self.doc_lengths.pop(product_id)
+        del self.doc_categories[product_id]
+
+    def _advance(self, version, apply):
+        with self._lock:
+            if self.version is None:
+                return
+            if version != self.version + 1:
+                self.version = None
+                return
+            apply()
+            self.version = version
+
+    def product_saved(self, product, version):
+        def apply():
+            self._remove(product.pk)
+            self._add(product.pk, product.name, product.description, product.category_id, product.category.name)
+        self._advance(version, apply)
+
+    def product_deleted(self, product_id, version):
+        self._advance(version, lambda: self._remove(product_id))
+
+    def category_saved(self, category, version):
+        # Queried before taking the lock, which searches wait on.
+        rows = list(Product.objects.filter(category=category).values_list('id', 'name', 'description'))
+
+        def apply():
+            for product_id, name, description in rows:
+                self._remove(product_id)
+                self._add(product_id, name, description, category.pk, category.name)
+        self._advance(version, apply)
+
+    def category_deleted(self, category_id, version):
+        def apply():
+            for product_id in [pk for pk, owner in self.doc_categories.items() if owner == category_id]:
+                self._remove(product_id)
+        self._advance(version, apply)
+
+
+product_index = ProductSearchIndex()
@@ -0,0 +1,213 @@
+import math
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Cart, CartItem, Category, Order, OrderItem, Product, ShippingAddress
+from .snapshots import refresh_snapshots
+
+CATALOG = {
+    'Guitars': (('Fender', 'Gibson', 'Ibanez', 'PRS', 'Yamaha'), ('Stratocaster', 'Les Paul', 'RG', 'Custom 24', 'Pacifica'), 'guitar', (150, 4000)),
+    'Bass': (('Fender', 'Ibanez', 'Music Man', 'Squier'), ('Precision', 'Jazz', 'StingRay', 'SR'), 'bass', (150, 3000)),
+    'Drums': (('Pearl', 'Tama', 'Ludwig', 'Roland'), ('Export', 'Superstar', 'Classic Maple', 'TD-17'), 'drum kit', (300, 5000)),
+    'Keyboards': (('Yamaha', 'Roland', 'Korg', 'Nord', 'Casio'), ('P-125', 'FP-30X', 'Kronos', 'Stage 4', 'Privia'), 'keyboard', (200, 5000)),
+    'Amplifiers': (('Marshall', 'Fender', 'Boss', 'Orange', 'Vox'), ('DSL40', 'Blues Junior', 'Katana', 'Rockerverb', 'AC30'), 'amplifier', (100, 3000)),
+    'Microphones': (('Shure', 'Rode', 'Audio-Technica', 'Neumann'), ('SM58', 'NT1', 'AT2020', 'U87'), 'microphone', (50, 3500)),
+    'Audio Interfaces': (('Focusrite', 'Universal Audio', 'MOTU', 'PreSonus'), ('Scarlett', 'Apollo', 'M4', 'Studio 68c'), 'audio interface', (100, 2500)),
+    'Headphones': (('Sennheiser', 'Beyerdynamic', 'Sony', 'AKG'), ('HD 600', 'DT 770', 'MDR-7506', 'K702'), 'headphones', (50, 600)),
+    'Accessories': (('Ernie Ball', "D'Addario", 'Dunlop', 'Boss'), ('Slinky', 'EXL110', 'Tortex', 'TU-3'), 'accessory', (5, 200)),
+}
+FEATURES = [
+    'Hand-finished in a limited run.', 'Lightweight and road ready.', 'Comes with a padded gig bag.',
+    'Low-noise electronics for studio work.', 'Ideal for beginners and professionals alike.',
+    'Includes a two-year warranty.', 'Tuned and set up before shipping.', 'Balanced tone across the range.',
+]
+FIRST_NAMES = ['Asha', 'Ravi', 'Meera', 'Arjun', 'Priya', 'Karthik', 'Divya', 'Vikram', 'Anita', 'Sanjay']
+LAST_NAMES = ['Iyer', 'Sharma', 'Nair', 'Reddy', 'Menon', 'Patel', 'Rao', 'Das', 'Kumar', 'Pillai']
+CITIES = [('Chennai', 'TN', '600'), ('Bengaluru', 'KA', '560'), ('Mumbai', 'MH', '400'), ('Delhi', 'DL', '110'), ('Kochi', 'KL', '682')]
+PAYMENT_METHODS = ['card', 'card', 'card', 'upi', 'cod']
+CENT = Decimal('0.01')
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``created_at`` values set on instances survive ``auto_now_add``."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+class StoreSeeder:
+    """
+    Deterministic synthetic store data for load testing.
+
+    Rows are written with ``bulk_create`` in batches of ``batch_size``, each
+    batch in its own transaction. Primary keys are assigned up front from
+    the current maximum, so no backend needs to return ids from bulk
+    inserts (MySQL does not) and related rows can be built without reading
+    anything back. Every user gets the same password, hashed once. The same
+    ``seed`` and counts on an empty database produce identical data.
+    """
+
+    def __init__(self, seed=42, batch_size=5000, password='password123', days=365, stdout=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.days = days
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.categories = []
+        self.products = None
+        self.prices = array('d')
+        self.users = None
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def batches(self, start, count):
+        for offset in range(0, count, self.batch_size):
+            yield range(start + offset, start + min(count, offset + self.batch_size))
+
+    def write(self, *groups):
+        with transaction.atomic():
+            for model, rows in groups:
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def timestamp(self):
+        # Skewed towards recent dates, like a growing store.
+        age = self.days * (1 - math.sqrt(self.rng.random()))
+        return self.now - timedelta(days=age)
+
+    def run(self, products=0, users=0, carts=0, orders=0):
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+        with explicit_timestamps(Product, Order):
+            self.seed_categories()
+            self.seed_products(products)
+            self.seed_users(users)
+            self.seed_carts(carts)
+            self.seed_orders(orders)
+        return {'products': products, 'users': users, 'carts': carts, 'orders': orders}
+
+    def seed_categories(self):
+        """Reuse the catalog's categories when present, so re-runs add products to them."""
+        existing = {}
+        for category in Category.objects.filter(name__in=CATALOG).order_by('-id'):
+            existing[category.name] = category
+        start = next_id(Category)
+        missing = [
+            Category(id=start + index, name=name)
+            for index, name in enumerate(name for name in CATALOG if name not in existing)
+        ]
+        self.write((Category, missing))
+        existing.update((category.name, category) for category in missing)
+        self.categories = [existing[name] for name in CATALOG]
+
+    def seed_products(self, count):
+        start = next_id(Product)
+        self.products = range(start, start + count)
+        for ids in self.batches(start, count):
+            rows = []
+            for product_id in ids:
+                category = self.rng.choice(self.categories)
+                brands, series, kind, (low, high) = CATALOG[category.name]
+                price = round(math.exp(self.rng.uniform(math.log(low), math.log(high))), 2)
+                self.prices.append(price)
+                rows.append(Product(
+                    id=product_id,
+                    category_id=category.id,
+                    name=f'{self.rng.choice(brands)} {self.rng.choice(series)} {kind} #{product_id}',
+                    description=' '.join(self.rng.sample(FEATURES, 3)),
+                    price=price,
+                    image=f'https://images.example.com/products/{product_id}.jpg',
+                    created_at=self.timestamp(),
+                ))
+            self.write((Product, rows))
+            refresh_snapshots(Product.objects.filter(id__gte=ids.start, id__lt=ids.stop), self.batch_size)
+            self.log(f'Products: {ids.stop - start}/{count}')
+
+    def seed_users(self, count):
+        start = next_id(User)
+        self.users = range(start, start + count)
+        password = make_password(self.password)
+        for ids in self.batches(start, count):
+            rows = [
+                User(
+                    id=user_id, username=f'user{user_id:07d}', email=f'user{user_id:07d}@example.com',
+                    first_name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                )
+                for user_id in ids
+            ]
+            self.write((User, rows))
+            self.log(f'Users: {ids.stop - start}/{count}')
+
+    def seed_carts(self, count, max_items=5):
+        """Give the first ``count`` seeded users a cart of 1 to ``max_items`` products."""
+        count = min(count, len(self.users or ()))
+        if not count or not self.products:
+            return
+        start = next_id(Cart)
+        for ids in self.batches(start, count):
+            carts, items = [], []
+            for cart_id in ids:
+                carts.append(Cart(id=cart_id, user_id=self.users[cart_id - start]))
+                for product_id in self.sample_products(self.rng.randint(1, max_items)):
+                    items.append(CartItem(cart_id=cart_id, product_id=product_id, quantity=self.rng.randint(1, 3)))
+            self.write((Cart, carts), (CartItem, items))
+            self.log(f'Carts: {ids.stop - start}/{count}')
+
+    def sample_products(self, count):
+        count = min(count, len(self.products))
+        return {self.products[self.rng.randrange(len(self.products))] for _ in range(count)}
+
+    def seed_orders(self, count, max_items=4):
+        if not count or not self.products or not self.users:
+            return
+        start = next_id(Order)
+        first_product = self.products.start
+        for ids in self.batches(start, count):
+            orders, items, addresses = [], [], []
+            for order_id in ids:
+                created_at = self.timestamp()
+                total = Decimal('0.00')
+                for product_id in self.sample_products(self.rng.randint(1, max_items)):
+                    price = Decimal(str(self.prices[product_id - first_product])).quantize(CENT)
+                    quantity = self.rng.randint(1, 3)
+                    total += price * quantity
+                    items.append(OrderItem(order_id=order_id, product_id=product_id, quantity=quantity, price=price))
+                orders.append(Order(
+                    id=order_id, user_id=self.rng.choice(self.users), total_price=total,
+                    payment_method=self.rng.choice(PAYMENT_METHODS), is_paid=True, created_at=created_at,
+                ))
+                age = (self.now - created_at).days
+                city, state, postal = self.rng.choice(CITIES)
+                addresses.append(ShippingAddress(
+                    order_id=order_id,
+                    full_name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                    address=f'{self.rng.randint(1, 999)} Main Road', city=city, state=state,
+                    postal_code=f'{postal}{self.rng.randint(0, 999):03d}', country='India',
+                    phone=f'9{self.rng.randint(0, 999999999):09d}',
+                    order_status='Delivered' if age > 10 else self.rng.choice(['Pending', 'Shipped', 'Delivered']),
+                ))
+            self.write((Order, orders), (OrderItem, items), (ShippingAddress, addresses))
+            self.log(f'Orders: {ids.stop - start}/{count}')
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import *
 
@@ -19,7 +21,9 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model  = Product
-        fields = '__all__'
+        # Stock is staff-only; it changes with every checkout and would
+        # otherwise churn the catalog cache.
+        exclude = ['stock', 'stock_shards']
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -43,6 +47,55 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'items']
 
 
+class CartOperationSerializer(serializers.Serializer):
+    op         = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.IntegerField()
+    quantity   = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, data):
+        if data['op'] == 'add' and data.get('quantity', 1) < 1:
+            raise serializers.ValidationError({'quantity': 'Must be at least 1 for add.'})
+        if data['op'] == 'set' and 'quantity' not in data:
+            raise serializers.ValidationError({'quantity': 'This field is required for set.'})
+        return data
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(child=CartOperationSerializer(), allow_empty=False, max_length=100)
+
+    def validate_operations(self, operations):
+        product_ids = {operation['product_id'] for operation in operations}
+        missing = product_ids - set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(f"Products not found: {', '.join(map(str, sorted(missing)))}.")
+        return operations
+
+
+class CompactCartItemSerializer(serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='product.id', read_only=True)
+    name       = serializers.CharField(source='product.name', read_only=True)
+    price      = serializers.FloatField(source='product.price', read_only=True)
+    image      = serializers.URLField(source='product.image', read_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model  = CartItem
+        fields = ['id', 'product_id', 'name', 'price', 'image', 'quantity', 'line_total']
+
+
+class CompactCartSerializer(serializers.ModelSerializer):
+    items = CompactCartItemSerializer(many=True, read_only=True)
+    total = serializers.SerializerMethodField()
+
+    class Meta:
+        model  = Cart
+        fields = ['id', 'items', 'total']
+
+    def get_total(self, cart):
+        total = sum((item.line_total for item in cart.items.all()), Decimal('0.00'))
+        return serializers.DecimalField(max_digits=12, decimal_places=2).to_representation(total)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
 
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import catalog_cache
+from .models import Category, Product
+from .search import product_index
+from .snapshots import refresh_snapshots
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    refresh_snapshots(Product.objects.filter(pk=instance.pk))
+    transaction.on_commit(lambda: product_index.product_saved(instance, catalog_cache.bump()))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: product_index.product_deleted(product_id, catalog_cache.bump()))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    if not kwargs['created']:
+        refresh_snapshots(Product.objects.filter(category_id=instance.pk))
+    transaction.on_commit(lambda: product_index.category_saved(instance, catalog_cache.bump()))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    category_id = instance.pk
+    transaction.on_commit(lambda: product_index.category_deleted(category_id, catalog_cache.bump()))
@@ -0,0 +1,141 @@
+"""
+Pre-encoded product JSON.
+
+Every product keeps its public representation (``ProductSerializer``,
+category included) as ready-to-send bytes in a ``ProductSnapshot`` row. The
+catalog reads select those bytes with the page's ordering columns and join
+them into the response body, so a miss on the catalog cache runs neither
+serializers nor the JSON encoder per row.
+
+Snapshots are written in the same transaction as the change they reflect:
+the product and category ``post_save`` handlers refresh them, deletes
+cascade, and the product importer and ``StoreSeeder`` refresh each batch
+they write. Products written any other way without signals (raw SQL, a
+bare ``bulk_create``) have no snapshot until ``rebuild_snapshots`` runs;
+readers encode those on the fly, so a missing snapshot costs one extra
+query, never a wrong body. A ``queryset.update()`` of a public field does
+leave a stale one, so run the command after such a change.
+"""
+import json
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from music_store.fastjson import FastJSONRenderer
+
+from .fast_serializers import product_fields, product_to_dict
+from .models import Product, ProductSnapshot
+
+renderer = FastJSONRenderer()
+
+# What a snapshot read selects: the body plus every column the catalog can
+# order and paginate by.
+SNAPSHOT_FIELDS = ('id', 'price', 'created_at', 'snapshot__body')
+
+
+def encode(data):
+    """``data`` exactly as the JSON renderer writes it."""
+    return renderer.render(data)
+
+
+def wants_snapshots(request):
+    """
+    Whether ``request`` is answered with compact JSON that the snapshots can
+    be spliced into. Other renderers (the browsable API, ``indent=``) build
+    the body from data as usual.
+    """
+    return (
+        isinstance(request.accepted_renderer, JSONRenderer)
+        and request.accepted_renderer.get_indent(request.accepted_media_type, {}) is None
+    )
+
+
+def refresh_snapshots(queryset, batch_size=1000, categories=None):
+    """
+    Rewrite the snapshots of the products in ``queryset``. Returns how many
+    were written. A caller that already holds the category names passes
+    them as ``{id: name}`` to skip the join.
+    """
+    fields = product_fields()
+    if categories is not None:
+        fields = tuple(field for field in fields if field != 'category__name')
+    rows = queryset.order_by('id').values(*fields).iterator(chunk_size=batch_size)
+    written = 0
+    batch = []
+    for row in rows:
+        if categories is not None:
+            row['category__name'] = categories[row['category_id']]
+        batch.append(ProductSnapshot(product_id=row['id'], body=encode(product_to_dict(row))))
+        if len(batch) >= batch_size:
+            written += _write(batch)
+            batch = []
+    if batch:
+        written += _write(batch)
+    return written
+
+
+def _write(snapshots):
+    with transaction.atomic():
+        ProductSnapshot.objects.filter(product_id__in=[snapshot.product_id for snapshot in snapshots]).delete()
+        ProductSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
+
+
+def fallback_rows(rows):
+    """The full rows to encode for ``rows`` that have no snapshot, or None if all do."""
+    missing = [row['id'] for row in rows if row['snapshot__body'] is None]
+    if not missing:
+        return None
+    return Product.objects.filter(id__in=missing).values(*product_fields())
+
+
+def snapshot_bodies(rows, fallback=None):
+    """
+    The encoded products for rows of ``values(*SNAPSHOT_FIELDS)``, in order.
+    ``fallback`` is the evaluated ``fallback_rows(rows)``; it is queried here
+    when not given.
+    """
+    if fallback is None:
+        fallback = fallback_rows(rows) or ()
+    encoded = {row['id']: encode(product_to_dict(row)) for row in fallback}
+    return [row['snapshot__body'] or encoded[row['id']] for row in rows]
+
+
+async def asnapshot_bodies(rows):
+    queryset = fallback_rows(rows)
+    return snapshot_bodies(rows, [row async for row in queryset] if queryset is not None else ())
+
+
+def render_with_results(envelope, bodies):
+    """
+    Encode ``envelope`` with its ``results`` replaced by the pre-encoded
+    ``bodies``. ``results`` is written last, where the paginators and the
+    search view put it.
+    """
+    head = encode({**{key: value for key, value in envelope.items() if key != 'results'}, 'results': []})
+    return head[:-3] + b'[' + b','.join(bodies) + b']}'
+
+
+class EncodedResponse(Response):
+    """
+    A JSON response whose body is already encoded. ``data`` decodes it for
+    code that inspects the response, such as the test client.
+    """
+
+    def __init__(self, content, **kwargs):
+        self.encoded = bytes(content)
+        super().__init__(**kwargs)
+
+    @property
+    def data(self):
+        return json.loads(self.encoded)
+
+    @data.setter
+    def data(self, value):
+        pass
+
+    @property
+    def rendered_content(self):
+        self['Content-Type'] = self.content_type or self.accepted_renderer.media_type
+        return self.encoded
@@ -1,3 +1,1088 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+import tempfile
+import threading
+import zlib
+from unittest import skipIf
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from music_store import compression
+from music_store.compression import CODECS, available_codecs, compress_stream, is_compressible, negotiate
+from music_store.fastjson import FastJSONRenderer
+
+from .cache import catalog_cache
+from .checks import check_catalog_cache
+from .carts import fold_operations
+from .fast_serializers import cart_item_fields, cart_to_dict, product_fields, product_to_dict
+from .inventory import OutOfStock, reserve, set_stock, stock_levels
+from .models import Cart, CartItem, Category, Order, OrderItem, Product, ProductSnapshot, ShippingAddress, StockShard
+from .search import product_index
+from .serializers import CartSerializer, ProductSerializer
+from .snapshots import refresh_snapshots
+from ..jobs.models import Job
+from ..jobs.worker import work_off
+from ..users.authentication import tokens_for
+
+
+class ConcurrentDatabaseMixin:
+    """
+    For a TransactionTestCase whose threads write at once. Every connection
+    to SQLite's in-memory test database shares one cache, and concurrent
+    writers fail with "database table is locked", so on SQLite the class
+    runs against a migrated file database opened the way settings_bench
+    opens one: IMMEDIATE transactions that wait for the write lock.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if connection.vendor != "sqlite" or not connection.is_in_memory_db():
+            return
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory)
+        # The in-memory database lives as long as its connection; keep it
+        # open for the classes that run after this one.
+        memory_settings, memory_connection = connections.settings["default"], connections["default"]
+
+        def restore():
+            connections["default"].close()
+            connections.settings["default"] = memory_settings
+            connections["default"] = memory_connection
+
+        connections.settings["default"] = {
+            **memory_settings, "NAME": os.path.join(directory, "db.sqlite3"),
+            "OPTIONS": {**memory_settings["OPTIONS"], "transaction_mode": "IMMEDIATE", "timeout": 30},
+        }
+        connections["default"] = connections.create_connection("default")
+        cls.addClassCleanup(restore)
+        call_command("migrate", verbosity=0)
+
+
+def create_products(count, category=None, **extra):
+    category = category or Category.objects.create(name="Guitars")
+    products = Product.objects.bulk_create([
+        Product(
+            category=category,
+            name=f"Product {index}",
+            description="Description",
+            price=100.0 + index,
+            image="https://example.com/image.jpg",
+            **extra
+        )
+        for index in range(count)
+    ])
+    refresh_snapshots(Product.objects.filter(id__in=[product.id for product in products]))
+    return products
+
+
+class ProductListPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_products(25)
+
+    def test_pages_cover_catalog_once(self):
+        seen = []
+        url = "/api/product/?page_size=10"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(product["id"] for product in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, list(Product.objects.order_by("created_at", "id").values_list("id", flat=True)))
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get("/api/product/?page_size=10").data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual(
+            [product["id"] for product in back["results"]],
+            [product["id"] for product in first["results"]],
+        )
+
+    def test_page_query_count_is_constant(self):
+        with self.assertNumQueries(1):
+            first = self.client.get("/api/product/?page_size=5").data
+        with self.assertNumQueries(1):
+            self.client.get(first["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/product/?cursor=bogus")
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_cache.reset_stats()
+        self.client = APIClient()
+        self.product = create_products(3)[0]
+        self.admin = User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get("/api/product/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/product/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(catalog_cache.stats()["hits"], 1)
+        self.assertEqual(catalog_cache.stats()["misses"], 1)
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get("/api/product/?page_size=1")
+        self.assertEqual(self.client.get("/api/product/?page_size=2")["X-Cache"], "MISS")
+
+    def test_local_memory_cache_fails_the_check_outside_debug(self):
+        self.assertEqual([error.id for error in check_catalog_cache(None)], ["products.E001"])
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_catalog_cache(None), [])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertEqual(check_catalog_cache(None), [])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "shop.example.com"])
+    def test_host_and_scheme_are_part_of_the_key(self):
+        self.client.get("/api/product/?page_size=1")
+        for extra in ({"HTTP_HOST": "shop.example.com"}, {"secure": True}):
+            response = self.client.get("/api/product/?page_size=1", **extra)
+            self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.json()["next"].startswith("https://testserver/"))
+
+    def test_admin_write_invalidates_cached_responses(self):
+        url = f"/api/product/{self.product.pk}/"
+        self.client.get(url)
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/admin/products/{self.product.pk}/", {"name": "Renamed"}, format="json")
+        self.client.force_authenticate(None)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["name"], "Renamed")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = create_products(2)
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+
+    def test_product_list_not_modified(self):
+        response = self.client.get("/api/product/")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(0):
+            revalidated = self.client.get("/api/product/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    def test_product_detail_if_modified_since(self):
+        url = f"/api/product/{self.products[0].pk}/"
+        response = self.client.get(url)
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_catalog_write_changes_etag(self):
+        etag = self.client.get("/api/product/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].save()
+        response = self.client.get("/api/product/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cart_etag_follows_item_set(self):
+        cart = Cart.objects.create(user=self.user)
+        item = CartItem.objects.create(cart=cart, product=self.products[0], quantity=1)
+        self.client.force_authenticate(self.user)
+        etag = self.client.get("/api/carts/")["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/carts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        item.quantity = 2
+        item.save()
+        response = self.client.get("/api/carts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"][0]["quantity"], 2)
+
+    def test_missing_cart_is_still_404(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/carts/").status_code, 404)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.user)
+        self.products = create_products(30)
+        self.shipping = {
+            "fullName": "Buyer", "address": "1 Main St", "city": "Chennai", "state": "TN",
+            "postalCode": "600001", "country": "India", "phone": "1234567890",
+        }
+
+    def checkout(self, products, quantity=2):
+        return self.client.post("/api/checkout/", {
+            "cart_items": [{"product": {"id": product.id}, "quantity": quantity} for product in products],
+            "shipping_details": self.shipping,
+            "payment_method": "card",
+        }, format="json")
+
+    def test_creates_order_and_clears_cart(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=2)
+
+        response = self.checkout(self.products[:2])
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, Decimal("402.00"))
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.shipping_address.city, "Chennai")
+        self.assertEqual(len(response.data["items"]), 2)
+        # Emptied with the order, not by a worker.
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_queues_sales_rollup_with_the_order(self):
+        self.checkout(self.products[:2])
+        order = Order.objects.get()
+        self.assertEqual(list(Job.objects.values_list("kind", "payload")), [("sales.record_order", {"order_id": order.id})])
+        self.assertEqual(work_off(), 1)
+
+    def test_keeps_cart_lines_the_order_did_not_buy(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=2)
+        other = CartItem.objects.create(cart=cart, product=self.products[5], quantity=1)
+        self.checkout(self.products[:1])
+        self.assertEqual(list(CartItem.objects.all()), [other])
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.checkout(self.products[:1])
+        with CaptureQueriesContext(connection) as large:
+            self.checkout(self.products)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Order.objects.get(items__product=self.products[29]).items.count(), 30)
+
+    def test_unknown_product_writes_nothing(self):
+        response = self.client.post("/api/checkout/", {
+            "cart_items": [{"product": {"id": 999999}, "quantity": 1}],
+            "shipping_details": self.shipping,
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_failure_rolls_back_the_whole_order(self):
+        with mock.patch.object(ShippingAddress.objects, "create", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.checkout(self.products[:3])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+
+class InventoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.user)
+        self.products = create_products(3)
+
+    def checkout(self, *lines):
+        return self.client.post("/api/checkout/", {
+            "cart_items": [{"product": {"id": product.id}, "quantity": quantity} for product, quantity in lines],
+            "shipping_details": {},
+        }, format="json")
+
+    def level(self, product):
+        return stock_levels([product.id])[product.id]
+
+    def test_untracked_stock_never_runs_out(self):
+        self.assertEqual(self.checkout((self.products[0], 500)).status_code, 201)
+        self.assertIsNone(self.level(self.products[0]))
+
+    def test_reserves_and_refuses_what_is_not_there(self):
+        guitar = self.products[0]
+        set_stock(guitar, 5)
+        self.assertEqual(self.checkout((guitar, 2)).status_code, 201)
+        self.assertEqual(self.checkout((guitar, 2)).status_code, 201)
+
+        CartItem.objects.create(cart=Cart.objects.create(user=self.user), product=guitar, quantity=2)
+        response = self.checkout((guitar, 2))
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(CartItem.objects.filter(product=guitar).exists())
+        self.assertEqual(response.data["products"], [guitar.id])
+        self.assertEqual(self.level(guitar), 1)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_repeated_lines_are_reserved_together(self):
+        set_stock(self.products[0], 3)
+        self.assertEqual(self.checkout((self.products[0], 2), (self.products[0], 2)).status_code, 409)
+        self.assertEqual(self.level(self.products[0]), 3)
+
+    def test_one_short_product_releases_the_others(self):
+        set_stock(self.products[0], 5)
+        set_stock(self.products[1], 1)
+        response = self.checkout((self.products[0], 2), (self.products[1], 2), (self.products[2], 1))
+        self.assertEqual(response.data["products"], [self.products[1].id])
+        self.assertEqual((self.level(self.products[0]), self.level(self.products[1])), (5, 1))
+        self.assertFalse(Order.objects.exists())
+
+    def test_one_update_reserves_every_tracked_product(self):
+        for product in self.products:
+            set_stock(product, 10)
+        with CaptureQueriesContext(connection) as one:
+            self.checkout((self.products[0], 1))
+        with CaptureQueriesContext(connection) as three:
+            self.checkout(*[(product, 1) for product in self.products])
+        self.assertEqual(len(one), len(three))
+        self.assertEqual([self.level(product) for product in self.products], [8, 9, 9])
+
+    def test_sharded_stock_sells_out_exactly(self):
+        guitar = self.products[0]
+        set_stock(guitar, 10, shards=4)
+        self.assertEqual(list(StockShard.objects.order_by("shard").values_list("stock", flat=True)), [3, 3, 2, 2])
+        for _ in range(10):
+            self.assertEqual(self.checkout((guitar, 1)).status_code, 201)
+        self.assertEqual(self.checkout((guitar, 1)).status_code, 409)
+        self.assertEqual(self.level(guitar), 0)
+
+    def test_sharded_quantity_can_span_shards(self):
+        guitar = self.products[0]
+        set_stock(guitar, 4, shards=4)
+        self.assertEqual(self.checkout((guitar, 3)).status_code, 201)
+        self.assertEqual(self.level(guitar), 1)
+        self.assertEqual(self.checkout((guitar, 2)).status_code, 409)
+
+    def test_set_stock_switches_modes(self):
+        guitar = self.products[0]
+        set_stock(guitar, 10, shards=4)
+        set_stock(guitar, 7)
+        guitar.refresh_from_db()
+        self.assertEqual((guitar.stock, guitar.stock_shards, StockShard.objects.count()), (7, 0, 0))
+        set_stock(guitar, None, shards=4)
+        guitar.refresh_from_db()
+        self.assertEqual((guitar.stock, guitar.stock_shards), (None, 0))
+
+    def test_saving_a_stale_product_keeps_stock(self):
+        guitar = Product.objects.get(pk=self.products[0].pk)
+        set_stock(self.products[0], 4)
+        guitar.name = "Renamed"
+        guitar.save()
+        self.assertEqual(self.level(guitar), 4)
+        self.assertEqual(Product.objects.get(pk=guitar.pk).name, "Renamed")
+
+    def test_stock_is_not_public(self):
+        set_stock(self.products[0], 4)
+        data = self.client.get(f"/api/product/{self.products[0].id}/").data
+        self.assertNotIn("stock", data)
+        self.assertNotIn("stock", ProductSerializer(self.products[0]).data)
+
+
+class InventoryBenchmarkTests(ConcurrentDatabaseMixin, TransactionTestCase):
+    def test_concurrent_checkouts_never_oversell(self):
+        out = StringIO()
+        call_command("bench_inventory", stock=30, buyers=4, shards="0,3", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[:2] for line in lines[-2:]], [["0", "30"], ["3", "30"]])
+        self.assertFalse(Product.objects.exists())
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        product_index.build()
+        self.client = APIClient()
+        guitars = Category.objects.create(name="Guitars")
+        drums = Category.objects.create(name="Drums")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.strat = Product.objects.create(
+                category=guitars, name="Stratocaster Electric", description="Solid body guitar",
+                price=999.0, image="https://example.com/strat.jpg",
+            )
+            self.kit = Product.objects.create(
+                category=drums, name="Studio Kit", description="Five piece kit with cymbals",
+                price=499.0, image="https://example.com/kit.jpg",
+            )
+
+    def search(self, query):
+        return self.client.get("/api/product/search/", {"q": query}).data
+
+    def test_ranks_and_matches_prefixes(self):
+        self.assertEqual([p["id"] for p in self.search("strato")["results"]], [self.strat.id])
+        self.assertEqual([p["id"] for p in self.search("drums")["results"]], [self.kit.id])
+        self.assertEqual(self.search("guitar kit")["count"], 2)
+
+    def test_signals_update_index_incrementally(self):
+        version = product_index.version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kit.name = "Jazz Kit"
+            self.kit.save()
+        self.assertEqual(product_index.version, version + 1)
+        self.assertEqual([p["id"] for p in self.search("jazz")["results"]], [self.kit.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.strat.category.delete()
+        self.assertEqual(self.search("stratocaster")["count"], 0)
+
+    def test_search_does_not_scan_the_table(self):
+        self.search("warm up")
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.search("kit")
+        self.assertFalse(any("LIKE" in query["sql"] for query in queries))
+
+    def test_rebuild_under_way_does_not_hold_up_searches(self):
+        self.search("warm up")
+        catalog_cache.bump()
+        # Another search is rebuilding: this one answers from the current index.
+        with product_index._build_lock, CaptureQueriesContext(connection) as queries:
+            self.assertEqual([p["id"] for p in self.search("strato")["results"]], [self.strat.id])
+        self.assertFalse(any("products_category" in query["sql"] for query in queries))
+        self.search("kit")
+        self.assertEqual(product_index.version, catalog_cache.version())
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(""), {"count": 0, "results": []})
+
+
+class ProductFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.guitars = Category.objects.create(name="Guitars")
+        self.drums = Category.objects.create(name="Drums")
+        create_products(12, category=self.guitars)
+        create_products(5, category=self.drums)
+
+    def ids(self, params):
+        response = self.client.get("/api/product/", params)
+        self.assertEqual(response.status_code, 200)
+        return [product["id"] for product in response.data["results"]]
+
+    def test_category_and_price_range(self):
+        ids = self.ids({"category": self.guitars.id, "min_price": 103, "max_price": 106})
+        expected = Product.objects.filter(category=self.guitars, price__gte=103, price__lte=106)
+        self.assertEqual(sorted(ids), sorted(expected.values_list("id", flat=True)))
+
+    def test_ordering_by_price_paginates_by_price(self):
+        seen = []
+        response = self.client.get("/api/product/", {"ordering": "-price", "page_size": 4})
+        while True:
+            seen.extend(product["price"] for product in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(seen), 17)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_invalid_filter_value(self):
+        response = self.client.get("/api/product/", {"min_price": "cheap"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("min_price", response.data)
+
+    def test_non_finite_price_filters_are_rejected(self):
+        for value in ("nan", "NaN", "inf", "-Infinity", "1e999", "sNaN"):
+            response = self.client.get("/api/product/", {"max_price": value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("max_price", response.data)
+
+    def test_filtered_listing_uses_composite_indexes(self):
+        for params, index in (
+            ({"category": self.guitars.id, "ordering": "price", "min_price": 1}, "product_cat_price_idx"),
+            ({"category": self.guitars.id, "ordering": "-created_at"}, "product_cat_created_idx"),
+            ({"ordering": "price"}, "product_price_id_idx"),
+        ):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get("/api/product/", params)
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + queries[-1]["sql"])
+                plan = " ".join(str(row) for row in cursor.fetchall())
+            self.assertIn(index, plan)
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+
+class CartDetailTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        self.products = create_products(10)
+
+    def fill(self, count):
+        CartItem.objects.filter(cart=self.cart).delete()
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=2) for product in self.products[:count]
+        ])
+
+    def test_query_count_is_fixed(self):
+        for params in ({}, {"compact": "true"}):
+            self.fill(1)
+            with CaptureQueriesContext(connection) as small:
+                self.client.get("/api/carts/", params)
+            self.fill(10)
+            with CaptureQueriesContext(connection) as large:
+                response = self.client.get("/api/carts/", params)
+            self.assertEqual(len(response.data["items"]), 10)
+            self.assertEqual(len(small), len(large))
+
+    def test_compact_representation(self):
+        self.fill(2)
+        data = self.client.get("/api/carts/", {"compact": "true"}).data
+        self.assertEqual(
+            set(data["items"][0]),
+            {"id", "product_id", "name", "price", "image", "quantity", "line_total"},
+        )
+        self.assertEqual(data["items"][0]["line_total"], "200.00")
+        self.assertEqual(data["total"], "402.00")
+
+    def test_compact_has_its_own_etag(self):
+        self.fill(1)
+        full = self.client.get("/api/carts/")
+        compact = self.client.get("/api/carts/", {"compact": "true"}, HTTP_IF_NONE_MATCH=full["ETag"])
+        self.assertEqual(compact.status_code, 200)
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.user)
+        self.products = create_products(3)
+        Product.objects.filter(pk=self.products[1].pk).update(price=99.999, description="Ünïcode \"quoted\"")
+        refresh_snapshots(Product.objects.filter(pk=self.products[1].pk))
+
+    def assertSameJSON(self, fast, slow):
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+
+    def test_product_matches_model_serializer(self):
+        queryset = Product.objects.order_by("id")
+        self.assertSameJSON(
+            [product_to_dict(row) for row in queryset.values(*product_fields())],
+            ProductSerializer(queryset.select_related("category"), many=True).data,
+        )
+
+    def test_cart_matches_model_serializer(self):
+        cart = Cart.objects.create(user=self.user)
+        rows = list(Cart.objects.filter(pk=cart.pk).values("id", *cart_item_fields("items__")))
+        self.assertSameJSON(cart_to_dict(rows), CartSerializer(cart).data)
+
+        CartItem.objects.create(cart=cart, product=self.products[1], quantity=3)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=1)
+        rows = list(Cart.objects.filter(pk=cart.pk).order_by("items__id").values("id", *cart_item_fields("items__")))
+        self.assertSameJSON(cart_to_dict(rows), CartSerializer(cart).data)
+
+    def test_endpoints_match_model_serializer(self):
+        product = Product.objects.get(pk=self.products[1].pk)
+        self.assertEqual(
+            self.client.get(f"/api/product/{product.pk}/").content,
+            JSONRenderer().render(ProductSerializer(product).data),
+        )
+        listed = self.client.get("/api/product/?page_size=10").json()["results"]
+        self.assertEqual(listed, ProductSerializer(Product.objects.order_by("created_at", "id"), many=True).data)
+        self.assertEqual(self.client.get("/api/product/0/").status_code, 404)
+
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+        self.assertEqual(self.client.get("/api/carts/").content, JSONRenderer().render(CartSerializer(cart).data))
+
+
+class ProductSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Guitars")
+        self.products = create_products(3, self.category)
+        self.admin = User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+
+    def snapshot(self, product):
+        return json.loads(bytes(ProductSnapshot.objects.get(product=product).body))
+
+    def test_bodies_match_the_serializer(self):
+        product = self.products[0]
+        response = self.client.get(f"/api/product/{product.pk}/")
+        self.assertEqual(response.content, JSONRenderer().render(ProductSerializer(product).data))
+        self.assertEqual(response["Content-Type"], "application/json")
+
+        response = self.client.get("/api/product/?page_size=2")
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(
+            response.data["results"],
+            ProductSerializer(Product.objects.order_by("created_at", "id")[:2], many=True).data,
+        )
+        response = self.client.get("/api/product/search/", {"q": "product"})
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.data["count"], 3)
+
+    def test_list_reads_snapshots_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/product/")
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("products_category", queries[0]["sql"])
+
+    def test_missing_snapshots_are_encoded_on_read(self):
+        expected = self.client.get("/api/product/").content
+        ProductSnapshot.objects.filter(product=self.products[1]).delete()
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get("/api/product/").content, expected)
+
+    def test_other_renderers_build_from_data(self):
+        response = self.client.get(f"/api/product/{self.products[0].pk}/", HTTP_ACCEPT="application/json; indent=2")
+        self.assertIn(b'\n  "id"', response.content)
+        response = self.client.get("/api/product/", HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_writes_refresh_snapshots(self):
+        self.client.force_authenticate(self.admin)
+        product = self.products[0]
+        self.client.patch(f"/api/admin/products/{product.pk}/", {"name": "Renamed", "price": 5}, format="json")
+        self.assertEqual((self.snapshot(product)["name"], self.snapshot(product)["price"]), ("Renamed", 5.0))
+
+        self.client.patch(f"/api/admin/categories/{self.category.pk}/", {"name": "Basses"}, format="json")
+        self.assertEqual({self.snapshot(product)["category"]["name"] for product in self.products}, {"Basses"})
+
+        self.client.delete(f"/api/admin/products/{product.pk}/")
+        self.assertFalse(ProductSnapshot.objects.filter(product_id=product.pk).exists())
+
+    def test_rebuild_command(self):
+        Product.objects.filter(pk=self.products[0].pk).update(name="Changed behind the ORM")
+        ProductSnapshot.objects.filter(product=self.products[1]).delete()
+        out = StringIO()
+        call_command("rebuild_snapshots", stdout=out)
+        self.assertIn("Rebuilt 3 product snapshots.", out.getvalue())
+        self.assertEqual(self.snapshot(self.products[0])["name"], "Changed behind the ORM")
+        self.assertEqual(ProductSnapshot.objects.count(), 3)
+
+    def test_benchmark_paths_agree(self):
+        out = StringIO()
+        call_command("bench_snapshots", rows=30, page_size=7, repeat=1, stdout=out)
+        self.assertIn("snapshots", out.getvalue())
+        self.assertEqual(Product.objects.count(), 3)
+
+
+class FastJSONTests(TestCase):
+    data = {
+        "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        "day": date(2024, 5, 1),
+        "total": Decimal("12.50"),
+        "label": gettext_lazy("Guitars"),
+        "text": "Ünïcode \u2028 line",
+        1: "integer key",
+        "results": [{"id": index, "price": 100.5 + index} for index in range(5)],
+    }
+
+    def test_renders_like_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        self.assertEqual(FastJSONRenderer().render(self.data["results"]), JSONRenderer().render(self.data["results"]))
+        with mock.patch.object(FastJSONRenderer, "use_orjson", False):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_falls_back_where_orjson_cannot_encode(self):
+        data = {"big": 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"big":1180591620717411303424}')
+        indented = "application/json; indent=4"
+        self.assertEqual(FastJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
+
+    def test_parser(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post("/api/checkout/", b'{"cart_items": [', content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+        response = client.post("/api/checkout/", b'{"cart_items": NaN}', content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        product = create_products(1)[0]
+        body = json.dumps({"cart_items": [{"product": {"id": product.id}, "quantity": 2}]}).encode("utf-16")
+        response = client.post("/api/checkout/", body, content_type="application/json; charset=utf-16")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["items"][0]["quantity"], 2)
+
+    def test_benchmark_renderers_agree(self):
+        out = StringIO()
+        call_command("bench_json", items=50, repeat=1, stdout=out)
+        self.assertIn("parse checkout", out.getvalue())
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class ResponseCompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_products(10)
+
+    def test_negotiation(self):
+        with override_settings(COMPRESSION_ENCODINGS=["zstd", "br", "gzip"]):
+            self.assertEqual(negotiate("gzip, deflate").name, "gzip")
+            self.assertEqual(negotiate("x-gzip").name, "gzip")
+            self.assertIsNone(negotiate("gzip;q=0, identity"))
+            self.assertIsNone(negotiate(""))
+            self.assertEqual(negotiate("*;q=0.5, gzip;q=0.1").name, available_codecs()[0].name)
+        with override_settings(COMPRESSION_ENCODINGS=["gzip"]):
+            self.assertIsNone(negotiate("br, zstd"))
+
+    def test_catalog_page_is_compressed(self):
+        plain = self.client.get("/api/product/")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["ETag"], "W/" + plain["ETag"])
+        revalidated = self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_cache_hits_reuse_the_stored_variant(self):
+        codec = CODECS["gzip"]
+        with mock.patch.object(codec, "compress", wraps=codec.compress) as compress:
+            first = self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 1)
+            second = self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 1)
+        self.assertEqual((second["X-Cache"], second.content), ("HIT", first.content))
+
+        cache.clear()
+        with override_settings(CATALOG_CACHE_PRECOMPRESS=False), \
+                mock.patch.object(codec, "compress", wraps=codec.compress) as compress:
+            self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip")
+            self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 2)
+
+    def test_small_and_binary_bodies_are_left_alone(self):
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            self.assertFalse(self.client.get("/api/product/", HTTP_ACCEPT_ENCODING="gzip").has_header("Content-Encoding"))
+        self.assertFalse(is_compressible("image/png"))
+        self.assertTrue(is_compressible("application/json; charset=utf-8"))
+
+    def assert_codec_works(self, name, decompressor):
+        codec = CODECS[name]
+        body = b'{"name":"Stratocaster"}' * 100
+        decompress = lambda data: decompressor().decompress(data)
+        self.assertEqual(decompress(codec.compress(body)), body)
+        stream = codec.compressobj()
+        self.assertEqual(decompress(stream.compress(body) + stream.flush()), body)
+        # Each streamed chunk decodes as soon as it arrives.
+        decoder = decompressor()
+        chunks = compress_stream(codec, iter([b"id,name\n", b"1,Stratocaster\n"]))
+        self.assertEqual(decoder.decompress(next(chunks)), b"id,name\n")
+        self.assertEqual(decoder.decompress(next(chunks)), b"1,Stratocaster\n")
+        decoder.decompress(b"".join(chunks))
+
+    def test_gzip_codec(self):
+        self.assert_codec_works("gzip", lambda: zlib.decompressobj(31))
+
+    @skipIf(compression.brotli is None, "brotli is not installed.")
+    def test_brotli_codec(self):
+        class Decompressor:
+            def __init__(self):
+                self.decompressor = compression.brotli.Decompressor()
+
+            def decompress(self, data):
+                return self.decompressor.process(data)
+
+        self.assert_codec_works("br", Decompressor)
+
+    @skipIf(compression.zstandard is None, "zstandard is not installed.")
+    def test_zstd_codec(self):
+        self.assert_codec_works("zstd", lambda: compression.zstandard.ZstdDecompressor().decompressobj())
+
+    def test_benchmark_runs(self):
+        out = StringIO()
+        call_command("bench_compression", requests=2, page_size=5, stdout=out)
+        self.assertIn("gzip", out.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class EndpointBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = os.path.join(directory.name, "baseline.json")
+
+    def bench(self, **options):
+        out = StringIO()
+        call_command("bench_endpoints", sizes="5,40", iterations=2, baseline=self.baseline, stdout=out, **options)
+        return out.getvalue()
+
+    def test_query_counts_do_not_grow_with_size(self):
+        self.assertIn("Benchmark gates passed.", self.bench())
+        self.assertFalse(Product.objects.exists())
+
+    def test_latency_above_baseline_fails(self):
+        self.bench(save_baseline=True)
+        with open(self.baseline) as handle:
+            baseline = json.load(handle)
+        baseline["40"]["product list"]["p95_ms"] = 0.0001
+        with open(self.baseline, "w") as handle:
+            json.dump(baseline, handle)
+        with self.assertRaisesMessage(CommandError, "product list at 40 rows: p95"):
+            self.bench()
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SeedStoreTests(TestCase):
+    def seed(self):
+        call_command("seed_store", products=40, users=12, carts=5, orders=30, batch_size=7, stdout=StringIO())
+
+    def test_counts_and_relations(self):
+        self.seed()
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(User.objects.count(), 12)
+        self.assertEqual(Cart.objects.count(), 5)
+        self.assertEqual(Order.objects.count(), 30)
+        self.assertEqual(ShippingAddress.objects.count(), 30)
+        self.assertFalse(Order.objects.filter(items__isnull=True).exists())
+        self.assertGreater(Order.objects.dates("created_at", "day").count(), 1)
+        order = Order.objects.prefetch_related("items").first()
+        self.assertEqual(order.total_price, sum(item.price * item.quantity for item in order.items.all()))
+        self.assertTrue(User.objects.first().check_password("password123"))
+
+    def test_same_seed_same_data(self):
+        def snapshot():
+            return (
+                list(Product.objects.order_by("id").values_list("name", "price", "category__name")),
+                list(OrderItem.objects.order_by("id").values_list("order_id", "product_id", "quantity", "price")),
+            )
+
+        self.seed()
+        first = snapshot()
+        for model in (Order, Cart, Product, Category, User):
+            model.objects.all().delete()
+        self.seed()
+        self.assertEqual(snapshot(), first)
+
+    def test_reseeding_reuses_categories(self):
+        self.seed()
+        categories = list(Category.objects.order_by("id").values_list("id", "name"))
+        self.seed()
+        self.assertEqual(list(Category.objects.order_by("id").values_list("id", "name")), categories)
+        self.assertEqual(Product.objects.count(), 80)
+        self.assertFalse(Product.objects.exclude(category_id__in=[id for id, _ in categories]).exists())
+
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.client.force_authenticate(self.user)
+        self.products = create_products(30)
+
+    def batch(self, *operations):
+        return self.client.post("/api/cart/batch/", {"operations": list(operations)}, format="json")
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list("product_id", "quantity"))
+
+    def test_fold_operations(self):
+        self.assertEqual(fold_operations([
+            {"op": "add", "product_id": 1, "quantity": 2},
+            {"op": "add", "product_id": 1},
+            {"op": "set", "product_id": 2, "quantity": 4},
+            {"op": "add", "product_id": 2, "quantity": 1},
+            {"op": "remove", "product_id": 3},
+            {"op": "add", "product_id": 3, "quantity": 5},
+            {"op": "set", "product_id": 4, "quantity": 0},
+        ]), {1: ("add", 3), 2: ("set", 5), 3: ("set", 5), 4: ("remove", 0)})
+
+    def test_applies_operations_and_returns_cart(self):
+        first, second, third = (product.id for product in self.products[:3])
+        self.batch({"op": "add", "product_id": first, "quantity": 2}, {"op": "add", "product_id": second})
+        response = self.batch(
+            {"op": "add", "product_id": first, "quantity": 3},
+            {"op": "set", "product_id": second, "quantity": 7},
+            {"op": "add", "product_id": third},
+            {"op": "remove", "product_id": third},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {first: 5, second: 7})
+        self.assertEqual(
+            [(item["product"]["id"], item["quantity"]) for item in response.data["items"]],
+            [(first, 5), (second, 7)],
+        )
+
+    def test_query_count_is_fixed(self):
+        def operations(products):
+            return [{"op": op, "product_id": product.id, "quantity": 2}
+                    for product in products for op in ("add", "set", "add")]
+
+        self.batch(*operations(self.products[:1]))
+        with CaptureQueriesContext(connection) as small:
+            self.batch(*operations(self.products[:1]), {"op": "remove", "product_id": self.products[1].id})
+        with CaptureQueriesContext(connection) as large:
+            self.batch(*operations(self.products[:30]), {"op": "remove", "product_id": self.products[1].id})
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(self.quantities()), 29)
+
+    def test_rejects_unknown_products_without_changes(self):
+        response = self.batch({"op": "add", "product_id": self.products[0].id}, {"op": "add", "product_id": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Products not found: 0.", str(response.data))
+        self.assertEqual(self.quantities(), {})
+        self.assertEqual(self.batch({"op": "set", "product_id": self.products[0].id}).status_code, 400)
+
+
+class CartBatchConcurrencyTests(ConcurrentDatabaseMixin, TransactionTestCase):
+    def test_concurrent_adds_are_not_lost(self):
+        user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        product = create_products(1)[0]
+        Cart.objects.create(user=user)
+
+        def add():
+            client = APIClient()
+            client.force_authenticate(user)
+            for _ in range(10):
+                client.post("/api/cart/batch/", {"operations": [{"op": "add", "product_id": product.id}]}, format="json")
+            connections.close_all()
+
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(CartItem.objects.get(cart__user=user, product=product).quantity, 80)
+
+
+class StockRespreadConcurrencyTests(ConcurrentDatabaseMixin, TransactionTestCase):
+    def test_respreading_during_checkouts_loses_no_stock(self):
+        admin = User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+        product = create_products(1)[0]
+        set_stock(product, 200, shards=4)
+        sold = []
+
+        def buy():
+            try:
+                for _ in range(20):
+                    try:
+                        with transaction.atomic():
+                            reserve({product.id: Product.objects.get(pk=product.id)}, {product.id: 1})
+                    except OutOfStock:
+                        continue
+                    sold.append(1)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        client = APIClient()
+        client.force_authenticate(admin)
+        for shards in (2, 5, 3, 4, 1, 6):
+            response = client.patch(f"/api/admin/products/{product.id}/", {"stock_shards": shards}, format="json")
+            self.assertEqual(response.status_code, 200)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(sold) + stock_levels([product.id])[product.id], 200)
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.token = str(tokens_for(self.user).access_token)
+        self.products = create_products(5)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=2) for product in self.products[:3]])
+
+    def get(self, path, token=None, **headers):
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        with self.settings(ROOT_URLCONF="music_store.urls_async"):
+            return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def sync_get(self, path, token=None):
+        return self.client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}" if token else "")
+
+    def test_routes_resolve_to_coroutines(self):
+        for path in ("/api/product/", f"/api/product/{self.products[0].pk}/", "/api/carts/"):
+            self.assertTrue(iscoroutinefunction(resolve(path, "music_store.urls_async").func), path)
+        self.assertFalse(iscoroutinefunction(resolve("/api/checkout/", "music_store.urls_async").func))
+
+    def test_catalog_matches_sync_views(self):
+        for path in (
+            "/api/product/?page_size=2&ordering=-price",
+            f"/api/product/{self.products[0].pk}/",
+            "/api/product/0/",
+            "/api/product/?min_price=abc",
+        ):
+            expected = self.sync_get(path)
+            cache.clear()
+            response = self.get(path)
+            self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()), path)
+
+        response = self.get("/api/product/?page_size=2")
+        self.assertEqual(response["X-Cache"], "MISS")
+        following = self.get(response.json()["next"])
+        self.assertEqual(len(following.json()["results"]), 2)
+
+    def test_catalog_validators_and_cache(self):
+        response = self.get("/api/product/")
+        self.assertEqual(self.get("/api/product/")["X-Cache"], "HIT")
+        revalidated = self.get("/api/product/", If_None_Match=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_cart_matches_sync_view(self):
+        for path in ("/api/carts/", "/api/carts/?compact=true"):
+            expected = self.sync_get(path, self.token)
+            response = self.get(path, self.token)
+            self.assertEqual(response.json(), expected.json())
+            self.assertEqual(response["ETag"], expected["ETag"])
+
+        with self.assertNumQueries(1):
+            response = self.get("/api/carts/", self.token)
+        self.assertEqual(self.get("/api/carts/", self.token, If_None_Match=response["ETag"]).status_code, 304)
+
+    def test_cart_errors(self):
+        self.assertEqual(self.get("/api/carts/").status_code, 401)
+        Cart.objects.all().delete()
+        self.assertEqual(self.get("/api/carts/", self.token).status_code, 404)
+
+    def test_tokens_without_claims_load_the_user(self):
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual(self.get("/api/carts/", token).status_code, 200)
+
+    @override_settings(REQUEST_TIMING_HEADER=True)
+    def test_server_timing_counts_queries(self):
+        response = self.get("/api/carts/", self.token)
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+
+class AsyncBenchmarkTests(TransactionTestCase):
+    def test_both_paths_serve_every_request(self):
+        out = StringIO()
+        call_command(
+            "bench_async", requests=12, concurrency=3, threads=2, latency_ms=1, products=10, users=2,
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("asgi/wsgi throughput", output)
+        self.assertRegex(output, r"wsgi .* 0\n")
+        self.assertRegex(output, r"asgi .* 0\n")
@@ -0,0 +1,8 @@
+from django.urls import path
+from .async_views import AsyncCartDetailView, AsyncProductRetrieve, AsyncProductView
+
+urlpatterns=[
+    path('product/', AsyncProductView.as_view()),
+    path('product/<int:pk>/', AsyncProductRetrieve.as_view()),
+    path('carts/', AsyncCartDetailView.as_view(), name='cart-detail'),
+]
@@ -1,20 +1,133 @@
+import math
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import status
 from rest_framework import generics, permissions
-from rest_framework.exceptions import NotFound
+from rest_framework import filters
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from ..jobs.registry import enqueue
+from .cache import CatalogCacheMixin, catalog_cache
+from .carts import apply_cart_operations
+from .conditional import CatalogConditionalGetMixin, ConditionalGetMixin, digest_rows
+from .inventory import OutOfStock, reserve, shortages
+from .fast_serializers import cart_item_fields, cart_to_dict, product_fields, product_to_dict
 from .models import *
+from .pagination import KeysetCursorPagination
+from .search import product_index
+from .snapshots import SNAPSHOT_FIELDS, EncodedResponse, render_with_results, snapshot_bodies, wants_snapshots
 from .serializers import *
 from rest_framework.views import APIView
 
 
-class ProductView(generics.ListAPIView):
-    queryset = Product.objects.all()
+def parse_price(value):
+    """A finite price as a float, or None. Rejects nan, inf and values past the float range like 1e999."""
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not price.is_finite() or not math.isfinite(float(price)):
+        return None
+    return float(price)
+
+
+class ProductView(CatalogConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
+    queryset = Product.objects.select_related('category')
     serializer_class = ProductSerializer
+    pagination_class = KeysetCursorPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['price', 'created_at']
+    ordering = ['created_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        errors = {}
+
+        if params.get('category'):
+            try:
+                queryset = queryset.filter(category_id=int(params['category']))
+            except ValueError:
+                errors['category'] = 'A valid integer is required.'
+
+        for param, lookup in (('min_price', 'price__gte'), ('max_price', 'price__lte')):
+            if params.get(param):
+                price = parse_price(params[param])
+                if price is None:
+                    errors[param] = 'A valid number is required.'
+                else:
+                    queryset = queryset.filter(**{lookup: price})
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if wants_snapshots(request):
+            page = self.paginate_queryset(queryset.values(*SNAPSHOT_FIELDS))
+            return self.get_encoded_response(snapshot_bodies(page))
+        # Read path: plain rows and dicts instead of instances and ProductSerializer.
+        page = self.paginate_queryset(queryset.values(*product_fields()))
+        return self.get_paginated_response([product_to_dict(row) for row in page])
+
+    def get_encoded_response(self, bodies):
+        envelope = self.get_paginated_response([]).data
+        return EncodedResponse(render_with_results(envelope, bodies))
+
+
+class ProductRetrieve(CatalogConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.select_related('category')
+    serializer_class = ProductSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if wants_snapshots(request):
+            row = generics.get_object_or_404(Product.objects.values(*SNAPSHOT_FIELDS), pk=pk)
+            return EncodedResponse(snapshot_bodies([row])[0])
+        row = generics.get_object_or_404(self.get_queryset().values(*product_fields()), pk=pk)
+        return Response(product_to_dict(row))
 
 
-class ProductRetrieve(generics.RetrieveAPIView):
-    queryset = Product.objects.all()
+class ProductSearchView(CatalogConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        total, ranked = product_index.search(query, limit)
+        snapshots = wants_snapshots(request)
+        fields = SNAPSHOT_FIELDS if snapshots else product_fields()
+        rows = Product.objects.filter(id__in=[product_id for product_id, _ in ranked]).values(*fields)
+        products = {row['id']: row for row in rows}
+        rows = [products[product_id] for product_id, _ in ranked if product_id in products]
+        if snapshots:
+            return EncodedResponse(render_with_results({'count': total}, snapshot_bodies(rows)))
+        return Response({'count': total, 'results': [product_to_dict(row) for row in rows]})
+
+
+def read_cart(user_id):
+    """
+    The full CartSerializer shape in one LEFT JOIN: a row per item, or one
+    row with null item columns for an empty cart. None if there is no cart.
+    """
+    rows = list(cart_rows(user_id))
+    return cart_to_dict(rows) if rows else None
+
+
+def cart_rows(user_id):
+    return (
+        Cart.objects.filter(user_id=user_id)
+        .order_by('items__id')
+        .values('id', *cart_item_fields('items__'))
+    )
 
 
 class CartListCreateView(generics.ListCreateAPIView):
@@ -23,21 +136,63 @@ class CartListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
 
-class CartDetailView(generics.GenericAPIView):
+class CartDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     serializer_class = CartSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request, *args, **kwargs):
+    def is_compact(self):
+        return self.request.query_params.get('compact', '').lower() in ('1', 'true', 'yes')
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return CompactCartSerializer
+        return CartSerializer
+
+    def get_queryset(self):
+        if self.is_compact():
+            items = CartItem.objects.select_related('product').only(
+                'id', 'cart_id', 'quantity',
+                'product__id', 'product__name', 'product__price', 'product__image',
+            )
+        else:
+            items = CartItem.objects.select_related('product__category')
+        return Cart.objects.prefetch_related(Prefetch('items', queryset=items.order_by('id')))
+
+    def get_etag(self, request, *args, **kwargs):
+        return self.etag_from_rows(list(self.etag_rows(request.user.id)))
+
+    def etag_rows(self, user_id):
+        # One LEFT JOIN over the cart's item set; product details are covered
+        # by the catalog version.
+        return (
+            Cart.objects.filter(user_id=user_id)
+            .order_by('items__id')
+            .values_list('id', 'items__id', 'items__product_id', 'items__quantity')
+        )
+
+    def etag_from_rows(self, rows):
+        if not rows:
+            return None
+        return digest_rows(
+            catalog_cache.version(), self.request.accepted_media_type, self.is_compact(), rows
+        )
+
+    def get_object(self):
         try:
-            cart = Cart.objects.get(user=request.user)
+            return self.get_queryset().get(user_id=self.request.user.id)
         except Cart.DoesNotExist:
             raise NotFound("Cart not found.")
 
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def retrieve(self, request, *args, **kwargs):
+        if self.is_compact():
+            return super().retrieve(request, *args, **kwargs)
+        data = read_cart(request.user.id)
+        if data is None:
+            raise NotFound("Cart not found.")
+        return Response(data)
 
 
 class CartItemCreateView(generics.CreateAPIView):
@@ -46,7 +201,7 @@ class CartItemCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
+        cart, created = Cart.objects.get_or_create(user_id=self.request.user.id)
         product = serializer.validated_data['product']
         quantity = serializer.validated_data.get('quantity', 1)
 
@@ -59,6 +214,23 @@ class CartItemCreateView(generics.CreateAPIView):
             cart_item.save()
 
 
+class CartBatchView(APIView):
+    """
+    Apply ``{"operations": [{"op": "add" | "set" | "remove", "product_id",
+    "quantity"}, ...]}`` to the user's cart in one transaction and return
+    the resulting cart. ``add`` defaults to a quantity of 1.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart, _ = Cart.objects.get_or_create(user_id=request.user.id)
+        apply_cart_operations(cart.id, serializer.validated_data['operations'])
+        return Response(read_cart(request.user.id), status=status.HTTP_200_OK)
+
+
 class CartItemDeleteView(generics.DestroyAPIView):
     queryset = CartItem.objects.all()
     serializer_class = CartItemSerializer
@@ -79,48 +251,80 @@ class CheckoutView(APIView):
         if not cart_items:
             return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            lines = [(int(item["product"]["id"]), int(item["quantity"])) for item in cart_items]
+        except (KeyError, TypeError, ValueError):
+            return Response({"error": "Invalid cart items"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if any(quantity < 1 for _, quantity in lines):
+            return Response({"error": "Invalid cart items"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One query for every product referenced by the cart.
+        products = Product.objects.in_bulk({product_id for product_id, _ in lines})
+        if len(products) != len({product_id for product_id, _ in lines}):
+            return Response({"error": "Product not found"}, status=status.HTTP_400_BAD_REQUEST)
+
         # Total Calculation
-        total_price = 0
-        for item in cart_items:
-            product_id = item["product"]["id"]
-            product = Product.objects.get(id=product_id)
-            total_price += product.price * item["quantity"]
-
-        # Order Creation
-        order = Order.objects.create(
-            user=user,
-            total_price=total_price,
-            payment_method=payment_method,
-            is_paid=True  
-        )
+        prices = {
+            product_id: Decimal(str(product.price)).quantize(Decimal("0.01"))
+            for product_id, product in products.items()
+        }
+        total_price = sum((prices[product_id] * quantity for product_id, quantity in lines), Decimal("0.00"))
 
-        for item in cart_items:
-            product_id = item["product"]["id"]
-            product = Product.objects.get(id=product_id)
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=item["quantity"],
-                price=product.price
-            )
+        quantities = {}
+        for product_id, quantity in lines:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
 
-        ShippingAddress.objects.create(
-            order=order,
-            full_name=shipping_data.get("fullName", ""),
-            address=shipping_data.get("address", ""),
-            city=shipping_data.get("city", ""),
-            state=shipping_data.get("state", ""),
-            postal_code=shipping_data.get("postalCode", ""),
-            country=shipping_data.get("country", ""),
-            phone=shipping_data.get("phone", "")
-        )
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(
+                    user_id=user.id,
+                    total_price=total_price,
+                    payment_method=payment_method,
+                    is_paid=True
+                )
 
-        if request.user.is_authenticated:
-            try:
-                cart = Cart.objects.get(user=request.user)
-                cart.items.all().delete()
-            except Cart.DoesNotExist:
-                pass
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product_id=product_id,
+                        quantity=quantity,
+                        price=prices[product_id]
+                    )
+                    for product_id, quantity in lines
+                ])
 
+                ShippingAddress.objects.create(
+                    order=order,
+                    full_name=shipping_data.get("fullName", ""),
+                    address=shipping_data.get("address", ""),
+                    city=shipping_data.get("city", ""),
+                    state=shipping_data.get("state", ""),
+                    postal_code=shipping_data.get("postalCode", ""),
+                    country=shipping_data.get("country", ""),
+                    phone=shipping_data.get("phone", "")
+                )
+
+                # Bought, so out of the cart before the buyer sees it again.
+                CartItem.objects.filter(cart__user_id=user.id, product_id__in=products).delete()
+
+                # Sales rollups run in the job workers; queued in this
+                # transaction, the job exists exactly when the order does.
+                enqueue("sales.record_order", {"order_id": order.id})
+
+                # Last, so the stock rows it locks are held only until commit.
+                reserve(products, quantities)
+        except OutOfStock:
+            return Response(
+                {"error": "Insufficient stock", "products": shortages(quantities)},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        order = (
+            Order.objects
+            .select_related("shipping_address")
+            .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product__category")))
+            .get(pk=order.pk)
+        )
         serializer = OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
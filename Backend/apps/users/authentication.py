@@ -0,0 +1,135 @@
+"""
+Stateless JWT authentication.
+
+Access tokens issued by ``tokens_for`` carry the user's ``username``,
+``is_staff`` and ``is_active``, so ``StatelessJWTAuthentication`` can build
+``request.user`` from the token alone and ``IsAuthenticated`` never
+touches the database. Views that need the real row use
+``request.user.instance``, which loads it on first access; the admin
+endpoints do, so staff rights are never taken from the token alone.
+
+Revocation replaces the per-request user load: logging out revokes the
+token's ``jti``, and saving a user (deactivation, password or staff
+changes) invalidates every token issued to them before that moment.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+USER_CLAIMS = ('username', 'is_staff', 'is_active')
+
+
+def tokens_for(user):
+    """A refresh token (and through it an access token) carrying ``USER_CLAIMS``."""
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+class StoreTokenUser(TokenUser):
+    @cached_property
+    def id(self):
+        # simplejwt writes the claim as a string; match the model's pk type.
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def instance(self):
+        """The ``auth.User`` row, loaded on first access."""
+        return get_user_model().objects.get(pk=self.id)
+
+
+class TokenRevocations:
+    """
+    Revoked token ids and per-user "not before" times.
+
+    Entries live in the Django cache ``alias``, behind an in-process memo
+    of ``local_ttl`` seconds so most requests answer the check without
+    leaving the process. Only a shared backend (Redis, Memcached, the
+    database) carries a revocation to other processes, and then within
+    ``local_ttl`` seconds; with a local-memory cache, the default, each
+    worker sees only the revocations it made itself.
+    """
+
+    def __init__(self, alias, local_ttl, max_entries=10000):
+        self.alias = alias
+        self.local_ttl = local_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._local = {}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _remember(self, key, value):
+        with self._lock:
+            if len(self._local) >= self.max_entries:
+                self._local.clear()
+            self._local[key] = (value, time.monotonic() + self.local_ttl)
+
+    def _get(self, key):
+        entry = self._local.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        value = self.cache.get(key)
+        self._remember(key, value)
+        return value
+
+    def _set(self, key, value, timeout):
+        self.cache.set(key, value, max(int(timeout), 1))
+        self._remember(key, value)
+
+    def revoke_token(self, token):
+        self._set(f'jwt:revoked:{token[api_settings.JTI_CLAIM]}', True, token['exp'] - time.time())
+
+    def revoke_user(self, user_id):
+        # ``iat`` has whole-second precision, so the cutoff does too: a token
+        # issued in the same second as the revocation, such as the one a
+        # password change hands back, stays valid. None outlives a refresh
+        # token.
+        self._set(f'jwt:not-before:{user_id}', int(time.time()), api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+    def is_revoked(self, token):
+        if self._get(f'jwt:revoked:{token.get(api_settings.JTI_CLAIM)}'):
+            return True
+        not_before = self._get(f'jwt:not-before:{token.get(api_settings.USER_ID_CLAIM)}')
+        return not_before is not None and token.get('iat', 0) < not_before
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+revocations = TokenRevocations(settings.JWT_REVOCATION_CACHE_ALIAS, settings.JWT_REVOCATION_LOCAL_TTL)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    ``request.user`` is a ``StoreTokenUser`` built from the token's claims.
+    Tokens issued before the claims existed fall back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if revocations.is_revoked(validated_token):
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+        if 'is_staff' not in validated_token:
+            return JWTAuthentication.get_user(self, validated_token)
+
+        user = super().get_user(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_revocation_cache(app_configs, **kwargs):
+    if not settings.JWT_STATELESS_AUTH:
+        return []
+    if not isinstance(caches[settings.JWT_REVOCATION_CACHE_ALIAS], LocMemCache):
+        return []
+    return [checks.Warning(
+        "JWT_REVOCATION_CACHE_ALIAS points at a local-memory cache, so a logout or a "
+        "deactivation only applies in the worker process that handled it.",
+        hint="Point CACHE_URL (or the alias) at a cache shared by every worker, such as Redis.",
+        id='users.W001',
+    )]
@@ -0,0 +1,41 @@
+"""
+Password checks for the login endpoints.
+
+``authenticate()`` looks the user up again and runs the hasher inside the
+backend loop; the login views already know which row they want, so they
+fetch it once and check the password against it. Either way it costs
+exactly one query and one hash, including for unknown accounts, so the
+response time does not reveal which accounts exist.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Case, Value, When
+from django.db.models.functions import Lower
+
+
+def users_by_email(email):
+    """
+    Users whose email matches case-insensitively, served by
+    ``auth_user_email_lower_idx``. Emails are not unique in ``auth_user``,
+    so an exact-case match comes first, then the oldest account.
+    """
+    return (
+        User.objects.alias(email_lower=Lower('email'))
+        .filter(email_lower=Lower(Value(email)))
+        .order_by(Case(When(email=email, then=0), default=1), 'id')
+    )
+
+
+def check_credentials(queryset, password):
+    """
+    The first user of ``queryset`` if ``password`` is theirs and the
+    account is active, else None.
+    """
+    user = queryset.first()
+    if user is None:
+        # Hash anyway, as ModelBackend does, so a missing account costs the
+        # same as a wrong password.
+        User().set_password(password)
+        return None
+    if not user.check_password(password) or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,219 @@
+"""
+Write-behind ingestion for contact messages.
+
+In buffered mode (``CONTACT_INGEST_MODE = 'buffered'``) the contact view
+validates a submission, puts it on a bounded in-process queue and answers
+202 at once. A background thread writes the queue with ``bulk_create`` once
+``CONTACT_BATCH_SIZE`` messages are waiting or every
+``CONTACT_FLUSH_INTERVAL`` seconds, so a burst of posts costs one INSERT
+per batch instead of one database round trip (and connection) each.
+``created_at`` is therefore the time of the flush, at most one interval
+after the submission.
+
+When the queue is full, ``submit`` raises ``ContactQueueFull`` (503 with
+``Retry-After``) rather than buffering without bound.
+
+Nothing accepted is dropped on purpose: a batch that fails to insert is
+appended to the spool file (``CONTACT_SPOOL_PATH``, JSON lines) and
+replayed on a later flush. Every worker process shares the spool; appends
+and replays hold an exclusive ``flock`` on ``<spool>.lock``, so only one
+process replays it at a time and none appends to a file being replayed.
+A line that no longer parses (a write cut short by a crash) is moved to
+``<spool>.rejected`` and logged instead of failing every replay.
+``close()`` - registered with ``atexit``, which gunicorn and uvicorn
+workers run on a graceful shutdown - drains the queue before the process
+exits. A process killed outright loses at most what was still in memory.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from rest_framework.exceptions import APIException
+
+from .models import ContactMessage
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): fine for the single-process development server.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('name', 'email', 'message')
+
+
+class ContactQueueFull(APIException):
+    status_code = 503
+    default_detail = 'Too many messages right now, please try again shortly.'
+    default_code = 'contact_queue_full'
+
+    def __init__(self, wait):
+        super().__init__()
+        # The exception handler turns ``wait`` into a Retry-After header.
+        self.wait = wait
+
+
+class ContactBuffer:
+    def __init__(self, max_size, batch_size, interval, spool_path=None):
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spool_path = spool_path
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, data):
+        try:
+            self.queue.put_nowait({field: data[field] for field in FIELDS})
+        except queue.Full:
+            raise ContactQueueFull(wait=max(1, round(self.interval)))
+        self.start()
+        if self.queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name='contact-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # This thread outlives any request, so nothing else closes its
+        # connection: drop it after a flush once it is past CONN_MAX_AGE or
+        # broken, as the request signals would, and for good on the way out.
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('Contact message flush failed')
+                finally:
+                    close_old_connections()
+        finally:
+            connections.close_all()
+
+    def drain(self):
+        messages = []
+        while len(messages) < self.batch_size:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def flush(self):
+        """Write everything queued (and any spooled batches). Returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            written += self._replay_spool()
+            while True:
+                messages = self.drain()
+                if not messages:
+                    return written
+                written += self._write(messages)
+
+    def _write(self, messages):
+        try:
+            self._insert(messages)
+        except DatabaseError:
+            if not self.spool_path:
+                raise
+            logger.exception('Spooling %d contact messages to %s', len(messages), self.spool_path)
+            with self._spool_lock():
+                self._append(self.spool_path, [json.dumps(message) + '\n' for message in messages])
+            return 0
+        return len(messages)
+
+    def _insert(self, messages):
+        ContactMessage.objects.bulk_create([ContactMessage(**message) for message in messages])
+
+    @contextmanager
+    def _spool_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f'{self.spool_path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, path, lines):
+        with open(path, 'a', encoding='utf-8') as spool:
+            spool.writelines(lines)
+            spool.flush()
+            os.fsync(spool.fileno())
+
+    def _replay_spool(self):
+        replaying = f'{self.spool_path}.replay'
+        if not self.spool_path or not (os.path.exists(self.spool_path) or os.path.exists(replaying)):
+            return 0
+        with self._spool_lock():
+            # Claim the file first so a failed replay spools into a fresh
+            # one. A ``.replay`` left by a process that died mid-replay is
+            # picked up as it is.
+            if not os.path.exists(replaying):
+                if not os.path.exists(self.spool_path):
+                    return 0
+                os.replace(self.spool_path, replaying)
+            messages, rejected = self._read_spool(replaying)
+            if rejected:
+                logger.error('Moving %d unreadable contact message lines from %s to %s.rejected',
+                             len(rejected), replaying, self.spool_path)
+                self._append(f'{self.spool_path}.rejected', rejected)
+            written = 0
+            for start in range(0, len(messages), self.batch_size):
+                batch = messages[start:start + self.batch_size]
+                try:
+                    self._insert(batch)
+                except DatabaseError:
+                    logger.exception('Replaying %s failed; spooling the rest again', replaying)
+                    self._append(self.spool_path, [json.dumps(message) + '\n' for message in messages[start:]])
+                    break
+                written += len(batch)
+            os.remove(replaying)
+        return written
+
+    def _read_spool(self, path):
+        """The spooled messages in ``path``, and the lines that are not one."""
+        messages, rejected = [], []
+        with open(path, encoding='utf-8', errors='replace') as spool:
+            for line in spool:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    messages.append({field: message[field] for field in FIELDS})
+                except (ValueError, TypeError, KeyError):
+                    rejected.append(line if line.endswith('\n') else line + '\n')
+        return messages, rejected
+
+    def close(self, timeout=10):
+        """Stop the flusher and write what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+contact_buffer = ContactBuffer(
+    settings.CONTACT_QUEUE_SIZE, settings.CONTACT_BATCH_SIZE, settings.CONTACT_FLUSH_INTERVAL,
+    settings.CONTACT_SPOOL_PATH,
+)
+atexit.register(contact_buffer.close)
@@ -0,0 +1,154 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from ....products.management.commands.bench_async import wsgi_request
+from ....products.management.commands.bench_endpoints import percentile
+from ....products.models import Product
+from ....products.seeding import StoreSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput and catalog latency while attackers flood the login endpoint "
+        "with wrong passwords. Attackers and catalog readers share one pool of WSGI worker "
+        "threads, as they would share a server. Runs three phases: no attack, an attack with the "
+        "login throttles off, and an attack with them on. Seeds users and products if there are "
+        "none; run it against music_store.settings_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help="Measured seconds per phase.")
+        parser.add_argument('--warmup', type=float, default=45.0,
+                            help="Seconds of attack before measuring, long enough to spend the "
+                                 "throttles' bursts.")
+        parser.add_argument('--workers', type=int, default=8,
+                            help="WSGI worker threads shared by all clients.")
+        parser.add_argument('--attackers', type=int, default=32,
+                            help="Concurrent attacking connections.")
+        parser.add_argument('--attack-ips', type=int, default=4,
+                            help="Distinct source addresses the attackers use.")
+        parser.add_argument('--readers', type=int, default=4,
+                            help="Concurrent catalog readers.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if min(options['workers'], options['attackers'], options['attack_ips'], options['readers']) < 1:
+            raise CommandError("--workers, --attackers, --attack-ips and --readers must be positive.")
+        if not User.objects.exists() or not Product.objects.exists():
+            self.stdout.write("Seeding 200 products and 100 users.")
+            StoreSeeder(seed=options['seed']).run(products=200, users=100)
+
+        rng = random.Random(options['seed'])
+        emails = list(User.objects.order_by('id').values_list('email', flat=True)[:200])
+        # Half the attempts name accounts that do not exist.
+        emails += [f'nobody{index}@example.com' for index in range(len(emails))]
+        product_ids = list(Product.objects.values_list('id', flat=True)[:500])
+
+        unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login_ip': None, 'login_account': None}}
+        phases = []
+        for name, attack, rest_framework in (
+            ('no attack', False, settings.REST_FRAMEWORK),
+            ('unthrottled', True, unthrottled),
+            ('throttled', True, settings.REST_FRAMEWORK),
+        ):
+            cache.clear()
+            with override_settings(REST_FRAMEWORK=rest_framework):
+                phases.append((name, self.run_phase(attack, emails, product_ids, rng, options)))
+        self.report(phases, options)
+
+    def run_phase(self, attack, emails, product_ids, rng, options):
+        application = WSGIHandler()
+        measuring = threading.Event()
+        stop = threading.Event()
+        lock = threading.Lock()
+        logins = {'attempts': 0, 'rejected': 0, 'failed': 0}
+        reads = []
+
+        def attacker(index):
+            address = f'10.0.0.{index % options["attack_ips"] + 1}'
+            while not stop.is_set():
+                body = json.dumps({'email': rng.choice(emails), 'password': 'wrong-password-1'}).encode()
+                status = workers.submit(
+                    wsgi_request, application, 'POST', '/api/auth/login/', body=body,
+                    CONTENT_TYPE='application/json', REMOTE_ADDR=address,
+                ).result()
+                if not measuring.is_set() or stop.is_set():
+                    continue
+                with lock:
+                    logins['attempts'] += 1
+                    if status == 429:
+                        logins['rejected'] += 1
+                    elif status == 400:
+                        logins['failed'] += 1
+
+        def reader(index):
+            count = 0
+            while not stop.is_set():
+                count += 1
+                # A unique parameter keeps reads off the catalog cache.
+                path = f'/api/product/{product_ids[(index * 7919 + count) % len(product_ids)]}/'
+                start = time.perf_counter()
+                status = workers.submit(
+                    wsgi_request, application, 'GET', path, f'bench={index}-{count}',
+                ).result()
+                if not measuring.is_set() or stop.is_set():
+                    continue
+                with lock:
+                    reads.append((time.perf_counter() - start, status))
+
+        # Only requests that complete inside the measured window count.
+        with ThreadPoolExecutor(options['workers']) as workers:
+            clients = [threading.Thread(target=reader, args=(index,)) for index in range(options['readers'])]
+            if attack:
+                clients += [threading.Thread(target=attacker, args=(index,)) for index in range(options['attackers'])]
+            for client in clients:
+                client.start()
+            if attack:
+                time.sleep(options['warmup'])
+            start = time.perf_counter()
+            measuring.set()
+            time.sleep(options['duration'])
+            stop.set()
+            elapsed = time.perf_counter() - start
+            for client in clients:
+                client.join()
+
+        timings = [duration for duration, status in reads if status < 400]
+        return {
+            'login_rate': logins['attempts'] / elapsed,
+            'hashed_rate': logins['failed'] / elapsed,
+            'rejected': logins['rejected'] / logins['attempts'] if logins['attempts'] else 0.0,
+            'read_rate': len(timings) / elapsed,
+            # A starved reader may not complete a single request.
+            'read_p50_ms': percentile(timings, 0.50) * 1000 if timings else float('nan'),
+            'read_p95_ms': percentile(timings, 0.95) * 1000 if timings else float('nan'),
+            'read_errors': len(reads) - len(timings),
+        }
+
+    def report(self, phases, options):
+        self.stdout.write(
+            f"\n{options['workers']} workers, {options['attackers']} attackers from "
+            f"{options['attack_ips']} addresses, {options['readers']} catalog readers, "
+            f"{options['duration']:g} s measured after {options['warmup']:g} s of attack"
+        )
+        self.stdout.write(
+            f"  {'phase':<13}{'logins/s':>10}{'hashed/s':>10}{'429 share':>11}"
+            f"{'reads/s':>10}{'read p50':>10}{'read p95':>10}{'errors':>8}"
+        )
+        for name, row in phases:
+            self.stdout.write(
+                f"  {name:<13}{row['login_rate']:>10.1f}{row['hashed_rate']:>10.1f}{row['rejected']:>11.1%}"
+                f"{row['read_rate']:>10.1f}{row['read_p50_ms']:>10.2f}{row['read_p95_ms']:>10.2f}"
+                f"{row['read_errors']:>8}"
+            )
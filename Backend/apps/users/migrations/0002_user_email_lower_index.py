@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:10
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth.User belongs to django.contrib.auth, so its index is created through
+# the schema editor rather than AddIndex on a model of this app.
+EMAIL_INDEX = models.Index(Lower('email'), name='auth_user_email_lower_idx')
+
+
+def add_email_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -6,5 +6,11 @@ class ContactMessage(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # The admin listing reads newest first.
+            models.Index(fields=['-created_at', '-id'], name='contact_created_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.name} <{self.email}>"
\ No newline at end of file
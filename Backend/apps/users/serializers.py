@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
 from rest_framework import serializers
+from .credentials import check_credentials, users_by_email
 from .models import ContactMessage
 import re
 
@@ -12,7 +12,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if users_by_email(value).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value
 
@@ -48,12 +48,7 @@ class LoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
 
-        try:
-            user_obj = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid email or password")
-
-        user = authenticate(username=user_obj.username, password=password)
+        user = check_credentials(users_by_email(email), password)
         if not user:
             raise serializers.ValidationError("Invalid email or password")
 
@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import revocations
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Claims in tokens already issued may now be stale (is_active, is_staff,
+    # username) or the password may have changed; a last_login touch is not
+    # a reason to log the user out. Neither is check_password upgrading a
+    # stale hash on login: it saves only the password, after clearing
+    # ``_password``, which a set_password() followed by save() leaves set.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    if update_fields is not None and set(update_fields) == {'password'} and instance._password is None:
+        return
+    revocations.revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Stateless tokens never load the row, so nothing else stops them.
+    revocations.revoke_user(instance.pk)
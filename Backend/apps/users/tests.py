@@ -1,3 +1,338 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from ..products.models import Cart, Category, Product
+from .authentication import revocations
+from .ingest import ContactBuffer
+from .models import ContactMessage
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StatelessAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        revocations.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "buyer@example.com", "pass1234")
+        self.admin = User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+        Cart.objects.create(user=self.user)
+
+    def login(self, email="buyer@example.com"):
+        response = self.client.post("/api/auth/login/", {"email": email, "password": "pass1234"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["access_token"]
+
+    def get(self, path, token):
+        return self.client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def a_second_later(self):
+        # Revocation cutoffs have whole-second precision, like ``iat``.
+        return mock.patch("apps.users.authentication.time.time", return_value=time.time() + 1)
+
+    def test_login_token_carries_claims(self):
+        token = AccessToken(self.login())
+        self.assertEqual(
+            (token["user_id"], token["username"], token["is_staff"], token["is_active"]),
+            (str(self.user.id), "buyer", False, True),
+        )
+
+    def test_requests_do_not_load_the_user(self):
+        token = self.login()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("/api/carts/", token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.id, self.user.id)
+        self.assertFalse([query for query in queries if "auth_user" in query["sql"]])
+        self.assertEqual(response.wsgi_request.user.instance, self.user)
+
+    def test_admin_endpoints_check_staff_against_the_row(self):
+        Product.objects.create(
+            category=Category.objects.create(name="Guitars"), name="Strat", description="Guitar",
+            price=10, image="https://example.com/strat.jpg",
+        )
+        staff = self.client.post("/api/admin/login/", {"username": "admin", "password": "pass1234"}, format="json")
+        self.assertEqual(self.get("/api/admin/products/", staff.data["access"]).status_code, 200)
+        self.assertEqual(self.get("/api/admin/products/", self.login()).status_code, 403)
+        # Demoted where no revocation reaches this process.
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.assertEqual(self.get("/api/admin/products/", staff.data["access"]).status_code, 403)
+
+    def test_logout_revokes_token(self):
+        token = self.login()
+        response = self.client.post("/api/auth/logout/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get("/api/carts/", token).status_code, 401)
+
+    def test_saving_user_revokes_earlier_tokens(self):
+        token = self.login()
+        self.user.is_active = False
+        with self.a_second_later():
+            self.user.save()
+        revocations.clear()
+        self.assertEqual(self.get("/api/carts/", token).status_code, 401)
+
+    def test_deleting_user_revokes_their_tokens(self):
+        token = self.login()
+        with self.a_second_later():
+            self.user.delete()
+        revocations.clear()
+        self.assertEqual(self.get("/api/carts/", token).status_code, 401)
+        response = self.client.post(
+            "/api/cart/items/", {"product_id": 1, "quantity": 1}, format="json", HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_rehash_on_login_keeps_the_new_token(self):
+        # MD5 is no longer the preferred hasher, so logging in upgrades it.
+        with override_settings(PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]):
+            token = self.login()
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+            revocations.clear()
+            self.assertEqual(self.get("/api/carts/", token).status_code, 200)
+
+    def test_password_change_revokes_earlier_tokens(self):
+        token = self.login()
+        self.user.set_password("new-pass")
+        with self.a_second_later():
+            self.user.save(update_fields=["password"])
+        revocations.clear()
+        self.assertEqual(self.get("/api/carts/", token).status_code, 401)
+
+    def test_tokens_without_claims_load_the_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get("/api/carts/", token).status_code, 200)
+        self.assertTrue([query for query in queries if "auth_user" in query["sql"]])
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates})
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user("buyer", "Buyer@Example.com", "pass1234")
+        User.objects.create_user("admin", "admin@example.com", "pass1234", is_staff=True)
+
+    def login(self, email, password="pass1234", address="10.0.0.1"):
+        return self.client.post(
+            "/api/auth/login/", {"email": email, "password": password}, format="json", REMOTE_ADDR=address
+        )
+
+    def count_hashes(self):
+        return mock.patch.object(MD5PasswordHasher, "encode", autospec=True, side_effect=MD5PasswordHasher.encode)
+
+    def test_email_index_exists(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "auth_user")
+        self.assertIn("auth_user_email_lower_idx", constraints)
+
+    def test_email_is_case_insensitive(self):
+        self.assertEqual(self.login("buyer@example.com").data["username"], "buyer")
+        self.assertEqual(self.login("BUYER@EXAMPLE.COM").data["username"], "buyer")
+
+    def test_one_query_and_one_hash(self):
+        for email, password, status in (
+            ("buyer@example.com", "pass1234", 200),
+            ("buyer@example.com", "wrong-pass1", 400),
+            ("nobody@example.com", "pass1234", 400),
+        ):
+            with self.count_hashes() as encode, CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.login(email, password).status_code, status)
+            self.assertEqual(encode.call_count, 1, email)
+            self.assertEqual(len([query for query in queries if "auth_user" in query["sql"]]), 1, email)
+
+    def test_inactive_user_cannot_log_in(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login("buyer@example.com").status_code, 400)
+
+    def test_register_rejects_email_in_other_case(self):
+        response = self.client.post(
+            "/api/auth/register/", {"username": "other", "email": "BUYER@example.com", "password": "pass12345"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @throttle_rates(login_ip="3/min", login_account="100/min")
+    def test_ip_bucket_rejects_before_hashing(self):
+        for index in range(3):
+            self.assertEqual(self.login(f"user{index}@example.com").status_code, 400)
+        with self.count_hashes() as encode:
+            response = self.login("buyer@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(encode.call_count, 0)
+        self.assertEqual(self.login("buyer@example.com", address="10.0.0.2").status_code, 200)
+
+    @throttle_rates(login_ip="100/min", login_account="2/min")
+    def test_account_bucket_spans_addresses(self):
+        self.assertEqual(self.login("buyer@example.com", "wrong-pass1", "10.0.0.1").status_code, 400)
+        self.assertEqual(self.login("BUYER@example.com", "wrong-pass1", "10.0.0.2").status_code, 400)
+        self.assertEqual(self.login("buyer@example.com", address="10.0.0.3").status_code, 429)
+        self.assertEqual(self.login("admin@example.com", address="10.0.0.3").status_code, 200)
+
+    @throttle_rates(login_ip="100/min", login_account="2/min")
+    def test_bucket_refills(self):
+        with mock.patch("rest_framework.throttling.SimpleRateThrottle.timer", return_value=0) as timer:
+            self.login("buyer@example.com", "wrong-pass1")
+            self.login("buyer@example.com", "wrong-pass1")
+            self.assertEqual(self.login("buyer@example.com").status_code, 429)
+            timer.return_value = 30
+            self.assertEqual(self.login("buyer@example.com").status_code, 200)
+            self.assertEqual(self.login("buyer@example.com").status_code, 429)
+
+    @throttle_rates(login_ip="100/min", login_account="1/min")
+    def test_admin_login_is_throttled(self):
+        payload = {"username": "admin", "password": "wrong-pass1"}
+        self.assertEqual(self.client.post("/api/admin/login/", payload, format="json").status_code, 401)
+        self.assertEqual(self.client.post("/api/admin/login/", payload, format="json").status_code, 429)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginBenchmarkTests(TransactionTestCase):
+    def test_reports_every_phase(self):
+        out = StringIO()
+        call_command(
+            "bench_login", duration=0.3, warmup=0.2, workers=2, attackers=2, attack_ips=1, readers=1, stdout=out,
+        )
+        output = out.getvalue()
+        for phase in ("no attack", "unthrottled", "throttled"):
+            self.assertIn(phase, output)
+
+
+def contact(index):
+    return {"name": f"Fan {index}", "email": f"fan{index}@example.com", "message": "Do you stock left-handed basses?"}
+
+
+@override_settings(CONTACT_INGEST_MODE="buffered")
+class BufferedContactTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_path = os.path.join(spool_dir.name, "contact.jsonl")
+        self.buffer = ContactBuffer(max_size=5, batch_size=2, interval=60, spool_path=self.spool_path)
+        # No flusher thread: the tests flush by hand.
+        self.buffer.start = lambda: None
+        patcher = mock.patch("apps.users.views.contact_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, data):
+        return self.client.post("/api/auth/contact/", data, format="json")
+
+    def test_accepts_without_writing(self):
+        response = self.post(contact(1))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, contact(1))
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_invalid_message_is_rejected_before_queueing(self):
+        response = self.post({"name": "Fan", "email": "not-an-email", "message": "Hi"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.buffer.queue.qsize(), 0)
+
+    def test_flush_writes_batches(self):
+        for index in range(5):
+            self.post(contact(index))
+        # Three batches of at most two.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.buffer.flush(), 5)
+        self.assertEqual(
+            list(ContactMessage.objects.order_by("id").values_list("email", flat=True)),
+            [f"fan{index}@example.com" for index in range(5)],
+        )
+
+    def test_full_queue_pushes_back(self):
+        for index in range(5):
+            self.assertEqual(self.post(contact(index)).status_code, 202)
+        response = self.post(contact(5))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "60")
+        self.buffer.flush()
+        self.assertEqual(self.post(contact(5)).status_code, 202)
+
+    def test_failed_batch_is_spooled_and_replayed(self):
+        self.post(contact(1))
+        self.post(contact(2))
+        with mock.patch.object(ContactMessage.objects, "bulk_create", side_effect=DatabaseError), \
+                self.assertLogs("apps.users.ingest", "ERROR"):
+            self.assertEqual(self.buffer.flush(), 0)
+        with open(self.spool_path) as spool:
+            self.assertEqual([json.loads(line)["email"] for line in spool], ["fan1@example.com", "fan2@example.com"])
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    def test_unreadable_spool_lines_are_set_aside(self):
+        with open(self.spool_path, "w") as spool:
+            spool.write(json.dumps(contact(1)) + "\n" + '{"name": "Cut sh' + "\n" + json.dumps(contact(2)) + "\n")
+        with self.assertLogs("apps.users.ingest", "ERROR"):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        with open(self.spool_path + ".rejected") as rejected:
+            self.assertEqual(rejected.read(), '{"name": "Cut sh\n')
+        # Later flushes are not held up by it.
+        self.post(contact(3))
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_close_flushes_what_is_left(self):
+        self.post(contact(1))
+        self.buffer.close()
+        self.assertEqual(ContactMessage.objects.get().email, "fan1@example.com")
+
+    @override_settings(CONTACT_INGEST_MODE="direct")
+    def test_direct_mode_inserts_in_the_request(self):
+        response = self.post(contact(1))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContactMessage.objects.get().id, response.data["id"])
+
+
+class ContactFlusherTests(TransactionTestCase):
+    def test_background_thread_flushes_full_batches(self):
+        buffer = ContactBuffer(max_size=10, batch_size=3, interval=30)
+        self.addCleanup(buffer.close)
+        for index in range(3):
+            buffer.submit(contact(index))
+        # A full batch wakes the flusher long before the interval is up.
+        deadline = time.monotonic() + 5
+        while ContactMessage.objects.count() < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_thread_keeps_its_connection_between_flushes(self):
+        buffer = ContactBuffer(max_size=10, batch_size=1, interval=30)
+        with mock.patch("apps.users.ingest.close_old_connections") as close_old, \
+                mock.patch("apps.users.ingest.connections") as connections:
+            for index in range(3):
+                buffer.submit(contact(index))
+                deadline = time.monotonic() + 5
+                while ContactMessage.objects.count() <= index and time.monotonic() < deadline:
+                    time.sleep(0.02)
+            connections.close_all.assert_not_called()
+            buffer.close()
+        self.assertGreaterEqual(close_old.call_count, 3)
+        connections.close_all.assert_called_once_with()
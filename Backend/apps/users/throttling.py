@@ -0,0 +1,82 @@
+"""
+Token-bucket throttles for the login endpoints.
+
+Throttles run in ``APIView.initial``, before the view parses credentials,
+so a rejected attempt costs one cache read and never reaches the password
+hasher. That keeps a credential-stuffing burst from spending worker CPU on
+PBKDF2: each IP and each account gets a small burst and then a steady rate.
+"""
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    A rate of ``n/period`` is a bucket of ``n`` tokens refilled at
+    ``n / period`` per second: a client may spend ``n`` requests at once and
+    then continues at the steady rate, instead of waiting out a whole
+    window as with DRF's sliding-window throttles.
+
+    State is ``(tokens, updated)`` in the default cache. As with DRF's own
+    throttles the update is a read-modify-write, so concurrent requests may
+    overdraw a bucket by a request or two; the cache has to be shared
+    between processes for the limit to be global.
+    """
+
+    def get_rate(self):
+        # Read per request rather than frozen at import, so settings
+        # overrides (tests, benchmarks) apply.
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - updated) * self.num_requests / self.duration)
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        # A bucket left alone for a whole period is full again, which is the
+        # same as having no entry.
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginAccountThrottle(TokenBucketThrottle):
+    """
+    Keyed on the account identifier in the request body, named by the
+    view's ``throttle_account_field``. This also slows the real owner
+    while their account is under attack, which is the price of bounding
+    a distributed attack on one account.
+    """
+    scope = 'login_account'
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        identifier = data.get(view.throttle_account_field) if isinstance(data, dict) else None
+        if not isinstance(identifier, str) or not identifier.strip():
+            # Nothing to hash; the serializer rejects the request.
+            return None
+        digest = hashlib.md5(identifier.strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
@@ -2,9 +2,11 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from .authentication import revocations, tokens_for
+from .ingest import contact_buffer
 from .serializers import RegisterSerializer, LoginSerializer
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .throttling import LoginAccountThrottle, LoginIPThrottle
 from rest_framework import permissions
 from .models import ContactMessage
 from .serializers import ContactMessageSerializer
@@ -31,12 +33,14 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
+    throttle_account_field = 'email'
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for(user)
             return Response(
                 {
                     "message": "Login successful",
@@ -50,9 +54,10 @@ class LoginView(APIView):
 
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
 
     def post(self, request):
+        if request.auth is not None:
+            revocations.revoke_token(request.auth)
         return Response(
             {"message": "Logged out successfully"},
             status=status.HTTP_200_OK
@@ -62,3 +67,12 @@ class LogoutView(APIView):
 class ContactMessageCreateView(generics.CreateAPIView):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
+
+    def create(self, request, *args, **kwargs):
+        if settings.CONTACT_INGEST_MODE != 'buffered':
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Accepted, not yet stored: there is no id or created_at to return.
+        contact_buffer.submit(serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
@@ -2,6 +2,8 @@
 ASGI config for music_store project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Set ROOT_URLCONF=music_store.urls_async to serve the catalog and cart reads
+from native async views instead of synchronous ones run in threads.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,236 @@
+"""
+Response compression negotiated from ``Accept-Encoding``.
+
+``CompressionMiddleware`` encodes a response with the first of
+``COMPRESSION_ENCODINGS`` (zstd, br, gzip by default) that the client
+accepts with the highest q-value. zstd and brotli need the optional
+``zstandard`` and ``brotli`` packages; encodings whose package is missing
+are never offered, so without either only gzip is used. Bodies under
+``COMPRESSION_MIN_SIZE`` bytes, content types that do not compress (only
+text, JSON, XML, CSV and JavaScript do) and responses that already carry a
+``Content-Encoding`` are sent as they are. Streaming responses, such as
+the admin exports, are compressed chunk by chunk as they are sent, each
+chunk flushed out of the compressor so the client gets it at once rather
+than when the compressor's window fills.
+
+brotli and zstandard are optional and not in requirements.txt; install
+them to offer br and zstd.
+
+A response may carry bodies compressed ahead of time in
+``encoded_variants`` (``{encoding: bytes}``); the middleware sends the
+negotiated one instead of compressing. The catalog cache stores them
+next to each cached body (``precompress``), at slower, denser levels, so
+a popular page is compressed once per catalog version rather than once
+per request.
+"""
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+}
+
+
+class GzipCodec:
+    name = 'gzip'
+    level = 6
+    precompress_level = 9
+
+    def compressobj(self, level=None):
+        # wbits 31: a gzip header and trailer around the deflate stream.
+        return zlib.compressobj(level or self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data, level=None):
+        compressor = self.compressobj(level)
+        return compressor.compress(data) + compressor.flush()
+
+    def flush_block(self, compressor):
+        return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class BrotliCodec:
+    name = 'br'
+    level = 4
+    precompress_level = 9
+
+    class Stream:
+        def __init__(self, compressor):
+            self.compressor = compressor
+
+        def compress(self, data):
+            return self.compressor.process(data)
+
+        def flush_block(self):
+            return self.compressor.flush()
+
+        def flush(self):
+            return self.compressor.finish()
+
+    def compressobj(self, level=None):
+        return self.Stream(brotli.Compressor(quality=level or self.level))
+
+    def compress(self, data, level=None):
+        return brotli.compress(data, quality=level or self.level)
+
+    def flush_block(self, compressor):
+        return compressor.flush_block()
+
+
+class ZstdCodec:
+    name = 'zstd'
+    level = 3
+    precompress_level = 12
+
+    def compressobj(self, level=None):
+        return zstandard.ZstdCompressor(level=level or self.level).compressobj()
+
+    def compress(self, data, level=None):
+        return zstandard.ZstdCompressor(level=level or self.level).compress(data)
+
+    def flush_block(self, compressor):
+        return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+CODECS = {'gzip': GzipCodec()}
+if brotli is not None:
+    CODECS['br'] = BrotliCodec()
+if zstandard is not None:
+    CODECS['zstd'] = ZstdCodec()
+
+
+def available_codecs():
+    """The configured codecs that can run here, in order of preference."""
+    return [CODECS[name] for name in settings.COMPRESSION_ENCODINGS if name in CODECS]
+
+
+def accepted_encodings(header):
+    """``{coding: q}`` from an ``Accept-Encoding`` header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = part.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding == 'x-gzip':
+            coding = 'gzip'
+        accepted[coding] = max(quality, accepted.get(coding, 0.0))
+    return accepted
+
+
+def negotiate(header):
+    """The codec to encode a response with for ``header``, or None for identity."""
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for codec in available_codecs():
+        quality = accepted.get(codec.name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return (
+        media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith('+json') or media_type.endswith('+xml')
+    )
+
+
+def precompress(content, content_type):
+    """
+    ``{encoding: bytes}`` for every available codec that shrinks
+    ``content``, at the codecs' precompression levels. Empty for bodies the
+    middleware would send uncompressed.
+    """
+    if len(content) < settings.COMPRESSION_MIN_SIZE or not is_compressible(content_type):
+        return {}
+    variants = {}
+    for codec in available_codecs():
+        compressed = codec.compress(content, codec.precompress_level)
+        if len(compressed) < len(content):
+            variants[codec.name] = compressed
+    return variants
+
+
+def compress_chunk(codec, compressor, chunk):
+    """``chunk`` compressed and flushed, so it can be decoded on arrival."""
+    if not chunk:
+        return b''
+    return compressor.compress(chunk) + codec.flush_block(compressor)
+
+
+def compress_stream(codec, chunks):
+    compressor = codec.compressobj()
+    for chunk in chunks:
+        data = compress_chunk(codec, compressor, chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def acompress_stream(codec, chunks):
+    compressor = codec.compressobj()
+    async for chunk in chunks:
+        data = compress_chunk(codec, compressor, chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(codec, response.streaming_content)
+            # The compressed length is known only once the stream ends.
+            del response.headers['Content-Length']
+        else:
+            content = (getattr(response, 'encoded_variants', None) or {}).get(codec.name)
+            if content is None:
+                content = codec.compress(response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # The encoded body is a different representation: a strong ETag
+        # becomes weak (RFC 9110 8.8.1), which still matches If-None-Match.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
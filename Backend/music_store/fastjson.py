@@ -0,0 +1,86 @@
+"""
+JSON renderer and parser for DRF built on orjson when it is installed.
+
+``FastJSONRenderer`` writes the same bytes as DRF's ``JSONRenderer`` for
+compact output: datetimes, dates, times, decimals, UUIDs, lazy strings and
+querysets go through DRF's own encoder, and U+2028/U+2029 are escaped.
+(Two differences remain: orjson writes NaN and infinities as ``null``
+where STRICT_JSON makes the standard library raise, and spells float
+exponents without a sign or padding, ``1e-7`` for ``1e-07``.)
+Indented or non-compact output (``Accept: application/json; indent=4``,
+the browsable API) is left to ``JSONRenderer``. orjson is in
+requirements.txt; where it is missing both classes run on the standard
+library, with the same output, only slower.
+
+They are the project defaults (``REST_FRAMEWORK`` in settings); a view
+picks another pair with ``renderer_classes`` / ``parser_classes`` as
+usual, or subclasses them to change ``use_orjson``.
+"""
+import codecs
+import json
+
+from rest_framework.compat import SHORT_SEPARATORS
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    use_orjson = orjson is not None
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def dumps(self, data):
+        if self.use_orjson:
+            try:
+                encoded = orjson.dumps(
+                    data, default=self.default,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                )
+            except orjson.JSONEncodeError:
+                # Integers beyond 64 bits, for one; the standard library
+                # takes anything JSONRenderer does.
+                pass
+            else:
+                if b'\xe2\x80' in encoded:
+                    for separator, escaped in LINE_SEPARATORS:
+                        encoded = encoded.replace(separator, escaped)
+                return encoded
+        encoded = json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=SHORT_SEPARATORS,
+        )
+        return encoded.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+    use_orjson = orjson is not None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not self.use_orjson:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        try:
+            body = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding)
+            # orjson rejects NaN and Infinity, as STRICT_JSON asks.
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
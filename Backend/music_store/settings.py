@@ -47,9 +47,12 @@ INSTALLED_APPS = [
     'apps.products.apps.ProductsConfig',
     'apps.admins.apps.AdminsConfig',
     'apps.users.apps.UsersConfig',
+    'apps.jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
+    'music_store.timing.RequestTimingMiddleware',
+    'music_store.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,7 +63,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'music_store.urls'
+# 'music_store.urls_async' serves the catalog and cart reads from async views
+# (for ASGI deployments).
+ROOT_URLCONF = env('ROOT_URLCONF', default='music_store.urls')
 
 TEMPLATES = [
     {
@@ -95,6 +100,30 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# The catalog version lives in this cache, so every worker process must
+# share it; the products.E001 check rejects local memory outside DEBUG.
+CATALOG_CACHE_ALIAS = env('CATALOG_CACHE_ALIAS', default='default')
+
+CATALOG_CACHE_TIMEOUT = env.int('CATALOG_CACHE_TIMEOUT', default=60 * 60 * 24)
+
+# Store compressed copies of each cached catalog body next to it, so hits
+# are not compressed again (music_store/compression.py).
+CATALOG_CACHE_PRECOMPRESS = env.bool('CATALOG_CACHE_PRECOMPRESS', default=True)
+
+# Response compression, in order of preference. zstd and br are offered
+# only when the optional zstandard and brotli packages are installed.
+COMPRESSION_ENCODINGS = env.list('COMPRESSION_ENCODINGS', default=['zstd', 'br', 'gzip'])
+
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,12 +165,90 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Stateless mode builds request.user from token claims instead of loading
+# auth.User on every request; see apps/users/authentication.py.
+JWT_STATELESS_AUTH = env.bool('JWT_STATELESS_AUTH', default=True)
+
+# Logouts and user changes reach other worker processes only if this cache
+# is shared between them (CACHE_URL pointing at Redis or Memcached).
+JWT_REVOCATION_CACHE_ALIAS = env('JWT_REVOCATION_CACHE_ALIAS', default='default')
+
+JWT_REVOCATION_LOCAL_TTL = env.int('JWT_REVOCATION_LOCAL_TTL', default=5)
+
 REST_FRAMEWORK = {
+    # DRF's defaults with the JSON pair swapped for music_store/fastjson.py,
+    # which runs on orjson when it is installed.
+    'DEFAULT_RENDERER_CLASSES': (
+        'music_store.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'music_store.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'apps.users.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Token buckets on the login endpoints: a burst of n, then n per period.
+    # Each attempt that passes costs a full password hash (about 0.5 s of
+    # CPU with Django's PBKDF2 defaults).
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': env('LOGIN_IP_RATE', default='10/min'),
+        'login_account': env('LOGIN_ACCOUNT_RATE', default='5/min'),
+    },
 }
 
+CATALOG_PAGE_SIZE = env.int('CATALOG_PAGE_SIZE', default=24)
+
+CATALOG_MAX_PAGE_SIZE = env.int('CATALOG_MAX_PAGE_SIZE', default=100)
+
+ADMIN_PAGE_SIZE = env.int('ADMIN_PAGE_SIZE', default=50)
+
+ADMIN_MAX_PAGE_SIZE = env.int('ADMIN_MAX_PAGE_SIZE', default=500)
+
+# Contact form ingestion: 'direct' inserts each message in the request,
+# 'buffered' queues it and writes batches from a background thread
+# (apps/users/ingest.py).
+CONTACT_INGEST_MODE = env('CONTACT_INGEST_MODE', default='direct')
+
+CONTACT_QUEUE_SIZE = env.int('CONTACT_QUEUE_SIZE', default=10000)
+
+CONTACT_BATCH_SIZE = env.int('CONTACT_BATCH_SIZE', default=500)
+
+CONTACT_FLUSH_INTERVAL = env.float('CONTACT_FLUSH_INTERVAL', default=1.0)
+
+CONTACT_SPOOL_PATH = env('CONTACT_SPOOL_PATH', default=str(BASE_DIR / 'contact_spool.jsonl'))
+
+# Background jobs (apps/jobs): run them with ``manage.py run_workers``.
+JOBS_PROCESSES = env.int('JOBS_PROCESSES', default=2)
+
+JOBS_BATCH_SIZE = env.int('JOBS_BATCH_SIZE', default=20)
+
+JOBS_POLL_INTERVAL = env.float('JOBS_POLL_INTERVAL', default=1.0)
+
+JOBS_MAX_ATTEMPTS = env.int('JOBS_MAX_ATTEMPTS', default=5)
+
+# Retry n waits about JOBS_RETRY_BACKOFF * 2**(n-1) seconds, capped.
+JOBS_RETRY_BACKOFF = env.float('JOBS_RETRY_BACKOFF', default=2.0)
+
+JOBS_RETRY_BACKOFF_MAX = env.float('JOBS_RETRY_BACKOFF_MAX', default=600.0)
+
+# A running job whose worker is silent this long is handed to another.
+JOBS_LEASE_SECONDS = env.int('JOBS_LEASE_SECONDS', default=300)
+
+JOBS_KEEP_DONE_HOURS = env.int('JOBS_KEEP_DONE_HOURS', default=24)
+
+REQUEST_TIMING_SLOW_MS = env.int('REQUEST_TIMING_SLOW_MS', default=500)
+
+REQUEST_TIMING_DUPLICATE_THRESHOLD = env.int('REQUEST_TIMING_DUPLICATE_THRESHOLD', default=5)
+
+# Server-Timing exposes query counts and timings to every client, so it is
+# on only in development unless asked for.
+REQUEST_TIMING_HEADER = env.bool('REQUEST_TIMING_HEADER', default=DEBUG)
+
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=[])
 
 CORS_ALLOW_CREDENTIALS = env.bool('CORS_ALLOW_CREDENTIALS', default=True)
@@ -154,4 +261,5 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'apps.users.authentication.StoreTokenUser',
 }
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Settings for the endpoint benchmarks: the project settings on a local SQLite
+database, so ``bench_endpoints`` runs without MySQL.
+
+    DJANGO_SETTINGS_MODULE=music_store.settings_bench python manage.py migrate
+    DJANGO_SETTINGS_MODULE=music_store.settings_bench python manage.py bench_endpoints
+"""
+import os
+
+for name, value in (
+    ('SECRET_KEY', 'bench-insecure-secret-key-not-for-production-use'),
+    ('DB_NAME', ''), ('DB_USER', ''), ('DB_PASSWORD', ''), ('DB_HOST', ''), ('DB_PORT', ''),
+    ('ACCESS_TOKEN_LIFETIME_DAYS', '1'),
+    ('REFRESH_TOKEN_LIFETIME_DAYS', '1'),
+):
+    if not os.environ.get(name):
+        os.environ[name] = value
+
+from .settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env('BENCH_DB_NAME', default=str(BASE_DIR / 'bench.sqlite3')),
+        # Take the write lock when a transaction begins, so concurrent
+        # writers (bench_inventory's checkouts) wait for it instead of
+        # failing with "database is locked" when a read upgrades to a write.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 30},
+    }
+}
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# The benchmarks serve from one process, so a local-memory catalog cache
+# is consistent here.
+SILENCED_SYSTEM_CHECKS = ['products.E001']
+
+BENCH_BASELINE_PATH = env('BENCH_BASELINE_PATH', default=str(BASE_DIR / 'bench_baseline.json'))
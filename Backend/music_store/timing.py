@@ -0,0 +1,232 @@
+"""
+Per-request timing: database queries, view time, render time and total,
+reported in a ``Server-Timing`` header when ``REQUEST_TIMING_HEADER`` is set
+(by default only with ``DEBUG``) and folded into in-process per-view
+histograms that staff can read at ``/api/admin/metrics/requests/``.
+
+Queries are observed with an execute wrapper, so this works with
+``DEBUG = False`` and costs a clock read and a dict update per query. The
+wrapper finds the request's timer through a context variable, which
+``sync_to_async`` carries into the threads where async views run their
+queries.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RequestTimer:
+    """Query observer and clock for one request."""
+    worst = 3
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.render_start = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            # ``sql`` still has its placeholders, so repeats of one statement
+            # with different parameters count as duplicates.
+            self.statements[sql] += 1
+            entry = (duration, self.queries, sql)
+            if len(self.slowest) < self.worst:
+                heapq.heappush(self.slowest, entry)
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def worst_queries(self):
+        return [(sql, duration) for duration, _, sql in sorted(self.slowest, reverse=True)]
+
+
+class RequestMetrics:
+    """Thread-safe per-view latency histograms for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, total_ms, db_ms, queries):
+        bucket = len(BUCKETS)
+        for index, bound in enumerate(BUCKETS):
+            if total_ms <= bound:
+                bucket = index
+                break
+        with self._lock:
+            entry = self._views.get(view)
+            if entry is None:
+                entry = self._views[view] = {
+                    'count': 0, 'total_ms': 0.0, 'db_ms': 0.0, 'queries': 0, 'max_ms': 0.0,
+                    'buckets': [0] * (len(BUCKETS) + 1),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += total_ms
+            entry['db_ms'] += db_ms
+            entry['queries'] += queries
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['buckets'][bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            views = {view: dict(entry, buckets=list(entry['buckets'])) for view, entry in self._views.items()}
+        labels = [f'le_{bound}ms' for bound in BUCKETS] + ['inf']
+        return {
+            view: {
+                'count': entry['count'],
+                'mean_ms': round(entry['total_ms'] / entry['count'], 3),
+                'mean_db_ms': round(entry['db_ms'] / entry['count'], 3),
+                'mean_queries': round(entry['queries'] / entry['count'], 2),
+                'max_ms': round(entry['max_ms'], 3),
+                'buckets': dict(zip(labels, entry['buckets'])),
+            }
+            for view, entry in sorted(views.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_metrics = RequestMetrics()
+
+current_timer = ContextVar('request_timer', default=None)
+
+
+def observe(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(request_started)
+def install_observer(**kwargs):
+    # Sent in the thread that runs the request's queries: the request thread
+    # under WSGI, the request's sync thread under ASGI.
+    for connection in connections.all():
+        if observe not in connection.execute_wrappers:
+            connection.execute_wrappers.append(observe)
+
+
+class RequestTimingMiddleware:
+    """
+    Place first in ``MIDDLEWARE`` so the total covers the whole stack.
+
+    ``view`` in the Server-Timing header is time spent in the view outside
+    the database (building querysets and serializing), ``render`` is DRF's
+    response rendering, ``db`` carries the query count in its description.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = settings.REQUEST_TIMING_SLOW_MS
+        self.duplicate_threshold = settings.REQUEST_TIMING_DUPLICATE_THRESHOLD
+        self.header = settings.REQUEST_TIMING_HEADER
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django adapts hooks to the handler's mode, which for
+            # synchronous ones under ASGI means a thread hop per request.
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = request._timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer = request._timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        end = time.perf_counter()
+        total_ms = (end - timer.start) * 1000
+        db_ms = timer.db_time * 1000
+        render_ms = (end - timer.render_start) * 1000 if timer.render_start else 0.0
+        view_ms = 0.0
+        if timer.view_start:
+            view_ms = max(((timer.render_start or end) - timer.view_start) * 1000 - db_ms, 0.0)
+
+        match = request.resolver_match
+        view = (match.route or match.view_name) if match else 'unresolved'
+        request_metrics.record(view, total_ms, db_ms, timer.queries)
+
+        if self.header:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.2f};desc="{timer.queries} queries", '
+                f'view;dur={view_ms:.2f}, render;dur={render_ms:.2f}, total;dur={total_ms:.2f}'
+            )
+        self.log(request, timer, total_ms, db_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timer.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called last for the outermost middleware, just before render().
+        request._timer.render_start = time.perf_counter()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._timer.view_start = time.perf_counter()
+
+    async def aprocess_template_response(self, request, response):
+        request._timer.render_start = time.perf_counter()
+        return response
+
+    def log(self, request, timer, total_ms, db_ms):
+        duplicates = timer.duplicates(self.duplicate_threshold)
+        if duplicates:
+            logger.warning(
+                'Repeated queries on %s %s (possible N+1): %s',
+                request.method, request.path,
+                '; '.join(f'{count}x {sql[:200]}' for sql, count in duplicates[:3]),
+            )
+        if total_ms >= self.slow_ms:
+            logger.warning(
+                'Slow request %s %s: %.1f ms total, %.1f ms in %d queries. Slowest: %s',
+                request.method, request.path, total_ms, db_ms, timer.queries,
+                '; '.join(f'{duration * 1000:.1f} ms {sql[:200]}' for sql, duration in timer.worst_queries()),
+            )
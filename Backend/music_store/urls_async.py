@@ -0,0 +1,14 @@
+"""
+URLconf for ASGI deployments: the same routes as ``music_store.urls``, with
+the catalog and cart reads served by the async views in
+``apps.products.async_views``. Select it with ``ROOT_URLCONF``.
+"""
+from django.urls import path,include
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    # Matched first, so these shadow the synchronous views on the same paths.
+    path('api/',include('apps.products.urls_async')),
+    *sync_urlpatterns,
+]
@@ -26,7 +26,7 @@ export default function Dashboard() {
 
       setStats({
         products: productsRes.data.length,
-        orders: ordersRes.data.length,
+        orders: ordersRes.data.count,
         users: usersRes.data.length,
       });
     } catch (err) {
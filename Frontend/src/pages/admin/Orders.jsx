@@ -6,13 +6,16 @@ import useAuthGuard from "../../components/admin/auth/useAuthGuard";
 
 export default function Orders() {
   const [orders, setOrders] = useState([]);
+  const [page, setPage] = useState(1);
+  const [hasNext, setHasNext] = useState(false);
   useAuthGuard();
 
   useEffect(() => {
     const fetchOrders = async () => {
       try {
-        const res = await api.get("orders/");
-        setOrders(res.data);
+        const res = await api.get("orders/", { params: { page } });
+        setOrders(res.data.results);
+        setHasNext(Boolean(res.data.next));
       } catch(err) {
         const status = err?.response?.status;
         if (status === 401) {
@@ -23,7 +26,7 @@ export default function Orders() {
       }
     };
     fetchOrders();
-  }, []);
+  }, [page]);
 
   const getStatusClass = (status) => {
     switch (status) {
@@ -121,6 +124,24 @@ export default function Orders() {
           </div>
         ))}
       </div>
+
+      <div className="flex justify-center items-center gap-4 mt-6">
+        <button
+          onClick={() => setPage(page - 1)}
+          disabled={page === 1}
+          className="px-4 py-2 rounded-lg bg-gray-200 hover:bg-gray-300 disabled:opacity-50"
+        >
+          Previous
+        </button>
+        <span className="text-gray-700">Page {page}</span>
+        <button
+          onClick={() => setPage(page + 1)}
+          disabled={!hasNext}
+          className="px-4 py-2 rounded-lg bg-gray-200 hover:bg-gray-300 disabled:opacity-50"
+        >
+          Next
+        </button>
+      </div>
     </div>
   );
 };
@@ -13,17 +13,27 @@ export default function ProductList() {
   const [isSearchSubmitted, setIsSearchSubmitted] = useState(false);
   const navigate = useNavigate();
 
+  const [nextPage, setNextPage] = useState(null);
+
+  const appendPage = (data) => {
+    const results = data?.results || [];
+    setProducts(prev => [...prev, ...results]);
+    setFilteredProducts(prev => [...prev, ...results]);
+    setQuantities(prev => {
+      const next = { ...prev };
+      results.forEach(product => {
+        next[product.id] = 1;
+      });
+      return next;
+    });
+    setNextPage(data?.next || null);
+  };
+
   useEffect(() => {
     const fetchProducts = async () => {
       try {
         const res = await api.get('/product/');
-        setProducts(res.data || []);
-        setFilteredProducts(res.data || []);
-        const initialQuantities = {};
-        res.data.forEach(product => {
-          initialQuantities[product.id] = 1;
-        });
-        setQuantities(initialQuantities);
+        appendPage(res.data);
       } catch {
         setError('Failed to load products.');
         toast.error('Failed to load products.');
@@ -35,16 +45,35 @@ export default function ProductList() {
     fetchProducts();
   }, [navigate]);
 
-  const handleSubmit = (e) => {
+  const loadMore = async () => {
+    try {
+      const res = await api.get(nextPage);
+      appendPage(res.data);
+    } catch {
+      toast.error('Failed to load more products.');
+    }
+  };
+
+  const handleSubmit = async (e) => {
     e.preventDefault();
-    const filtered = products.filter(p =>
-      p.name.toLowerCase().includes(filterProduct.toLowerCase())
-    );
-    setFilteredProducts(filtered);
-    setIsSearchSubmitted(true);
-
-    if (filtered.length === 0) {
-      toast.info('No products matched your search.');
+    try {
+      const res = await api.get('/product/search/', { params: { q: filterProduct } });
+      const filtered = res.data?.results || [];
+      setFilteredProducts(filtered);
+      setQuantities(prev => {
+        const next = { ...prev };
+        filtered.forEach(product => {
+          next[product.id] = next[product.id] || 1;
+        });
+        return next;
+      });
+      setIsSearchSubmitted(true);
+
+      if (filtered.length === 0) {
+        toast.info('No products matched your search.');
+      }
+    } catch {
+      toast.error('Search failed. Please try again.');
     }
   };
 
@@ -190,6 +219,17 @@ export default function ProductList() {
           <p className="text-center col-span-full text-gray-500 mt-10">No products found.</p>
         )}
       </div>
+
+      {nextPage && !isSearchSubmitted && (
+        <div className="flex justify-center pb-10">
+          <button
+            onClick={loadMore}
+            className="bg-purple-600 text-white px-6 py-2 rounded-lg hover:bg-purple-700 transition"
+          >
+            Load More
+          </button>
+        </div>
+      )}
     </div>
   );
 }